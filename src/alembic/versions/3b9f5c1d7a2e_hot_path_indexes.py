@@ -0,0 +1,55 @@
+"""Hot path indexes
+
+Revision ID: 3b9f5c1d7a2e
+Revises: aeada8677ae1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f5c1d7a2e'
+down_revision: Union[str, None] = 'aeada8677ae1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_account_user', 'account', ['user']),
+    ('ix_account_subscription', 'account', ['subscription']),
+    ('ix_account_created_at_id', 'account', ['created_at', 'id']),
+    (
+        'ix_account_status_account_created_at',
+        'account_status',
+        ['account', 'created_at'],
+    ),
+    ('ix_account_status_created_at_id', 'account_status', ['created_at', 'id']),
+    ('ix_tariff_subscription_created_at', 'tariff', ['subscription', 'created_at']),
+    ('ix_tariff_created_at_id', 'tariff', ['created_at', 'id']),
+    ('ix_subscription_name_id', 'subscription', ['name', 'id']),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                schema='subscriptions',
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                schema='subscriptions',
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,40 @@
+"""Account expiry index
+
+Revision ID: 5d21f0a9e3c7
+Revises: c4e8a2f61b90
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d21f0a9e3c7'
+down_revision: Union[str, None] = 'c4e8a2f61b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_account_active_expires_at',
+            'account',
+            ['expires_at'],
+            schema='subscriptions',
+            postgresql_where=sa.text("status = 'active'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_account_active_expires_at',
+            table_name='account',
+            schema='subscriptions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,54 @@
+"""Invoice mirror
+
+Revision ID: 7a4e2b9d6c13
+Revises: 2f6b8d0c1e47
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e2b9d6c13'
+down_revision: Union[str, None] = '2f6b8d0c1e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invoice',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('modified_at', sa.DateTime(), nullable=False),
+        sa.Column('account', sa.UUID(), nullable=False),
+        sa.Column('tariff', sa.UUID(), nullable=False),
+        sa.Column('status', sa.String(length=255), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='subscriptions',
+    )
+    op.create_index(
+        'ix_invoice_account_created_at',
+        'invoice',
+        ['account', 'created_at'],
+        unique=False,
+        schema='subscriptions',
+    )
+    op.add_column(
+        'billing_event_queue',
+        sa.Column('invoice', sa.UUID(), nullable=True),
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('billing_event_queue', 'invoice', schema='subscriptions')
+    op.drop_index(
+        'ix_invoice_account_created_at', table_name='invoice', schema='subscriptions'
+    )
+    op.drop_table('invoice', schema='subscriptions')
@@ -0,0 +1,36 @@
+"""Billing event queue
+
+Revision ID: 9c3d7e15a4b8
+Revises: e7a1c93b5f02
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d7e15a4b8'
+down_revision: Union[str, None] = 'e7a1c93b5f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'billing_event_queue',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=True),
+        sa.Column('account', sa.UUID(), nullable=False),
+        sa.Column('tariff', sa.UUID(), nullable=False),
+        sa.Column('payment_status', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('billing_event_queue', schema='subscriptions')
@@ -0,0 +1,37 @@
+"""Billing event queue account index
+
+Revision ID: b83f4c2a9d17
+Revises: 7a4e2b9d6c13
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83f4c2a9d17'
+down_revision: Union[str, None] = '7a4e2b9d6c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_billing_event_queue_account_id',
+            'billing_event_queue',
+            ['account', 'id'],
+            schema='subscriptions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_billing_event_queue_account_id',
+            table_name='billing_event_queue',
+            schema='subscriptions',
+            postgresql_concurrently=True,
+        )
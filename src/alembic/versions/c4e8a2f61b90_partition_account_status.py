@@ -0,0 +1,207 @@
+"""Partition account_status by month
+
+Revision ID: c4e8a2f61b90
+Revises: 3b9f5c1d7a2e
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f61b90'
+down_revision: Union[str, None] = '3b9f5c1d7a2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+# Rows of history copied per transaction.
+COPY_BATCH_SIZE = 10_000
+# Rows created by transactions still open this long before the final lock
+# may carry an older created_at than the last copied row; recheck them.
+COPY_OVERLAP = '1 hour'
+
+
+def upgrade() -> None:
+    # The partitioned table is built next to the live one and filled in
+    # batches, each in its own transaction; writers are only blocked for the
+    # final catch-up and the swap.
+    op.execute('CREATE SCHEMA IF NOT EXISTS subscriptions_archive;')
+    op.execute(
+        '''
+        CREATE TABLE subscriptions.account_status_partitioned (
+            id uuid NOT NULL,
+            account uuid REFERENCES subscriptions.account (id),
+            created_at timestamp NOT NULL DEFAULT (now() at time zone 'utc'),
+            expires_at timestamp,
+            status varchar(255),
+            CONSTRAINT account_status_partitioned_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+
+        CREATE INDEX ix_account_status_partitioned_account_created_at
+            ON subscriptions.account_status_partitioned (account, created_at);
+        CREATE INDEX ix_account_status_partitioned_created_at_id
+            ON subscriptions.account_status_partitioned (created_at, id);
+        '''
+    )
+    op.execute(
+        f'''
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc(
+                        'month',
+                        coalesce(
+                            (SELECT min(created_at) FROM subscriptions.account_status),
+                            now()
+                        )
+                    ),
+                    date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE subscriptions.%I '
+                    'PARTITION OF subscriptions.account_status_partitioned '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'account_status_p' || to_char(month, 'YYYYMM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+            END LOOP;
+        END;
+        $$;
+        '''
+    )
+
+    with op.get_context().autocommit_block():
+        last = copy_history(op.get_bind())
+
+    op.execute(
+        '''
+        LOCK TABLE subscriptions.account_status IN SHARE ROW EXCLUSIVE MODE;
+        '''
+    )
+    op.get_bind().execute(
+        sa.text(
+            f'''
+            INSERT INTO subscriptions.account_status_partitioned
+                (id, account, created_at, expires_at, status)
+            SELECT id, account, coalesce(created_at, now() at time zone 'utc'),
+                   expires_at, status
+            FROM subscriptions.account_status
+            WHERE created_at IS NULL
+               OR created_at > CAST(:created_at AS timestamp)
+                               - interval '{COPY_OVERLAP}'
+            ON CONFLICT DO NOTHING
+            '''
+        ),
+        {'created_at': last},
+    )
+    op.execute(
+        '''
+        DROP TABLE subscriptions.account_status;
+        ALTER TABLE subscriptions.account_status_partitioned RENAME TO account_status;
+        ALTER TABLE subscriptions.account_status
+            RENAME CONSTRAINT account_status_partitioned_pkey TO account_status_pkey;
+        ALTER INDEX subscriptions.ix_account_status_partitioned_account_created_at
+            RENAME TO ix_account_status_account_created_at;
+        ALTER INDEX subscriptions.ix_account_status_partitioned_created_at_id
+            RENAME TO ix_account_status_created_at_id;
+        '''
+    )
+    op.execute(
+        '''
+        CREATE FUNCTION subscriptions.create_account_status_partition(month date)
+        RETURNS void LANGUAGE plpgsql AS $$
+        DECLARE
+            lower_bound date := date_trunc('month', month)::date;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS subscriptions.%I '
+                'PARTITION OF subscriptions.account_status '
+                'FOR VALUES FROM (%L) TO (%L)',
+                'account_status_p' || to_char(lower_bound, 'YYYYMM'),
+                lower_bound,
+                (lower_bound + interval '1 month')::date
+            );
+        END;
+        $$;
+        '''
+    )
+
+
+def copy_history(bind: sa.Connection) -> datetime:
+    """
+    Copy dated history in (created_at, id) order, one batch per transaction.
+
+    Returns the created_at of the last copied row, where the catch-up starts.
+    """
+    last_created_at, last_id = datetime.min, uuid.UUID(int=0)
+    while True:
+        row = bind.execute(
+            sa.text(
+                '''
+                WITH batch AS (
+                    SELECT id, account, created_at, expires_at, status
+                    FROM subscriptions.account_status
+                    WHERE (created_at, id) > (:created_at, :id)
+                    ORDER BY created_at, id
+                    LIMIT :limit
+                ), copied AS (
+                    INSERT INTO subscriptions.account_status_partitioned
+                        (id, account, created_at, expires_at, status)
+                    SELECT id, account, created_at, expires_at, status FROM batch
+                )
+                SELECT created_at, id FROM batch
+                ORDER BY created_at DESC, id DESC
+                LIMIT 1
+                '''
+            ),
+            {'created_at': last_created_at, 'id': last_id, 'limit': COPY_BATCH_SIZE},
+        ).first()
+        if row is None:
+            return last_created_at
+        last_created_at, last_id = row
+
+
+def downgrade() -> None:
+    op.execute(
+        '''
+        ALTER TABLE subscriptions.account_status RENAME TO account_status_partitioned;
+        ALTER TABLE subscriptions.account_status_partitioned
+            RENAME CONSTRAINT account_status_pkey TO account_status_partitioned_pkey;
+        DROP INDEX subscriptions.ix_account_status_account_created_at;
+        DROP INDEX subscriptions.ix_account_status_created_at_id;
+
+        CREATE TABLE subscriptions.account_status (
+            id uuid NOT NULL,
+            account uuid REFERENCES subscriptions.account (id),
+            created_at timestamp,
+            expires_at timestamp,
+            status varchar(255),
+            CONSTRAINT account_status_pkey PRIMARY KEY (id)
+        );
+
+        INSERT INTO subscriptions.account_status
+            (id, account, created_at, expires_at, status)
+        SELECT id, account, created_at, expires_at, status
+        FROM subscriptions.account_status_partitioned;
+
+        DROP TABLE subscriptions.account_status_partitioned;
+        DROP FUNCTION subscriptions.create_account_status_partition(date);
+
+        CREATE INDEX ix_account_status_account_created_at
+            ON subscriptions.account_status (account, created_at);
+        CREATE INDEX ix_account_status_created_at_id
+            ON subscriptions.account_status (created_at, id);
+        '''
+    )
@@ -0,0 +1,42 @@
+"""Invoice sync queue
+
+Revision ID: d5a91c7e3b24
+Revises: b83f4c2a9d17
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a91c7e3b24'
+down_revision: Union[str, None] = 'b83f4c2a9d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'invoice_sync',
+        sa.Column('invoice', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('invoice'),
+        schema='subscriptions',
+    )
+    op.create_index(
+        'ix_invoice_sync_created_at',
+        'invoice_sync',
+        ['created_at'],
+        unique=False,
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_invoice_sync_created_at', table_name='invoice_sync', schema='subscriptions'
+    )
+    op.drop_table('invoice_sync', schema='subscriptions')
@@ -0,0 +1,46 @@
+"""Billing event attempts and dead letter table
+
+Revision ID: e2c7b1f94a06
+Revises: d5a91c7e3b24
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7b1f94a06'
+down_revision: Union[str, None] = 'd5a91c7e3b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'billing_event_queue',
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        schema='subscriptions',
+    )
+    op.create_table(
+        'billing_event_dead_letter',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=True),
+        sa.Column('account', sa.UUID(), nullable=False),
+        sa.Column('tariff', sa.UUID(), nullable=False),
+        sa.Column('invoice', sa.UUID(), nullable=True),
+        sa.Column('payment_status', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.Text(), nullable=False),
+        sa.Column('failed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('billing_event_dead_letter', schema='subscriptions')
+    op.drop_column('billing_event_queue', 'attempts', schema='subscriptions')
@@ -0,0 +1,46 @@
+"""Billing event idempotency keys
+
+Revision ID: e7a1c93b5f02
+Revises: 5d21f0a9e3c7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c93b5f02'
+down_revision: Union[str, None] = '5d21f0a9e3c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'billing_event',
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('account', sa.UUID(), nullable=False),
+        sa.Column('payment_status', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='subscriptions',
+    )
+    op.create_index(
+        'ix_billing_event_created_at',
+        'billing_event',
+        ['created_at'],
+        unique=False,
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_billing_event_created_at',
+        table_name='billing_event',
+        schema='subscriptions',
+    )
+    op.drop_table('billing_event', schema='subscriptions')
@@ -0,0 +1,30 @@
+"""Invoice sync lease
+
+Revision ID: f41d8a6c2b35
+Revises: e2c7b1f94a06
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f41d8a6c2b35'
+down_revision: Union[str, None] = 'e2c7b1f94a06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'invoice_sync',
+        sa.Column('leased_until', sa.DateTime(), nullable=True),
+        schema='subscriptions',
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('invoice_sync', 'leased_until', schema='subscriptions')
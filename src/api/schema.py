@@ -2,22 +2,33 @@ import decimal
 from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
-from typing import Union
+from typing import Generic, TypeVar, Union
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
-from models import Currency, PaymentStatus
+from models import Currency, PaymentEventOutcome, PaymentStatus
+
+T = TypeVar("T")
+
+# region Pagination
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+# endregion Pagination
 
 # region Subscriptions
 
 
 class SubscriptionBase(BaseModel):
-    name: str
-    is_deleted: bool
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+    name: str
+    is_deleted: bool = False
 
 
 class SubscriptionCreate(SubscriptionBase):
@@ -40,6 +51,8 @@ class SubscriptionUpdate(SubscriptionRead):
 
 
 class SubscriptionAccountBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     subscription_id: UUID
     status: str
@@ -51,6 +64,8 @@ class SubscriptionAccountCreate(SubscriptionAccountBase):
 
 
 class SubscriptionAccountRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     user_id: UUID
     subscription_id: UUID
@@ -58,26 +73,44 @@ class SubscriptionAccountRead(BaseModel):
     expires_at: datetime
 
 
+class SubscriptionAccountBatch(BaseModel):
+    ids: list[UUID]
+
+
 # endregion SubscriptionAccount
 
+# region Entitlement
+
+
+class EntitlementRead(BaseModel):
+    user_id: UUID
+    subscription_id: UUID
+    active: bool
+    expires_at: datetime | None
+
+
+# endregion Entitlement
+
 # region Tariff
 
 
 class BaseTariff(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
-    subscriptions_id: UUID
+    subscription_id: UUID
 
 
 class TariffRead(BaseTariff):
     created_at: datetime
-    expires_at: datetime
+    expires_at: datetime | None
     duration: int
     amount: decimal.Decimal
     currency: Currency
 
 
 class TariffCreate(BaseModel):
-    subscriptions_id: UUID
+    subscription_id: UUID
     created_at: datetime
     expires_at: datetime
     duration: int
@@ -87,7 +120,7 @@ class TariffCreate(BaseModel):
 
 class TariffUpdate(BaseModel):
     id: UUID
-    subscriptions_id: UUID
+    subscription_id: UUID
     created_at: datetime
     expires_at: datetime
     duration: int
@@ -102,7 +135,7 @@ class TariffUpdate(BaseModel):
 
 class InvoiceCreate(BaseModel):
     account_id: UUID
-    tarriff_id: UUID
+    tariff_id: UUID
 
 
 class InvoiceRead(BaseModel):
@@ -116,6 +149,24 @@ class InvoiceRead(BaseModel):
     public_id: str  # Идентификатор сайта, который находится в личном кабинете
 
 
+class PaymentEventCreate(BaseModel):
+    account_id: UUID
+    tariff_id: UUID
+    payment_status: PaymentStatus
+    event_id: str | None = Field(None, max_length=255)
+    invoice_id: UUID | None = None
+
+
+class PaymentEventBatch(BaseModel):
+    events: list[PaymentEventCreate]
+
+
+class PaymentEventResult(BaseModel):
+    account_id: UUID
+    event_id: str | None
+    outcome: PaymentEventOutcome
+
+
 # endregion Payments
 
 # region Errors
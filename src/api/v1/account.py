@@ -1,15 +1,34 @@
+import typing as t
 from uuid import UUID
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 
 import api.schema as schema
 import core.exceptions as exc
+from core.config import settings
+from core.http_cache import cache_headers, is_not_modified, not_modified
+from core.pagination import PaginateQueryParams
+from core.utils import orjson_default
 from managers.account import AccountManager, get_account_manager
 from src.auth.users import get_current_superuser, get_current_user
 
 router = APIRouter()
 router.prefix = "/accounts"
 
+# Per-user data: may be stored by the client only, and must be revalidated.
+ACCOUNT_CACHE_CONTROL = "private, no-cache"
+
+
+class RowsResponse(ORJSONResponse):
+    """ORJSONResponse for raw rows, whose UUIDs are asyncpg's UUID subclass."""
+
+    def render(self, content: t.Any) -> bytes:
+        return orjson.dumps(
+            content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
 
 @router.get(
     "/users/me",
@@ -17,12 +36,20 @@ router.prefix = "/accounts"
     description="Get user subscription accounts by user id",
 )
 async def get_me_subscription_accounts(
+    request: Request,
     account_manager: AccountManager = Depends(get_account_manager),
     user=Depends(get_current_user),
 ) -> list[schema.SubscriptionAccountBase]:
-    objects = await account_manager.get_by_user_id(user.id)
+    etag, modified_at = await account_manager.get_version_by_user_id(user.id)
+    headers = cache_headers(etag, modified_at, ACCOUNT_CACHE_CONTROL)
+    if is_not_modified(request, etag, modified_at):
+        return not_modified(headers)  # type: ignore
 
-    return [schema.SubscriptionAccountBase.model_validate(object) for object in objects]
+    rows = await account_manager.get_rows_by_user_id(
+        user.id, schema.SubscriptionAccountBase
+    )
+
+    return RowsResponse(rows, headers=headers)  # type: ignore
 
 
 @router.get(
@@ -35,9 +62,41 @@ async def get_user_subscription_accounts(
     account_manager: AccountManager = Depends(get_account_manager),
     user=Depends(get_current_superuser),
 ) -> list[schema.SubscriptionAccountBase]:
-    objects = await account_manager.get_by_user_id(user_id)
+    rows = await account_manager.get_rows_by_user_id(
+        user_id, schema.SubscriptionAccountBase
+    )
+
+    return RowsResponse(rows)  # type: ignore
+
+
+@router.get(
+    "/search",
+    summary="Search subscription accounts",
+    description="Get a page of subscription accounts ordered for keyset pagination",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid page cursor."},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def search_subscription_accounts(
+    pagination_params: PaginateQueryParams = Depends(),
+    filter_param: str | None = None,
+    account_manager: AccountManager = Depends(get_account_manager),
+    user=Depends(get_current_superuser),
+) -> schema.Page[schema.SubscriptionAccountRead]:
+    try:
+        page = await account_manager.search_rows(
+            pagination_params, schema.SubscriptionAccountRead, filter_param
+        )
+    except exc.InvalidCursor:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="invalid cursor")
 
-    return [schema.SubscriptionAccountBase.model_validate(object) for object in objects]
+    return RowsResponse(  # type: ignore
+        {"items": page.items, "next_cursor": page.next_cursor}
+    )
 
 
 @router.get(
@@ -58,7 +117,7 @@ async def get_subscription_account(
     account_manager: AccountManager = Depends(get_account_manager),
     user=Depends(get_current_superuser),
 ) -> schema.SubscriptionAccountRead:
-    object = await account_manager.get(subscription_account_id)
+    object = await account_manager.load(subscription_account_id)
 
     if object is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail=exc.ObjectNotExists)
@@ -66,6 +125,36 @@ async def get_subscription_account(
     return schema.SubscriptionAccountRead.model_validate(object)
 
 
+@router.post(
+    "/batch",
+    summary="Get subscription accounts by ids",
+    description="Get up to account_batch_max_size subscription accounts in one query, "
+    "unknown ids are skipped",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Too many ids."},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def get_subscription_accounts_batch(
+    batch: schema.SubscriptionAccountBatch,
+    account_manager: AccountManager = Depends(get_account_manager),
+    user=Depends(get_current_superuser),
+) -> list[schema.SubscriptionAccountRead]:
+    ids = set(batch.ids)
+    if len(ids) > settings.account_batch_max_size:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=f"at most {settings.account_batch_max_size} ids per request",
+        )
+
+    objects = await account_manager.get_many(ids) if ids else []
+
+    return [schema.SubscriptionAccountRead.model_validate(object) for object in objects]
+
+
 @router.post(
     "",
     summary="Create subscription account",
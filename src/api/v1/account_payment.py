@@ -3,6 +3,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 import api.schema as schema
+import core.exceptions as exc
 import models as models
 from auth.users import get_current_user
 from managers.account import AccountManager, get_account_manager
@@ -15,8 +16,11 @@ router.prefix = "/accounts"
 
 @router.get(
     "/{account_id}/invoice",
-    summary="Get subscription account invoice",
-    description="Get subscription account invoice by id",
+    summary="Get subscription account invoices",
+    description="Get the invoices of a subscription account from the local "
+    "invoice mirror, newest first. Returns a list; the former single-object "
+    "response was never served. An invoice known only from a payment webhook "
+    "has modified_at 0001-01-01T00:00:00 until it is fetched from billing.",
 )
 async def get_account_invoice(
     request: Request,
@@ -24,7 +28,7 @@ async def get_account_invoice(
     account_manager: AccountManager = Depends(get_account_manager),
     billing_manager: BillingManager = Depends(get_billing_manager),
     user=Depends(get_current_user),
-) -> schema.InvoiceRead:
+) -> list[models.InvoiceRead]:
     account = await account_manager.get(account_id)
     if account is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="account not found")
@@ -48,7 +52,7 @@ async def create_invoice(
     tariff_manager: TariffManager = Depends(get_tariff_manager),
     billing_manager: BillingManager = Depends(get_billing_manager),
     user=Depends(get_current_user),
-) -> schema.InvoiceRead:
+) -> models.InvoiceRead:
     account = await account_manager.get(invoice_create.account_id)
     if account is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="account not found")
@@ -66,11 +70,16 @@ async def create_invoice(
 
     invoice_create = models.InvoiceCreate(
         user_id=account.id,
-        service_id=account.tariff_id,
+        service_id=tariff.id,
         amount=tariff.amount,
         currency=tariff.currency,
     )
-    invoice = await billing_manager.create_invoice(invoice_create)
+    try:
+        invoice = await billing_manager.create_invoice(invoice_create)
+    except (exc.CircuitOpen, exc.DeadlineExceeded):
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE, detail="billing is unavailable"
+        )
 
     return invoice
 
@@ -85,7 +94,7 @@ async def create_refund(
     account_manager: AccountManager = Depends(get_account_manager),
     billing_manager: BillingManager = Depends(get_billing_manager),
     user=Depends(get_current_user),
-) -> Response(status_code=status.HTTP_202_ACCEPTED):
+) -> Response:
     account = await account_manager.get(account_id)
     if account is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="account not found")
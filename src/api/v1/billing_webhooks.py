@@ -1,14 +1,16 @@
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-import models
-from api.schema import ErrorCode, ErrorModel
+import core.exceptions as exc
+from api.schema import ErrorCode, ErrorModel, PaymentEventBatch, PaymentEventResult
 from auth.users import get_current_superuser
+from core.config import settings
+from db.billing_event import SABillingEventQueueDB, get_billing_event_queue_db
 from managers.account import AccountManager, get_account_manager
 from managers.tariff import TariffManager, get_tariff_manager
-from models import PaymentStatus
+from models import PaymentEvent, PaymentStatus
 
 router = APIRouter()
 router.prefix = "/internal/hooks/billing"
@@ -17,9 +19,15 @@ router.prefix = "/internal/hooks/billing"
 @router.post(
     "/payment",
     summary="Update account on payment",
-    description="Change account status on payment operation",
+    description="Change account status on payment operation. A delivery repeating "
+    "the event_id (billing event or invoice id) of an applied event is acknowledged "
+    "without changing the account. With the billing event queue enabled the event "
+    "is stored and applied asynchronously.",
     responses={
         status.HTTP_200_OK: {"description": "success"},
+        status.HTTP_202_ACCEPTED: {
+            "description": "The event is queued and will be applied shortly."
+        },
         status.HTTP_401_UNAUTHORIZED: {
             "description": "Missing token or inactive user."
         },
@@ -44,18 +52,25 @@ async def update_account(
     account_id: UUID,
     tariff_id: UUID,
     payment_status: PaymentStatus,
+    event_id: str | None = Query(None, max_length=255),
+    invoice_id: UUID | None = None,
     account_manager: AccountManager = Depends(get_account_manager),
     tariff_manager: TariffManager = Depends(get_tariff_manager),
+    queue_db: SABillingEventQueueDB = Depends(get_billing_event_queue_db),
     user=Depends(get_current_superuser),
-) -> Response(status_code=status.HTTP_200_OK):
-    account_status: models.SubscriptionStatus
-    expires_at: datetime
+) -> Response:
+    if event_id is not None and account_manager.is_seen_billing_event(event_id):
+        return Response(status_code=status.HTTP_200_OK)
 
-    account = await account_manager.get(account_id)
-    if account is None:
-        raise HTTPException(
-            status.HTTP_400_BAD_REQUEST, detail=ErrorCode.ACCOUNT_NOT_EXISTS
+    if settings.billing_event_queue_enabled:
+        await queue_db.enqueue(
+            account_id,
+            tariff_id,
+            payment_status.value,
+            event_id=event_id,
+            invoice_id=invoice_id,
         )
+        return Response(status_code=status.HTTP_202_ACCEPTED)
 
     tariff = await tariff_manager.get(tariff_id)
     if tariff is None:
@@ -63,20 +78,68 @@ async def update_account(
             status.HTTP_400_BAD_REQUEST, detail=ErrorCode.TARIFF_NOT_EXISTS
         )
 
-    if payment_status == PaymentStatus.paid:
-        account_status = models.SubscriptionStatus.active
+    try:
+        await account_manager.apply_payment(
+            account_id,
+            tariff,
+            payment_status,
+            event_id=event_id,
+            invoice_id=invoice_id,
+            request=request,
+        )
+    except exc.ObjectNotExists:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST, detail=ErrorCode.ACCOUNT_NOT_EXISTS
+        )
+
+    return Response(status_code=status.HTTP_200_OK)
 
-    elif payment_status == PaymentStatus.refunded:
-        account_status = models.SubscriptionStatus.inactive
 
-    if account_status is not None:
-        expires_at = account_manager.calculate_expires_at(
-            account, tariff, account_status
+@router.post(
+    "/payments",
+    summary="Update accounts on a batch of payments",
+    description="Apply up to billing_webhook_batch_max_size payment events in "
+    "order and report the outcome of each. Events are applied in chunks of "
+    "billing_webhook_chunk_size, one transaction per chunk; on an error the "
+    "committed chunks stay applied and a retry with the same event_ids skips them.",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Too many events."},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a billing service user."},
+    },
+)
+async def update_accounts(
+    batch: PaymentEventBatch,
+    account_manager: AccountManager = Depends(get_account_manager),
+    tariff_manager: TariffManager = Depends(get_tariff_manager),
+    user=Depends(get_current_superuser),
+) -> list[PaymentEventResult]:
+    if len(batch.events) > settings.billing_webhook_batch_max_size:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            detail=f"at most {settings.billing_webhook_batch_max_size} events "
+            "per request",
         )
-        account = await account_manager.update(
-            obj_update={'status': account_status, 'expires_at': expires_at},
-            object_=account,
-            request=request,
+
+    now = datetime.utcnow()
+    events = [
+        PaymentEvent(id=number, created_at=now, **event.model_dump())
+        for number, event in enumerate(batch.events)
+    ]
+    tariffs = await tariff_manager.get_many(event.tariff_id for event in events)
+
+    outcomes = []
+    chunk_size = settings.billing_webhook_chunk_size
+    for start in range(0, len(events), chunk_size):
+        outcomes += await account_manager.apply_payments(
+            events[start : start + chunk_size], tariffs
         )
 
-    return Response(status_code=status.HTTP_200_OK)
+    return [
+        PaymentEventResult(
+            account_id=event.account_id, event_id=event.event_id, outcome=outcome
+        )
+        for event, outcome in zip(events, outcomes)
+    ]
@@ -0,0 +1,32 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+
+import api.schema as schema
+from auth.users import get_current_superuser
+from managers.entitlement import EntitlementManager, get_entitlement_manager
+
+router = APIRouter()
+router.prefix = "/entitlements"
+
+
+@router.get(
+    "/check",
+    summary="Check user entitlement",
+    description="Check whether a user currently has an active subscription",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a service user."},
+    },
+)
+async def check_entitlement(
+    user_id: UUID,
+    subscription_id: UUID,
+    entitlement_manager: EntitlementManager = Depends(get_entitlement_manager),
+    user=Depends(get_current_superuser),
+) -> schema.EntitlementRead:
+    entitlement = await entitlement_manager.check(user_id, subscription_id)
+
+    return schema.EntitlementRead.model_validate(entitlement.model_dump())
@@ -0,0 +1,77 @@
+import typing as t
+from datetime import datetime
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
+
+from auth.users import get_current_superuser
+from core.utils import orjson_default
+from managers.account import AccountManager, get_account_manager
+from models import SubscriptionStatus
+
+router = APIRouter()
+router.prefix = "/admin/export"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _ndjson(
+    chunks: t.AsyncIterator[t.Sequence[t.Mapping[str, t.Any]]]
+) -> t.AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield b"".join(
+            orjson.dumps(
+                dict(row), default=orjson_default, option=orjson.OPT_APPEND_NEWLINE
+            )
+            for row in rows
+        )
+
+
+@router.get(
+    "/accounts",
+    summary="Export subscription accounts",
+    description="Stream subscription accounts as newline-delimited JSON",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def export_accounts(
+    account_status: SubscriptionStatus | None = None,
+    subscription_id: UUID | None = None,
+    updated_since: datetime | None = None,
+    account_manager: AccountManager = Depends(get_account_manager),
+    user=Depends(get_current_superuser),
+) -> StreamingResponse:
+    chunks = account_manager.export(account_status, subscription_id, updated_since)
+    return StreamingResponse(_ndjson(chunks), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get(
+    "/account-statuses",
+    summary="Export subscription account statuses",
+    description="Stream subscription account status history as newline-delimited JSON",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {NDJSON_MEDIA_TYPE: {}}},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def export_account_statuses(
+    account_status: SubscriptionStatus | None = None,
+    account_id: UUID | None = None,
+    created_since: datetime | None = None,
+    account_manager: AccountManager = Depends(get_account_manager),
+    user=Depends(get_current_superuser),
+) -> StreamingResponse:
+    chunks = account_manager.export_statuses(account_status, account_id, created_since)
+    return StreamingResponse(_ndjson(chunks), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,26 @@
+import typing as t
+
+from fastapi import APIRouter, Depends, status
+
+from auth.users import get_current_superuser
+from core.metrics import metrics
+
+router = APIRouter()
+router.prefix = "/internal/metrics"
+
+
+@router.get(
+    "",
+    summary="Get service metrics",
+    description="Get in-process metrics of this worker: DB pool usage, caches",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def get_metrics(
+    user=Depends(get_current_superuser),
+) -> dict[str, dict[str, t.Any]]:
+    return metrics.collect()
@@ -1,9 +1,12 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 import api.schema as schema
 import core.exceptions as exc
+from core.config import settings
+from core.http_cache import cache_headers, is_not_modified, not_modified
+from core.pagination import PaginateQueryParams
 from managers.subscription import SubcriptionManager, get_subscriptin_manager
 from src.auth.users import get_current_superuser
 
@@ -11,12 +14,54 @@ router = APIRouter()
 router.prefix = "/subscriptions"
 
 
+@router.get(
+    "/search",
+    summary="Search subscriptions",
+    description="Get a page of subscriptions ordered for keyset pagination",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid page cursor."},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def search_subscriptions(
+    pagination_params: PaginateQueryParams = Depends(),
+    filter_param: str | None = None,
+    subscriptin_manager: SubcriptionManager = Depends(get_subscriptin_manager),
+    user=Depends(get_current_superuser),
+) -> schema.Page[schema.SubscriptionRead]:
+    try:
+        page = await subscriptin_manager.search(pagination_params, filter_param)
+    except exc.InvalidCursor:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="invalid cursor")
+
+    return schema.Page[schema.SubscriptionRead](
+        items=[schema.SubscriptionRead.model_validate(object) for object in page.items],
+        next_cursor=page.next_cursor,
+    )
+
+
 @router.get("", summary="Get subscription", description="Get subscription by id")
 async def get_subscription(
+    request: Request,
+    response: Response,
     subscription_id: UUID,
     subscriptin_manager: SubcriptionManager = Depends(get_subscriptin_manager),
 ) -> schema.SubscriptionRead:
     object = await subscriptin_manager.get(subscription_id)
+    if object is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=exc.ObjectNotExists)
+
+    etag = subscriptin_manager.get_etag(object)
+    headers = cache_headers(
+        etag, cache_control=f"public, max-age={settings.catalog_cache_max_age}"
+    )
+    if is_not_modified(request, etag):
+        return not_modified(headers)  # type: ignore
+
+    response.headers.update(headers)
     return schema.SubscriptionRead.model_validate(object)
 
 
@@ -1,10 +1,13 @@
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 import api.schema as schema
 import core.exceptions as exc
+from core.config import settings
+from core.http_cache import cache_headers, is_not_modified, not_modified
+from core.pagination import PaginateQueryParams
 from managers.tariff import TariffManager, get_tariff_manager
 from src.auth.users import get_current_superuser
 
@@ -18,16 +21,60 @@ router.prefix = "/tariffs"
     description="Get tariff by subscription id and date",
 )
 async def get_tariff_by_subscription(
+    request: Request,
+    response: Response,
     subscription_id: UUID,
     date: datetime,
     tariff_manager: TariffManager = Depends(get_tariff_manager),
 ) -> schema.TariffRead:
-    object = await tariff_manager.get_by_subscription(subscription_id)
+    object = await tariff_manager.get_by_subscription(subscription_id, date)
+    if object is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=exc.ObjectNotExists)
+
+    etag = tariff_manager.get_etag(object)
+    headers = cache_headers(
+        etag, cache_control=f"public, max-age={settings.catalog_cache_max_age}"
+    )
+    if is_not_modified(request, etag):
+        return not_modified(headers)  # type: ignore
+
+    response.headers.update(headers)
     return schema.TariffRead.model_validate(object)
 
 
+@router.get(
+    "/search",
+    summary="Search tariffs",
+    description="Get a page of tariffs ordered for keyset pagination",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid page cursor."},
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Missing token or inactive user."
+        },
+        status.HTTP_403_FORBIDDEN: {"description": "Not a superuser."},
+    },
+)
+async def search_tariffs(
+    pagination_params: PaginateQueryParams = Depends(),
+    filter_param: str | None = None,
+    tariff_manager: TariffManager = Depends(get_tariff_manager),
+    user=Depends(get_current_superuser),
+) -> schema.Page[schema.TariffRead]:
+    try:
+        page = await tariff_manager.search(pagination_params, filter_param)
+    except exc.InvalidCursor:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="invalid cursor")
+
+    return schema.Page[schema.TariffRead](
+        items=[schema.TariffRead.model_validate(object) for object in page.items],
+        next_cursor=page.next_cursor,
+    )
+
+
 @router.get("", summary="Get tariff", description="Get tariff by id")
 async def get_tariff(
+    request: Request,
+    response: Response,
     tariff_id: UUID,
     tariff_manager: TariffManager = Depends(get_tariff_manager),
     user=Depends(get_current_superuser),
@@ -35,6 +82,16 @@ async def get_tariff(
     object = await tariff_manager.get(tariff_id)
     if object is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail=exc.ObjectNotExists)
+
+    etag = tariff_manager.get_etag(object)
+    # Behind authentication, so shared caches must not store it.
+    headers = cache_headers(
+        etag, cache_control=f"private, max-age={settings.catalog_cache_max_age}"
+    )
+    if is_not_modified(request, etag):
+        return not_modified(headers)  # type: ignore
+
+    response.headers.update(headers)
     return schema.TariffRead.model_validate(object)
 
 
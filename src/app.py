@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
 
-from api.v1 import account, account_payment, billing_webhooks, subscriptions, tariff
+from api.v1 import (
+    account,
+    account_payment,
+    billing_webhooks,
+    entitlements,
+    export,
+    metrics,
+    subscriptions,
+    tariff,
+)
 from core.config import settings
+from core.http_client import http_client
+from core.resilience import deadline_scope
+from db.notifications import listener
+from managers.catalog import catalog
 
 app = FastAPI(
     title=settings.project_name,
@@ -12,14 +25,26 @@ app = FastAPI(
 )
 
 
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    with deadline_scope(settings.request_deadline):
+        return await call_next(request)
+
+
 @app.on_event("startup")
 async def startup():
-    pass
+    # Background loops run in their own process, see worker.py.
+    http_client.start()
+    if settings.notify_listener_enabled:
+        listener.start()
+    if settings.catalog_enabled:
+        await catalog.refresh()
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    pass
+    await http_client.stop()
+    await listener.stop()
 
 
 app.include_router(
@@ -31,3 +56,8 @@ app.include_router(
     account_payment.router, prefix="/api/v1", tags=["Account", "Payment"]
 )
 app.include_router(tariff.router, prefix="/api/v1", tags=["Subscription", "Tariff"])
+app.include_router(export.router, prefix="/api/v1", tags=["Account", "Export"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
+app.include_router(
+    entitlements.router, prefix="/api/v1", tags=["Subscription", "Entitlement"]
+)
@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import logging
+import time
+import uuid
+
+import httpx
+import orjson
+
+from core.config import settings
+from core.http_client import get_http_client
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceTokenError(Exception):
+    ...
+
+
+def _token_expires_at(token: str) -> float | None:
+    """Read the `exp` claim of a JWT without verifying it; we are its bearer."""
+    try:
+        payload = token.split(".")[1]
+        claims = orjson.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+    except (IndexError, ValueError, orjson.JSONDecodeError):
+        return None
+
+    expires_at = claims.get("exp") if isinstance(claims, dict) else None
+    return float(expires_at) if expires_at is not None else None
+
+
+class ServiceTokenProvider:
+    """
+    Access token of this service for calls to other services.
+
+    The token is cached until `refresh_margin` seconds before its expiry.
+    Inside the margin the cached token is still returned while a refresh runs
+    in the background; an expired token is refreshed before returning.
+    Concurrent callers share one refresh. A refresh token rejected by the auth
+    service falls back to a fresh login.
+    """
+
+    def __init__(
+        self,
+        login_url: str,
+        refresh_url: str,
+        username: str,
+        password: str,
+        refresh_margin: float,
+        default_ttl: float,
+    ) -> None:
+        self.login_url = login_url
+        self.refresh_url = refresh_url
+        self.username = username
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.access_token: str | None = None
+        self.refresh_token: str | None = None
+        self.expires_at = 0.0
+        self.hits = 0
+        self.refreshes = 0
+        self.logins = 0
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get_token(self) -> str:
+        now = time.time()
+        if self.access_token is not None and now < self.expires_at:
+            self.hits += 1
+            if now >= self.expires_at - self.refresh_margin:
+                self._start_refresh()
+            return self.access_token
+
+        return await asyncio.shield(self._start_refresh())
+
+    def invalidate(self) -> None:
+        """Drop the access token, e.g. after the callee rejected it."""
+        self.access_token = None
+        self.expires_at = 0.0
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+        return self._refresh_task
+
+    async def _refresh(self) -> str:
+        if self.refresh_token is not None:
+            tokens = await self._exchange(self.refresh_token)
+            if tokens is not None:
+                self.refreshes += 1
+                return self._store(tokens)
+            self.refresh_token = None
+
+        tokens = await self._login()
+        self.logins += 1
+        if "access_token" not in tokens:
+            # The login only issued a refresh token, exchange it right away.
+            self.refresh_token = tokens["refresh_token"]
+            tokens = await self._exchange(self.refresh_token)
+            if tokens is None:
+                raise ServiceTokenError("refresh token rejected right after login")
+        return self._store(tokens)
+
+    async def _exchange(self, refresh_token: str) -> dict | None:
+        """Get new tokens for a refresh token, or None if it was rejected."""
+        response = await get_http_client().post(
+            self.refresh_url,
+            headers={
+                'X-Request-Id': str(uuid.uuid4()),
+                'Authorization': f'Bearer {refresh_token}',
+            },
+        )
+        if response.status_code in (httpx.codes.UNAUTHORIZED, httpx.codes.FORBIDDEN):
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def _login(self) -> dict:
+        response = await get_http_client().post(
+            self.login_url,
+            headers={'X-Request-Id': str(uuid.uuid4())},
+            data={"username": self.username, "password": self.password},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _store(self, tokens: dict) -> str:
+        access_token = tokens.get("access_token")
+        if not access_token:
+            raise ServiceTokenError("no access token in the auth response")
+
+        self.access_token = access_token
+        self.refresh_token = tokens.get("refresh_token", self.refresh_token)
+        expires_at = _token_expires_at(access_token)
+        if expires_at is None and "expires_in" in tokens:
+            expires_at = time.time() + float(tokens["expires_in"])
+        self.expires_at = expires_at or time.time() + self.default_ttl
+        return access_token
+
+    def _log_refresh_failure(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Service token refresh failed: %s", task.exception())
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "logins": self.logins,
+            "expires_in": max(self.expires_at - time.time(), 0.0),
+        }
+
+
+service_token_provider = ServiceTokenProvider(
+    login_url=settings.service_auth_login_url,
+    refresh_url=settings.service_auth_refresh_url,
+    username=settings.service_auth_username,
+    password=settings.service_auth_password.get_secret_value(),
+    refresh_margin=settings.service_token_refresh_margin,
+    default_ttl=settings.service_token_default_ttl,
+)
+metrics.register("service_token", service_token_provider.stats)
+
+
+def get_service_token_provider() -> ServiceTokenProvider:
+    return service_token_provider
@@ -1,3 +1,5 @@
+import hashlib
+import time
 import uuid
 from typing import Annotated
 
@@ -7,11 +9,20 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 import models
+from core.cache import TTLCache
 from core.config import settings
+from core.metrics import metrics
 from core.utils import read_token as jwt_read_token
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
+# Verified users keyed by the token digest; an entry never outlives the token `exp`.
+# Callers get a copy, so a request that changes its user cannot change the cache.
+token_cache: TTLCache[bytes, models.User] = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl
+)
+metrics.register("token_cache", token_cache.stats)
+
 
 class TokenReadingError(Exception):
     ...
@@ -22,6 +33,11 @@ class NotAuthorizedError(Exception):
 
 
 async def read_token(token: str) -> models.User:
+    key = hashlib.sha256(token.encode()).digest()
+    user = token_cache.get(key)
+    if user is not None:
+        return user.model_copy(deep=True)
+
     try:
         contents = await jwt_read_token(
             token, settings.access_token_secret, audience=settings.access_token_audience
@@ -34,7 +50,11 @@ async def read_token(token: str) -> models.User:
         raise TokenReadingError('Ivalid token: no user id found')
     rights = contents.get('rights')
 
-    return models.User(id=user_id, rights=rights)
+    user = models.User(id=user_id, rights=rights)
+    expires_at = contents.get('exp')
+    token_cache.set(key, user, None if expires_at is None else expires_at - time.time())
+
+    return user.model_copy(deep=True)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth_scheme)]) -> models.User:
@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings
 
@@ -5,6 +7,8 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     project_name: str = Field("Subscription API")
     app_port: int = Field(3000)
+    # Процесс фоновых циклов (worker.py) и его эндпоинт метрик
+    worker_port: int = Field(3001)
 
     # Настройки PSQL
     pghost: str = "localhost"
@@ -12,8 +16,22 @@ class Settings(BaseSettings):
     pgdb: str = "yamp_movies_db"
     pguser: str = "yamp_dummy"
     pgpassword: str = "qweasd123"
+    # Реплика для чтения; не задана - все запросы идут в основную БД
+    pgreplica_host: str | None = None
+    pgreplica_port: str = "5432"
+    db_replica_retry_interval: float = 30.0
     database_adapter: str = "postgresql"
     database_sqlalchemy_adapter: str = "postgresql+asyncpg"
+    # Пул соединений с БД (на один воркер)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Кэши подготовленных выражений asyncpg; 0 при работе через pgbouncer
+    db_statement_cache_size: int = 100
+    db_prepared_statement_cache_size: int = 100
+    db_command_timeout: float | None = None
     # Параметры аутентификации
     google_oauth_client_id: SecretStr = SecretStr("SECRET")
     google_oauth_client_secret: SecretStr = SecretStr("SECRET")
@@ -22,10 +40,118 @@ class Settings(BaseSettings):
     verification_password_token_secret: SecretStr = SecretStr('verify_password')
     access_token_secret: SecretStr = SecretStr('access_token')
     refresh_token_secret: SecretStr = SecretStr('refresh_token')
+    access_token_audience: str = "fastapi-users:auth"
+    # Кэш проверенных access-токенов
+    token_cache_size: int = 10_000
+    token_cache_ttl: float = 300.0
 
     permissions_superuser: str = '00000000-0000-0000-0000-000000000001'
 
+    # Партиции истории статусов аккаунтов (помесячно), обслуживает worker.py;
+    # без него INSERT в историю перестают работать, когда партиции кончатся
+    partition_maintenance_enabled: bool = True
+    partition_maintenance_interval: float = 3600.0
+    account_status_partitions_ahead: int = 3
+    # Ошибка в лог, если партиций вперёд меньше, чем столько месяцев
+    account_status_partitions_min_headroom: int = 1
+    account_status_retention_months: int = 24
+
+    # Перевод просроченных аккаунтов в inactive, выполняет worker.py
+    expiry_sweeper_enabled: bool = False
+    expiry_sweeper_interval: float = 30.0
+    expiry_sweeper_batch_size: int = 500
+
+    # Соединение LISTEN/NOTIFY в каждом процессе; без него кэш прав доступа
+    # и каталог не используются
+    notify_listener_enabled: bool = False
+    # Кэш прав доступа (user, subscription), сбрасывается через LISTEN/NOTIFY
+    entitlement_cache_size: int = 100_000
+    entitlement_cache_ttl: float = 300.0
+
+    # Каталог подписок и тарифов в памяти (нужен notify_listener_enabled)
+    catalog_enabled: bool = False
+    # Cache-Control: max-age публичных ответов каталога (для CDN)
+    catalog_cache_max_age: int = 60
+
+    # Пакетное чтение аккаунтов по списку id
+    account_batch_max_size: int = 1000
+    # Максимум id в одном запросе, собранном из одиночных чтений
+    account_loader_max_batch_size: int = 500
+
+    # Недавно обработанные ключи идемпотентности вебхуков биллинга
+    billing_event_cache_size: int = 100_000
+    billing_event_cache_ttl: float = 86400.0
+    # Очередь вебхуков оплаты: приём в таблицу, применение пачками в worker.py
+    billing_event_queue_enabled: bool = False
+    billing_event_workers: int = 2
+    billing_event_interval: float = 1.0
+    billing_event_batch_size: int = 200
+    # Столько неудачных пачек аккаунта, и его события уходят в
+    # billing_event_dead_letter
+    billing_event_max_attempts: int = 5
+    # Пакетный вебхук оплаты: событий в запросе и в одной транзакции
+    billing_webhook_batch_max_size: int = 10_000
+    billing_webhook_chunk_size: int = 500
+
+    # Outbox событий об изменении аккаунтов и его ретранслятор в worker.py
+    outbox_enabled: bool = False
+    outbox_relay_interval: float = 1.0
+    outbox_relay_batch_size: int = 500
+    # Куда публиковать события: http, file или memory; без него ретранслятор
+    # не запускается
+    outbox_sink: str | None = None
+    outbox_sink_url: str = "http://localhost:8080/api/v1/events/accounts"
+    outbox_sink_path: str = "account_events.ndjson"
+    outbox_sink_timeout: float = 10.0
+
+    # Размер пачки строк, читаемых серверным курсором при выгрузке
+    export_chunk_size: int = 1000
+
+    # Общий HTTP-клиент для исходящих запросов (пул keep-alive соединений)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 10.0
+    http_connect_timeout: float = 3.0
+    http_pool_timeout: float = 3.0
+    # HTTP/2 требует установленного пакета h2
+    http_http2: bool = False
+
+    # Учётная запись сервиса для запросов к другим сервисам
+    service_auth_login_url: str = "http://localhost:8000/api/v1/auth/login"
+    service_auth_refresh_url: str = "http://localhost:8000/api/v1/auth/refresh"
+    service_auth_username: str = "subscription-api"
+    service_auth_password: SecretStr = SecretStr("SECRET")
+    # Обновлять access-токен сервиса заранее, за столько секунд до истечения
+    service_token_refresh_margin: float = 60.0
+    # Срок жизни токена, если в нём нет exp
+    service_token_default_ttl: float = 300.0
+
+    # Таймаут одного запроса к биллингу
+    billing_timeout: float = 5.0
+    # Повторы запросов к биллингу: не больше доли от всех запросов за 10 с
+    billing_retry_max_attempts: int = 3
+    billing_retry_base_delay: float = 0.1
+    billing_retry_max_delay: float = 1.0
+    billing_retry_budget_ratio: float = 0.1
+    billing_retry_budget_min_retries: int = 3
+    # Circuit breaker на каждый хост биллинга
+    billing_circuit_failure_threshold: int = 5
+    billing_circuit_reset_timeout: float = 30.0
+
+    # Время на ответ на входящий запрос, включая все исходящие вызовы
+    request_deadline: float = 10.0
     url_create_invoice: str = "http://localhost:8080/api/v1/payments/invoice"
+    url_get_invoice: str = "http://localhost:8080/api/v1/payments/invoice/{invoice_id}"
+    url_get_users: str = "http://localhost:8000/api/v1/users"
+    # Загрузка в зеркало счетов из вебхуков оплаты (в т.ч. отсутствующих)
+    # из биллинга, выполняет worker.py
+    invoice_sync_enabled: bool = False
+    invoice_sync_interval: float = 1.0
+    invoice_sync_batch_size: int = 100
+    # Запросов к биллингу одновременно; счёт повторяется, если аренда истекла
+    invoice_sync_concurrency: int = 10
+    invoice_sync_lease: float = 300.0
 
 
 def get_database_url_async() -> str:
@@ -35,4 +161,37 @@ def get_database_url_async() -> str:
     )
 
 
+def get_database_dsn() -> str:
+    return (
+        f"{settings.database_adapter}://{settings.pguser}:"
+        f"{settings.pgpassword}@{settings.pghost}:{settings.pgport}/{settings.pgdb}"
+    )
+
+
+def get_replica_database_url_async() -> str | None:
+    if not settings.pgreplica_host:
+        return None
+
+    return (
+        f"{settings.database_sqlalchemy_adapter}://{settings.pguser}:"
+        f"{settings.pgpassword}@{settings.pgreplica_host}:{settings.pgreplica_port}/"
+        f"{settings.pgdb}"
+    )
+
+
+def get_database_engine_options() -> dict[str, Any]:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+            "command_timeout": settings.db_command_timeout,
+        },
+    }
+
+
 settings = Settings()  # type: ignore
@@ -0,0 +1,70 @@
+import asyncio
+import typing as t
+
+K = t.TypeVar("K", bound=t.Hashable)
+V = t.TypeVar("V")
+
+BatchLoadFn = t.Callable[[list[K]], t.Awaitable[t.Mapping[K, V]]]
+
+
+class DataLoader(t.Generic[K, V]):
+    """
+    Coalesce single-key lookups into batched loads.
+
+    Keys requested during one event loop tick are collected and resolved by a
+    single call to `batch_load`, which returns the found values keyed by key;
+    missing keys resolve to None. Concurrent requests for the same key share
+    one future.
+    """
+
+    def __init__(self, batch_load: BatchLoadFn, max_batch_size: int) -> None:
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.keys = 0
+        self._pending: dict[K, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending[key] = future
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: t.Iterable[K]) -> list[V | None]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        for start in range(0, len(items), self.max_batch_size):
+            batch = dict(items[start : start + self.max_batch_size])
+            task = asyncio.create_task(self._load_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: dict[K, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys += len(batch)
+        try:
+            values = await self.batch_load(list(batch))
+        except Exception as error:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "pending": len(self._pending),
+        }
@@ -11,3 +11,15 @@ class ObjectAlreadyExists(AppException):
 
 class ObjectNotExists(AppException):
     pass
+
+
+class InvalidCursor(AppException):
+    pass
+
+
+class CircuitOpen(AppException):
+    pass
+
+
+class DeadlineExceeded(AppException):
+    pass
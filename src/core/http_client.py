@@ -0,0 +1,54 @@
+import httpx
+
+from core.config import settings
+
+
+class HTTPClient:
+    """
+    Process-wide httpx client with a keep-alive connection pool.
+
+    Opened in the app startup hook and closed on shutdown, so outbound calls
+    reuse connections instead of paying TCP/TLS setup per request. Callers
+    pass per-call timeouts when they need something tighter than the default.
+    """
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("HTTP client is not started")
+        return self._client
+
+    def start(self) -> None:
+        if self._client is not None:
+            return
+
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.http_timeout,
+                connect=settings.http_connect_timeout,
+                pool=settings.http_pool_timeout,
+            ),
+            http2=settings.http_http2,
+        )
+
+    async def stop(self) -> None:
+        if self._client is None:
+            return
+
+        await self._client.aclose()
+        self._client = None
+
+
+http_client = HTTPClient()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    return http_client.client
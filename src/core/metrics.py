@@ -0,0 +1,19 @@
+import typing as t
+
+Collector = t.Callable[[], t.Mapping[str, t.Any]]
+
+
+class MetricsRegistry:
+    """Named collectors of in-process stats, published by the metrics endpoint."""
+
+    def __init__(self) -> None:
+        self._collectors: dict[str, Collector] = {}
+
+    def register(self, name: str, collector: Collector) -> None:
+        self._collectors[name] = collector
+
+    def collect(self) -> dict[str, t.Mapping[str, t.Any]]:
+        return {name: collector() for name, collector in self._collectors.items()}
+
+
+metrics = MetricsRegistry()
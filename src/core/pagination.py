@@ -1,5 +1,14 @@
+import base64
+import binascii
+import typing as t
+from datetime import datetime
+
+import orjson
 from fastapi import Query
 
+import core.exceptions as exc
+from core.utils import orjson_default
+
 
 class PaginateQueryParams:
     """Dependency class to parse pagination query params."""
@@ -16,6 +25,37 @@ class PaginateQueryParams:
             ge=1,
             le=500,
         ),
+        cursor: str
+        | None = Query(
+            None,
+            title="Page cursor.",
+            description="Opaque cursor of the next page, overrides page_number",
+        ),
     ):
         self.page_number = page_number
         self.page_size = page_size
+        self.cursor = cursor
+
+
+def encode_cursor(values: t.Iterable[t.Any]) -> str:
+    """Pack the sort key of the last returned row into an opaque cursor."""
+    return base64.urlsafe_b64encode(
+        orjson.dumps(list(values), default=orjson_default)
+    ).decode()
+
+
+def decode_cursor(cursor: str, types: t.Sequence[type]) -> list[t.Any]:
+    """Unpack a cursor made by `encode_cursor` into values of the given types."""
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return [_parse_value(value, type_) for value, type_ in zip(values, types)]
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise exc.InvalidCursor from e
+
+
+def _parse_value(value: t.Any, type_: type) -> t.Any:
+    if type_ is datetime:
+        return datetime.fromisoformat(value)
+    return type_(value)
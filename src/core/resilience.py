@@ -0,0 +1,276 @@
+import asyncio
+import contextlib
+import contextvars
+import random
+import time
+import typing as t
+
+import httpx
+
+import core.exceptions as exc
+
+T = t.TypeVar("T")
+
+# Monotonic time by which the current incoming request must be answered.
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float) -> t.Iterator[None]:
+    """Bound outbound calls made in this context to `seconds` from now."""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing.
+
+    Closed: calls pass, consecutive failures are counted. After
+    `failure_threshold` of them the circuit opens and calls are rejected for
+    `reset_timeout` seconds, then it goes half-open and lets
+    `half_open_max_calls` trial calls through: a success closes it, a failure
+    opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected_total += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected_total += 1
+                return False
+            self.half_open_calls += 1
+
+        return True
+
+    def release(self) -> None:
+        """Give back the half-open trial slot of a call that recorded no outcome."""
+        if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.opened_total += 1
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of the calls made over the last `window` seconds.
+
+    `min_retries` are always allowed per window, so a quiet service can still
+    retry the odd failure.
+    """
+
+    def __init__(self, ratio: float, min_retries: int, window: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._calls: list[float] = []
+        self._retries: list[float] = []
+        self.exhausted_total = 0
+
+    def record_call(self) -> None:
+        self._calls.append(time.monotonic())
+
+    def try_retry(self) -> bool:
+        now = time.monotonic()
+        self._calls = self._trim(self._calls, now)
+        self._retries = self._trim(self._retries, now)
+
+        allowed = max(self.min_retries, int(len(self._calls) * self.ratio))
+        if len(self._retries) >= allowed:
+            self.exhausted_total += 1
+            return False
+
+        self._retries.append(now)
+        return True
+
+    def _trim(self, timestamps: list[float], now: float) -> list[float]:
+        start = now - self.window
+        index = 0
+        while index < len(timestamps) and timestamps[index] < start:
+            index += 1
+        return timestamps[index:]
+
+    def stats(self) -> dict[str, t.Any]:
+        now = time.monotonic()
+        return {
+            "calls": len(self._trim(self._calls, now)),
+            "retries": len(self._trim(self._retries, now)),
+            "exhausted_total": self.exhausted_total,
+        }
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport errors and 5xx responses; 4xx are the caller's fault."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.RequestError)
+
+
+class ResilientCaller:
+    """
+    Runs calls to a dependency through per-host circuit breakers and a shared
+    retry budget.
+
+    Failed attempts are retried up to `max_attempts` with full-jitter
+    exponential backoff while the budget allows. Every attempt gets at most
+    `timeout` seconds and no attempt or backoff outlives the request deadline
+    (see `deadline_scope`).
+    """
+
+    def __init__(
+        self,
+        budget: RetryBudget,
+        failure_threshold: int,
+        reset_timeout: float,
+        timeout: float,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+    ) -> None:
+        self.budget = budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def get_breaker(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.breakers[host] = breaker
+        return breaker
+
+    async def call(self, host: str, attempt: t.Callable[[float], t.Awaitable[T]]) -> T:
+        """Call `attempt(timeout)` until it succeeds or retrying is pointless."""
+        breaker = self.get_breaker(host)
+        self.budget.record_call()
+        number = 0
+
+        while True:
+            number += 1
+            timeout = self._attempt_timeout()
+            try:
+                return await self._attempt(breaker, attempt, timeout)
+            except Exception as error:
+                delay = self._retry_delay(number) if is_retryable(error) else None
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    async def _attempt(
+        self,
+        breaker: CircuitBreaker,
+        attempt: t.Callable[[float], t.Awaitable[T]],
+        timeout: float,
+    ) -> T:
+        """
+        Make one attempt through the breaker.
+
+        Only an HTTP response proves the dependency healthy: 4xx responses
+        count as successes, transport errors and 5xx as failures, and other
+        errors are re-raised without an outcome. A half-open trial slot is
+        given back however the attempt ends, cancellation included.
+        """
+        if not breaker.allow():
+            raise exc.CircuitOpen
+
+        try:
+            result = await attempt(timeout)
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except httpx.RequestError:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+            return result
+        finally:
+            breaker.release()
+
+    def _attempt_timeout(self) -> float:
+        left = time_left()
+        if left is None:
+            return self.timeout
+        if left <= 0:
+            raise exc.DeadlineExceeded
+        return min(self.timeout, left)
+
+    def _retry_delay(self, number: int) -> float | None:
+        """Full-jitter backoff before attempt `number + 1`, None to give up."""
+        if number >= self.max_attempts or not self.budget.try_retry():
+            return None
+
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (number - 1))
+        )
+        left = time_left()
+        if left is not None and left <= delay:
+            return None
+        return delay
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "breakers": {
+                host: breaker.stats() for host, breaker in self.breakers.items()
+            },
+            "retry_budget": self.budget.stats(),
+        }
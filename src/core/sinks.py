@@ -0,0 +1,75 @@
+import asyncio
+import typing as t
+
+import orjson
+
+from core.config import settings
+from core.http_client import http_client
+
+Event = dict[str, t.Any]
+
+
+class Sink(t.Protocol):
+    """Destination of published events; `publish` raises if delivery failed."""
+
+    async def publish(self, events: list[Event]) -> None:
+        ...
+
+
+class HTTPSink:
+    """
+    POSTs each batch as a JSON array; any non-2xx response is a failure.
+
+    Requests go through the process-wide client, which must be started.
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    async def publish(self, events: list[Event]) -> None:
+        response = await http_client.client.post(
+            self.url,
+            content=orjson.dumps(events),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+class FileSink:
+    """Appends events to a file as newline-delimited JSON."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    async def publish(self, events: list[Event]) -> None:
+        data = b"".join(orjson.dumps(event) + b"\n" for event in events)
+        await asyncio.to_thread(self._write, data)
+
+    def _write(self, data: bytes) -> None:
+        with open(self.path, "ab") as file:
+            file.write(data)
+
+
+class MemorySink:
+    """Keeps published events in a list, for local runs and tests."""
+
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+
+    async def publish(self, events: list[Event]) -> None:
+        self.events.extend(events)
+
+
+def get_sink() -> Sink | None:
+    """Build the configured outbox sink, None when `outbox_sink` is not set."""
+    if settings.outbox_sink is None:
+        return None
+    if settings.outbox_sink == "http":
+        return HTTPSink(settings.outbox_sink_url, settings.outbox_sink_timeout)
+    if settings.outbox_sink == "file":
+        return FileSink(settings.outbox_sink_path)
+    if settings.outbox_sink == "memory":
+        return MemorySink()
+    raise ValueError(f"Unknown outbox sink: {settings.outbox_sink}")
@@ -1,3 +1,4 @@
+import uuid
 from typing import Any
 
 import jwt
@@ -11,6 +12,13 @@ def orjson_dumps(v, *, default=None):
     return orjson.dumps(v, default=default).decode()
 
 
+def orjson_default(value: Any) -> Any:
+    """Serialize types orjson accepts only exactly, such as asyncpg's UUID subclass."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
 def _get_secret_value(secret: SecretStr) -> str:
     if isinstance(secret, str):
         return secret
@@ -3,13 +3,38 @@ import uuid
 from datetime import datetime
 
 from fastapi import Depends
-from sqlalchemy import Select, select
+from pydantic import BaseModel
+from sqlalchemy import (
+    UUID,
+    Select,
+    any_,
+    bindparam,
+    cast,
+    column,
+    func,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import core.exceptions as exc
 import models
+from core.config import settings
 from core.pagination import PaginateQueryParams
 from db.base import AccountDB, get_async_session
+from db.notifications import ACCOUNT_CHANGED_CHANNEL, notify
+from db.routing import USE_PRIMARY
+from db.unit_of_work import commit
+from db.utils import (
+    column_values,
+    make_page,
+    model_columns,
+    paginate,
+    project_rows,
+    row_columns,
+)
 
 
 class SAAccountDB:
@@ -28,6 +53,24 @@ class SAAccountDB:
             return None
         return self.model_manager.model_validate(object_)
 
+    async def get_by_ids(
+        self, ids: t.Iterable[uuid.UUID], for_update: bool = False
+    ) -> list[models.Account]:
+        """
+        Get accounts by a list of ids in a single `id = ANY(:ids)` query.
+
+        With `for_update` the rows stay locked until the transaction ends.
+        """
+        statement = select(self.table).where(
+            self.table.id == any_(bindparam("ids", list(ids), type_=ARRAY(UUID)))
+        )
+        if for_update:
+            statement = statement.order_by(self.table.id).with_for_update()
+        objects = await self._get_objects(statement)
+        if not objects:
+            return []
+        return [self.model_manager.model_validate(object_) for object_ in objects]
+
     async def get_by_user_id(self, user_id: uuid.UUID) -> t.Iterable[models.Account]:
         """Get an accounts by user id."""
         objects = await self._get_objects_by_user_id(user_id)
@@ -39,54 +82,240 @@ class SAAccountDB:
         """Create an account."""
         object_ = self.table(**create_dict)  # type: ignore
         self.session.add(object_)
-        await self.session.commit()
+        await commit(self.session)
         return self.model_manager.model_validate(object_)
 
     async def update(
         self, object_: models.Account, update_dict: dict[str, t.Any]
     ) -> models.Account:
-        """Update an account."""
-        _object = await self._get_object_by_id(object_.id)
+        """Update an account in a single UPDATE ... RETURNING round trip."""
+        values = column_values(self.table, update_dict)
+        values['modified_at'] = datetime.utcnow()
+        statement = (
+            update(self.table)
+            .where(self.table.id == object_.id)
+            .values(**values)
+            .returning(*model_columns(self.table, self.model_manager))
+        )
 
-        if _object is None:
+        results = await self.session.execute(statement)
+        row = results.mappings().one_or_none()
+        if row is None:
             raise exc.ObjectNotExists
 
-        for key, value in update_dict.items():
-            setattr(_object, key, value)
-        _object.modified_at = datetime.utcnow()
+        await commit(self.session)
+
+        return self.model_manager.model_validate(dict(row))
+
+    async def update_many(
+        self, update_dicts: t.Sequence[dict[str, t.Any]]
+    ) -> list[models.Account]:
+        """
+        Update accounts by id in one UPDATE ... FROM (VALUES ...) RETURNING.
+
+        Every dict holds the account `id` and the same set of attributes.
+        """
+        if not update_dicts:
+            return []
+
+        columns = self.table.__mapper__.columns
+        names = list(column_values(self.table, update_dicts[0]))
+        names.remove("id")
+        data = values(
+            *(
+                column(columns[name].name, columns[name].type)
+                for name in ["id", *names]
+            ),
+            name="data",
+        ).data(
+            [
+                (update_dict["id"], *(update_dict[name] for name in names))
+                for update_dict in update_dicts
+            ]
+        )
+        # A column of NULLs in VALUES is typed as text, hence the casts.
+        set_ = {
+            getattr(self.table, name): cast(
+                data.c[columns[name].name], columns[name].type
+            )
+            for name in names
+        }
+        set_[self.table.modified_at] = datetime.utcnow()
+        statement = (
+            update(self.table)
+            .where(self.table.id == data.c[columns["id"].name])
+            .values(set_)
+            .returning(*model_columns(self.table, self.model_manager))
+            .execution_options(synchronize_session=False)
+        )
 
-        self.session.add(_object)
-        await self.session.commit()
-        await self.session.refresh(_object)
+        results = await self.session.execute(statement)
+        objects = [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+        await commit(self.session)
 
-        return self.model_manager.model_validate(_object)
+        return objects
 
     async def delete(self, id_: uuid.UUID) -> None:
         """Delete an account."""
         statement = select(self.table).where(self.table.id == id_)
         object_ = await self._get_object(statement)
         await self.session.delete(object_)
-        await self.session.commit()
+        await commit(self.session)
 
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[models.Account]:
+    ) -> models.Page[models.Account]:
         """Search accounts."""
+        order_by = (self.table.created_at, self.table.id)
         statement = select(self.table)
         if filter_param:
-            statement.where(self.table.id == filter_param)
+            statement = statement.where(self.table.id == filter_param)
 
-        statement.limit(pagination_params.page_size)
-        statement.offset(
-            (pagination_params.page_number - 1) * pagination_params.page_size
-        )
+        statement = paginate(statement, order_by, pagination_params)
 
         results = await self.session.execute(statement)
 
-        return list(
+        objects = [
             self.model_manager.model_validate(result[0])
             for result in results.fetchall()
+        ]
+        return make_page(objects, order_by, pagination_params)
+
+    async def search_rows(
+        self,
+        pagination_params: PaginateQueryParams,
+        model: type[BaseModel],
+        filter_param: str | None = None,
+    ) -> models.Page[dict[str, t.Any]]:
+        """Search accounts as raw rows holding only the fields of `model`."""
+        order_by = (self.table.created_at, self.table.id)
+        statement = select(*row_columns(self.table, model, order_by))
+        if filter_param:
+            statement = statement.where(self.table.id == filter_param)
+
+        statement = paginate(statement, order_by, pagination_params)
+
+        results = await self.session.execute(statement)
+
+        page = make_page(results.mappings().all(), order_by, pagination_params)
+        page.items = project_rows(page.items, model)
+        return page
+
+    async def get_rows_by_user_id(
+        self, user_id: uuid.UUID, model: type[BaseModel]
+    ) -> list[dict[str, t.Any]]:
+        """Get the accounts of a user as raw rows holding only the fields of `model`."""
+        statement = select(*row_columns(self.table, model)).where(
+            self.table.user_id == user_id
         )
+        results = await self.session.execute(statement)
+        return project_rows(results.mappings(), model)
+
+    async def stream(
+        self,
+        status: str | None = None,
+        subscription_id: uuid.UUID | None = None,
+        updated_since: datetime | None = None,
+    ) -> t.AsyncIterator[t.Sequence[t.Mapping[str, t.Any]]]:
+        """Stream accounts in chunks of raw rows through a server-side cursor."""
+        statement = select(*model_columns(self.table, self.model_manager))
+        if status:
+            statement = statement.where(self.table.status == status)
+        if subscription_id:
+            statement = statement.where(self.table.subscription_id == subscription_id)
+        if updated_since:
+            statement = statement.where(self.table.modified_at >= updated_since)
+
+        results = await self.session.stream(
+            statement.execution_options(yield_per=settings.export_chunk_size)
+        )
+        async for rows in results.mappings().partitions():
+            yield rows
+
+    async def get_version_by_user_id(
+        self, user_id: uuid.UUID
+    ) -> tuple[int, datetime | None]:
+        """Get the number of user accounts and their latest modification time."""
+        statement = select(func.count(), func.max(self.table.modified_at)).where(
+            self.table.user_id == user_id
+        )
+        results = await self.session.execute(statement)
+        count, modified_at = results.one()
+        return count, modified_at
+
+    async def get_active_until(
+        self, user_id: uuid.UUID, subscription_id: uuid.UUID
+    ) -> datetime | None:
+        """
+        Get the latest expiry among the user's active accounts of a subscription.
+
+        Read from the primary: the result is cached until an `account_changed`
+        notification, which a lagging replica may not have caught up with yet.
+        """
+        statement = (
+            select(func.max(self.table.expires_at))
+            .where(
+                self.table.user_id == user_id,
+                self.table.subscription_id == subscription_id,
+                self.table.status == models.SubscriptionStatus.active.value,
+            )
+            .execution_options(**{USE_PRIMARY: True})
+        )
+        results = await self.session.execute(statement)
+        return results.scalar_one_or_none()
+
+    async def notify_changed(self, objects: t.Iterable[models.Account]) -> None:
+        """Announce account changes to listeners once the transaction commits."""
+        await notify(
+            self.session,
+            ACCOUNT_CHANGED_CHANNEL,
+            {f"{object_.user_id}:{object_.subscription_id}" for object_ in objects},
+        )
+
+    async def expire(self, now: datetime, limit: int) -> list[models.Account]:
+        """
+        Flip up to `limit` lapsed active accounts to inactive in one UPDATE.
+
+        Rows are claimed with FOR UPDATE SKIP LOCKED, so concurrent sweepers
+        take disjoint batches. The claimed ids are collected into an array, so
+        the UPDATE probes the primary key instead of scanning every account.
+        """
+        lapsed = (
+            select(self.table.id)
+            .where(
+                self.table.status == models.SubscriptionStatus.active.value,
+                self.table.expires_at <= now,
+            )
+            .order_by(self.table.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(self.table)
+            .where(self.table.id == any_(func.array(lapsed.scalar_subquery())))
+            .values(status=models.SubscriptionStatus.inactive.value, modified_at=now)
+            .returning(*model_columns(self.table, self.model_manager))
+            .execution_options(synchronize_session=False)
+        )
+
+        results = await self.session.execute(statement)
+        objects = [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+        await commit(self.session)
+
+        return objects
+
+    async def get_oldest_lapsed(self, now: datetime) -> datetime | None:
+        """Get the expiry time of the oldest active account already lapsed."""
+        statement = select(func.min(self.table.expires_at)).where(
+            self.table.status == models.SubscriptionStatus.active.value,
+            self.table.expires_at <= now,
+        )
+        results = await self.session.execute(statement)
+        return results.scalar_one_or_none()
 
     async def _get_object_by_id(self, id_: uuid.UUID) -> AccountDB | None:
         statement = select(self.table).where(self.table.id == id_)
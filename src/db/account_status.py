@@ -1,13 +1,18 @@
 import typing as t
 import uuid
+from datetime import datetime
 
 from fastapi import Depends
-from sqlalchemy import Select, select
+from sqlalchemy import Select, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import core.exceptions as exc
 import models
+from core.config import settings
 from core.pagination import PaginateQueryParams
 from db.base import SAAccountStatus, get_async_session
+from db.unit_of_work import commit
+from db.utils import column_values, make_page, model_columns, paginate
 
 
 class SAAccountStatusDB:
@@ -39,49 +44,84 @@ class SAAccountStatusDB:
         """Create an account status."""
         object_ = self.table(**create_dict)  # type: ignore
         self.session.add(object_)
-        await self.session.commit()
+        await commit(self.session)
         return self.model_manager.model_validate(object_)
 
+    async def create_many(self, create_dicts: list[dict[str, t.Any]]) -> None:
+        """Create account statuses with a single bulk INSERT."""
+        if not create_dicts:
+            return
+
+        await self.session.execute(insert(self.table), create_dicts)
+        await commit(self.session)
+
     async def update(
         self, object_: models.AccountStatus, update_dict: dict[str, t.Any]
     ) -> models.AccountStatus:
-        """Update an account status."""
-        _object = self._get_object_by_id(object_.id)
+        """Update an account status in a single UPDATE ... RETURNING round trip."""
+        values = column_values(self.table, update_dict)
+        statement = (
+            update(self.table)
+            .where(self.table.id == object_.id)
+            .values(**values)
+            .returning(*model_columns(self.table, self.model_manager))
+        )
 
-        for key, value in update_dict.items():
-            setattr(_object, key, value)
-        self.session.add(_object)
-        await self.session.commit()
-        await self.session.refresh(_object)
+        results = await self.session.execute(statement)
+        row = results.mappings().one_or_none()
+        if row is None:
+            raise exc.ObjectNotExists
+
+        await commit(self.session)
 
-        return self.model_manager.model_validate(_object)
+        return self.model_manager.model_validate(dict(row))
 
     async def delete(self, id_: uuid.UUID) -> None:
         """Delete an account status."""
         statement = select(self.table).where(self.table.id == id_)
         object_ = await self._get_object(statement)
         await self.session.delete(object_)
-        await self.session.commit()
+        await commit(self.session)
 
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[models.AccountStatus]:
-        """Search tariffs."""
+    ) -> models.Page[models.AccountStatus]:
+        """Search account statuses."""
+        order_by = (self.table.created_at, self.table.id)
         statement = select(self.table)
         if filter_param:
-            statement.where(self.table.id == filter_param)
+            statement = statement.where(self.table.id == filter_param)
 
-        statement.limit(pagination_params.page_size)
-        statement.offset(
-            (pagination_params.page_number - 1) * pagination_params.page_size
-        )
+        statement = paginate(statement, order_by, pagination_params)
 
         results = await self.session.execute(statement)
 
-        return list(
+        objects = [
             self.model_manager.model_validate(result[0])
             for result in results.fetchall()
+        ]
+        return make_page(objects, order_by, pagination_params)
+
+    async def stream(
+        self,
+        status: str | None = None,
+        account_id: uuid.UUID | None = None,
+        created_since: datetime | None = None,
+    ) -> t.AsyncIterator[t.Sequence[t.Mapping[str, t.Any]]]:
+        """Stream account statuses in chunks of raw rows through a server-side cursor."""
+        statement = select(*model_columns(self.table, self.model_manager))
+        if status:
+            statement = statement.where(self.table.status == status)
+        if account_id:
+            statement = statement.where(self.table.account_id == account_id)
+        if created_since:
+            statement = statement.where(self.table.created_at >= created_since)
+
+        results = await self.session.stream(
+            statement.execution_options(yield_per=settings.export_chunk_size)
         )
+        async for rows in results.mappings().partitions():
+            yield rows
 
     async def _get_object(
         self, statement: Select[tuple[SAAccountStatus]]
@@ -2,17 +2,66 @@ import uuid
 from datetime import datetime
 from typing import AsyncGenerator
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, MetaData, Numeric, String
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, mapped_column
 
-from core.config import get_database_url_async
+from core.config import (
+    get_database_engine_options,
+    get_database_url_async,
+    get_replica_database_url_async,
+    settings,
+)
+from core.metrics import metrics
+from db.pool import InstrumentedQueuePool
+from db.routing import ReplicaState, RoutingSession
 
 metadata_obj = MetaData(schema="subscriptions")
 
-engine = create_async_engine(get_database_url_async())
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+engine = create_async_engine(
+    get_database_url_async(),
+    poolclass=InstrumentedQueuePool,
+    **get_database_engine_options(),
+)
+replica_engine: AsyncEngine | None = None
+replica_state = ReplicaState(settings.db_replica_retry_interval)
+
+if replica_url := get_replica_database_url_async():
+    replica_engine = create_async_engine(
+        replica_url, poolclass=InstrumentedQueuePool, **get_database_engine_options()
+    )
+
+async_session_maker = async_sessionmaker(
+    engine,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    replica=replica_engine.sync_engine if replica_engine else None,
+    replica_state=replica_state,
+)
+
+metrics.register("db_pool", lambda: engine.pool.stats())  # type: ignore
+if replica_engine is not None:
+    metrics.register("db_replica_pool", lambda: replica_engine.pool.stats())  # type: ignore
+    metrics.register("db_replica", replica_state.stats)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -27,11 +76,19 @@ class SQLAlchemyBase(DeclarativeBase):
 class SAAccountStatus(SQLAlchemyBase):
     id = mapped_column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id = mapped_column("account", ForeignKey("account.id"))
-    created_at = mapped_column("created_at", DateTime)
+    # Partition key of the monthly range-partitioned table, hence part of the PK.
+    created_at = mapped_column(
+        "created_at", DateTime, primary_key=True, default=datetime.utcnow
+    )
     expires_at = mapped_column("expires_at", DateTime)
     status = mapped_column("status", String(255))
 
     __tablename__ = "account_status"
+    __table_args__ = (
+        Index("ix_account_status_account_created_at", "account", "created_at"),
+        Index("ix_account_status_created_at_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
 
 class AccountDB(SQLAlchemyBase):
@@ -47,14 +104,25 @@ class AccountDB(SQLAlchemyBase):
     on_delete = mapped_column("on_delete", Boolean, nullable=False, default=False)
 
     __tablename__ = "account"
+    __table_args__ = (
+        Index("ix_account_user", "user"),
+        Index("ix_account_subscription", "subscription"),
+        Index("ix_account_created_at_id", "created_at", "id"),
+        Index(
+            "ix_account_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
 
 
 class SASubscription(SQLAlchemyBase):
     id = mapped_column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = mapped_column("name", String(255), nullable=False)
-    on_delete = mapped_column("on_delete", Boolean, nullable=False, default=False)
+    is_deleted = mapped_column("on_delete", Boolean, nullable=False, default=False)
 
     __tablename__ = "subscription"
+    __table_args__ = (Index("ix_subscription_name_id", "name", "id"),)
 
 
 class SATariff(SQLAlchemyBase):
@@ -67,3 +135,89 @@ class SATariff(SQLAlchemyBase):
     duration = mapped_column("duration", Integer, nullable=False)
 
     __tablename__ = "tariff"
+    __table_args__ = (
+        Index("ix_tariff_subscription_created_at", "subscription", "created_at"),
+        Index("ix_tariff_created_at_id", "created_at", "id"),
+    )
+
+
+class SABillingEvent(SQLAlchemyBase):
+    # Idempotency key of a billing webhook delivery (event or invoice id).
+    id = mapped_column("id", String(255), primary_key=True)
+    account_id = mapped_column("account", UUID(as_uuid=True), nullable=False)
+    payment_status = mapped_column("payment_status", String(255), nullable=False)
+    created_at = mapped_column("created_at", DateTime, default=datetime.utcnow)
+
+    __tablename__ = "billing_event"
+    __table_args__ = (Index("ix_billing_event_created_at", "created_at"),)
+
+
+class SABillingEventQueue(SQLAlchemyBase):
+    # Payment webhooks accepted but not yet applied, drained in id order.
+    id = mapped_column("id", BigInteger, Identity(), primary_key=True)
+    event_id = mapped_column("event_id", String(255), nullable=True)
+    account_id = mapped_column("account", UUID(as_uuid=True), nullable=False)
+    tariff_id = mapped_column("tariff", UUID(as_uuid=True), nullable=False)
+    invoice_id = mapped_column("invoice", UUID(as_uuid=True), nullable=True)
+    payment_status = mapped_column("payment_status", String(255), nullable=False)
+    created_at = mapped_column("created_at", DateTime, default=datetime.utcnow)
+    # Failed batches of the event's account, see BillingEventWorker.
+    attempts = mapped_column("attempts", Integer, nullable=False, server_default="0")
+
+    __tablename__ = "billing_event_queue"
+    __table_args__ = (Index("ix_billing_event_queue_account_id", "account", "id"),)
+
+
+class SABillingEventDeadLetter(SQLAlchemyBase):
+    # Queued payment events that could not be applied, kept for an operator.
+    id = mapped_column("id", BigInteger, primary_key=True)
+    event_id = mapped_column("event_id", String(255), nullable=True)
+    account_id = mapped_column("account", UUID(as_uuid=True), nullable=False)
+    tariff_id = mapped_column("tariff", UUID(as_uuid=True), nullable=False)
+    invoice_id = mapped_column("invoice", UUID(as_uuid=True), nullable=True)
+    payment_status = mapped_column("payment_status", String(255), nullable=False)
+    created_at = mapped_column("created_at", DateTime, nullable=True)
+    attempts = mapped_column("attempts", Integer, nullable=False)
+    reason = mapped_column("reason", Text, nullable=False)
+    failed_at = mapped_column("failed_at", DateTime, default=datetime.utcnow)
+
+    __tablename__ = "billing_event_dead_letter"
+
+
+class SAOutbox(SQLAlchemyBase):
+    # Events written in the transaction of the change, published by the relay.
+    id = mapped_column("id", BigInteger, Identity(), primary_key=True)
+    topic = mapped_column("topic", String(255), nullable=False)
+    key = mapped_column("key", String(255), nullable=False)
+    payload = mapped_column("payload", JSONB, nullable=False)
+    created_at = mapped_column("created_at", DateTime, default=datetime.utcnow)
+
+    __tablename__ = "outbox"
+
+
+class SAInvoice(SQLAlchemyBase):
+    # Local mirror of billing invoices; attributes follow models.InvoiceRead,
+    # where the account is sent as user_id and the tariff as service_id.
+    # modified_at is billing's version; db.invoice.UNVERSIONED until fetched.
+    id = mapped_column("id", UUID(as_uuid=True), primary_key=True)
+    created_at = mapped_column("created_at", DateTime, nullable=False)
+    modified_at = mapped_column("modified_at", DateTime, nullable=False)
+    user_id = mapped_column("account", UUID(as_uuid=True), nullable=False)
+    service_id = mapped_column("tariff", UUID(as_uuid=True), nullable=False)
+    status = mapped_column("status", String(255), nullable=False)
+    amount = mapped_column("amount", Numeric(14, 2), nullable=False)
+    currency = mapped_column("currency", String(3), nullable=False)
+
+    __tablename__ = "invoice"
+    __table_args__ = (Index("ix_invoice_account_created_at", "account", "created_at"),)
+
+
+class SAInvoiceSync(SQLAlchemyBase):
+    # Invoices to fetch from billing into the mirror, drained by worker.py.
+    # created_at is the last request, leased_until hides a claimed invoice.
+    invoice_id = mapped_column("invoice", UUID(as_uuid=True), primary_key=True)
+    created_at = mapped_column("created_at", DateTime, default=datetime.utcnow)
+    leased_until = mapped_column("leased_until", DateTime, nullable=True)
+
+    __tablename__ = "invoice_sync"
+    __table_args__ = (Index("ix_invoice_sync_created_at", "created_at"),)
@@ -0,0 +1,257 @@
+import typing as t
+import uuid
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import Text, cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from db.base import (
+    SABillingEvent,
+    SABillingEventDeadLetter,
+    SABillingEventQueue,
+    get_async_session,
+)
+from db.routing import USE_PRIMARY
+from db.unit_of_work import commit
+from db.utils import model_columns
+
+# Advisory lock namespace of queued accounts, keyed by the hash of the account id.
+BILLING_EVENT_ACCOUNT_LOCK = 0x5EED_0002
+
+
+def _account_lock(function: t.Any, account_id: t.Any) -> t.Any:
+    return function(BILLING_EVENT_ACCOUNT_LOCK, func.hashtext(cast(account_id, Text)))
+
+
+class SABillingEventDB:
+    session: AsyncSession
+    table: SABillingEvent
+
+    def __init__(self, session: AsyncSession, table: SABillingEvent):
+        self.session = session
+        self.table = table
+
+    async def create(
+        self, id_: str, account_id: uuid.UUID, payment_status: str
+    ) -> bool:
+        """
+        Record a billing event, returning False if its key was already recorded.
+
+        The INSERT ... ON CONFLICT DO NOTHING waits on a concurrent insert of
+        the same key, so of two racing deliveries only one gets True.
+        """
+        statement = (
+            insert(self.table)
+            .values(
+                id=id_,
+                account_id=account_id,
+                payment_status=payment_status,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=[self.table.id])
+            .returning(self.table.id)
+        )
+        results = await self.session.execute(statement)
+        created = results.scalar_one_or_none() is not None
+        await commit(self.session)
+        return created
+
+    async def create_many(self, events: t.Iterable[models.PaymentEvent]) -> set[str]:
+        """Record the keys of billing events, returning those not recorded before."""
+        values = [
+            {
+                "id": event.event_id,
+                "account_id": event.account_id,
+                "payment_status": event.payment_status.value,
+                "created_at": datetime.utcnow(),
+            }
+            for event in events
+            if event.event_id is not None
+        ]
+        if not values:
+            return set()
+
+        statement = (
+            insert(self.table)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[self.table.id])
+            .returning(self.table.id)
+        )
+        results = await self.session.execute(statement)
+        created = set(results.scalars())
+        await commit(self.session)
+        return created
+
+    async def delete_many(self, ids: t.Iterable[str]) -> None:
+        """Drop the keys of events that were not applied, so a redelivery is."""
+        statement = delete(self.table).where(self.table.id.in_(list(ids)))
+        await self.session.execute(statement)
+        await commit(self.session)
+
+
+class SABillingEventQueueDB:
+    session: AsyncSession
+    table: SABillingEventQueue
+
+    def __init__(self, session: AsyncSession, table: SABillingEventQueue):
+        self.session = session
+        self.table = table
+        self.model_manager = models.PaymentEvent
+
+    async def enqueue(
+        self,
+        account_id: uuid.UUID,
+        tariff_id: uuid.UUID,
+        payment_status: str,
+        event_id: str | None = None,
+        invoice_id: uuid.UUID | None = None,
+    ) -> None:
+        """Durably queue a payment event for the billing event workers."""
+        statement = insert(self.table).values(
+            event_id=event_id,
+            invoice_id=invoice_id,
+            account_id=account_id,
+            tariff_id=tariff_id,
+            payment_status=payment_status,
+            created_at=datetime.utcnow(),
+        )
+        await self.session.execute(statement)
+        await commit(self.session)
+
+    async def claim(self, limit: int) -> list[models.PaymentEvent]:
+        """
+        Take the queued events of the accounts among the `limit` oldest events.
+
+        Events of one account must be applied in order, so accounts are
+        claimed whole: each account of the oldest events is locked with a
+        transaction-level advisory lock, skipping accounts another worker
+        holds, and all queued events of the locked accounts are deleted in the
+        caller's transaction. A failed batch is put back by the rollback. The
+        batch can exceed `limit` by the later events of its accounts.
+        """
+        head = (
+            select(self.table.account_id)
+            .order_by(self.table.id)
+            .limit(limit)
+            .subquery()
+        )
+        return await self._take(await self._try_lock(head.c.account_id))
+
+    async def claim_account(self, account_id: uuid.UUID) -> list[models.PaymentEvent]:
+        """Take the queued events of one account, unless another worker holds it."""
+        account_id_ = literal(account_id, type_=PG_UUID(as_uuid=True))
+        return await self._take(await self._try_lock(account_id_))
+
+    async def record_failure(
+        self, account_id: uuid.UUID, max_attempts: int
+    ) -> list[models.PaymentEvent]:
+        """
+        Count a failed batch against the queued events of an account.
+
+        The events that reach `max_attempts` are taken off the queue in the
+        caller's transaction and returned, so a poison event stops blocking
+        the later events of its account.
+        """
+        account_id_ = literal(account_id, type_=PG_UUID(as_uuid=True))
+        statement = select(_account_lock(func.pg_advisory_xact_lock, account_id_))
+        await self.session.execute(statement.execution_options(**{USE_PRIMARY: True}))
+        statement = (
+            update(self.table)
+            .where(self.table.account_id == account_id)
+            .values(attempts=self.table.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(statement)
+        statement = (
+            delete(self.table)
+            .where(
+                self.table.account_id == account_id, self.table.attempts >= max_attempts
+            )
+            .returning(*model_columns(self.table, self.model_manager))
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        objects = [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+        await commit(self.session)
+        return sorted(objects, key=lambda object_: object_.id)
+
+    async def _try_lock(self, account_id: t.Any) -> list[uuid.UUID]:
+        """Lock the given accounts for the transaction, skipping held ones."""
+        statement = (
+            select(account_id)
+            .distinct()
+            .where(_account_lock(func.pg_try_advisory_xact_lock, account_id))
+            .execution_options(**{USE_PRIMARY: True})
+        )
+        results = await self.session.execute(statement)
+        return list(results.scalars())
+
+    async def _take(self, account_ids: list[uuid.UUID]) -> list[models.PaymentEvent]:
+        if not account_ids:
+            return []
+
+        statement = (
+            delete(self.table)
+            .where(self.table.account_id.in_(account_ids))
+            .returning(*model_columns(self.table, self.model_manager))
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        objects = [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+        return sorted(objects, key=lambda object_: object_.id)
+
+    async def get_oldest_created_at(self) -> datetime | None:
+        """Get the enqueue time of the oldest queued event."""
+        statement = select(self.table.created_at).order_by(self.table.id).limit(1)
+        results = await self.session.execute(statement)
+        return results.scalar_one_or_none()
+
+
+class SABillingEventDeadLetterDB:
+    session: AsyncSession
+    table: SABillingEventDeadLetter
+
+    def __init__(self, session: AsyncSession, table: SABillingEventDeadLetter):
+        self.session = session
+        self.table = table
+
+    async def create_many(
+        self, events: t.Iterable[tuple[models.PaymentEvent, str]]
+    ) -> None:
+        """Keep (event, reason) pairs of queued events that were not applied."""
+        failed_at = datetime.utcnow()
+        values = [
+            {
+                **event.model_dump(),
+                "payment_status": event.payment_status.value,
+                "reason": reason,
+                "failed_at": failed_at,
+            }
+            for event, reason in events
+        ]
+        if not values:
+            return
+
+        statement = insert(self.table).on_conflict_do_nothing(
+            index_elements=[self.table.id]
+        )
+        await self.session.execute(statement, values)
+        await commit(self.session)
+
+
+async def get_billing_event_db(session: AsyncSession = Depends(get_async_session)):
+    yield SABillingEventDB(session, SABillingEvent)  # type: ignore
+
+
+async def get_billing_event_queue_db(
+    session: AsyncSession = Depends(get_async_session),
+):
+    yield SABillingEventQueueDB(session, SABillingEventQueue)  # type: ignore
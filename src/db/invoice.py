@@ -0,0 +1,231 @@
+import typing as t
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import Depends
+from sqlalchemy import (
+    DateTime,
+    any_,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from db.base import AccountDB, SAInvoice, SAInvoiceSync, get_async_session
+from db.unit_of_work import commit
+from db.utils import model_columns
+
+# The modified_at of an invoice known only from webhooks: older than any
+# version billing reports, so the first fetched version replaces it.
+UNVERSIONED = datetime.min
+
+
+class SAInvoiceDB:
+    session: AsyncSession
+    table: SAInvoice
+
+    def __init__(self, session: AsyncSession, table: SAInvoice):
+        self.session = session
+        self.table = table
+        self.model_manager = models.InvoiceRead
+
+    async def get_by_id(self, id_: uuid.UUID) -> models.InvoiceRead | None:
+        """Get a mirrored invoice by id."""
+        statement = select(*model_columns(self.table, self.model_manager)).where(
+            self.table.id == id_
+        )
+        results = await self.session.execute(statement)
+        row = results.mappings().one_or_none()
+        return None if row is None else self.model_manager.model_validate(dict(row))
+
+    async def get_by_account(self, account_id: uuid.UUID) -> list[models.InvoiceRead]:
+        """Get the mirrored invoices of an account, newest first."""
+        statement = (
+            select(*model_columns(self.table, self.model_manager))
+            .where(self.table.user_id == account_id)
+            .order_by(self.table.created_at.desc())
+        )
+        results = await self.session.execute(statement)
+        return [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+
+    async def create(self, invoice: models.InvoiceRead) -> None:
+        """
+        Store a newly created invoice.
+
+        A row that already exists was written by a webhook, which reports a
+        later state than the creation response, so it is kept.
+        """
+        statement = insert(self.table).values(**invoice.model_dump())
+        statement = statement.on_conflict_do_nothing(index_elements=[self.table.id])
+        await self.session.execute(statement)
+        await commit(self.session)
+
+    async def upsert(self, invoice: models.InvoiceRead) -> None:
+        """
+        Store an invoice as billing reported it.
+
+        An existing row is only overwritten by a newer billing `modified_at`:
+        versions are compared on billing's clock only, and a response that
+        is not newer cannot roll back a status set by a webhook since.
+        """
+        values = invoice.model_dump()
+        columns = self.table.__mapper__.columns
+        statement = insert(self.table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.table.id],
+            set_={
+                columns[name]: statement.excluded[columns[name].name]
+                for name in values
+                if name != "id"
+            },
+            where=self.table.modified_at < statement.excluded.modified_at,
+        )
+        await self.session.execute(statement)
+        await commit(self.session)
+
+    async def set_statuses(self, invoices: t.Iterable[dict[str, t.Any]]) -> None:
+        """
+        Apply payment statuses reported by billing webhooks.
+
+        A webhook carries no billing version, so a mirrored invoice only gets
+        the new status and keeps its `modified_at`. An invoice missing from
+        the mirror is inserted from the event with the UNVERSIONED version,
+        to be replaced once it is fetched from billing.
+        """
+        created_at = datetime.utcnow()
+        values = {
+            invoice["id"]: {
+                **invoice,
+                "created_at": created_at,
+                "modified_at": UNVERSIONED,
+            }
+            for invoice in invoices
+        }
+        if not values:
+            return
+
+        statement = insert(self.table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.table.id],
+            set_={self.table.status: statement.excluded.status},
+        )
+        await self.session.execute(statement, list(values.values()))
+        await commit(self.session)
+
+
+class SAInvoiceSyncDB:
+    session: AsyncSession
+    table: SAInvoiceSync
+
+    def __init__(self, session: AsyncSession, table: SAInvoiceSync):
+        self.session = session
+        self.table = table
+
+    async def request(self, ids: t.Iterable[uuid.UUID]) -> None:
+        """
+        Queue invoices to be fetched from billing.
+
+        A queued invoice gets the new request time, so an invoice claimed
+        before the request is not deleted by that claim and is fetched again.
+        """
+        created_at = datetime.utcnow()
+        values = [{"invoice_id": id_, "created_at": created_at} for id_ in set(ids)]
+        if not values:
+            return
+
+        statement = insert(self.table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.table.invoice_id],
+            set_={self.table.created_at: statement.excluded.created_at},
+        )
+        await self.session.execute(statement, values)
+        await commit(self.session)
+
+    async def request_missing(self) -> int:
+        """
+        Queue the current invoices of accounts that are not mirrored yet.
+
+        Backfills the mirror with invoices created before it existed; one
+        set-based statement, meant to be run once after the deploy.
+        """
+        missing = (
+            select(AccountDB.invoice_id, literal(datetime.utcnow(), DateTime))
+            .outerjoin(SAInvoice, SAInvoice.id == AccountDB.invoice_id)
+            .where(AccountDB.invoice_id.is_not(None), SAInvoice.id.is_(None))
+            .distinct()
+        )
+        statement = (
+            insert(self.table)
+            .from_select([self.table.invoice_id, self.table.created_at], missing)
+            .on_conflict_do_nothing(index_elements=[self.table.invoice_id])
+        )
+        results = await self.session.execute(statement)
+        await commit(self.session)
+        return results.rowcount
+
+    async def claim(self, limit: int, lease: float) -> list[tuple[uuid.UUID, datetime]]:
+        """
+        Lease up to `limit` of the oldest queued invoices for `lease` seconds.
+
+        The lease is meant to be committed right away, so no lock is held
+        while the invoices are fetched. Returns (id, request time) pairs to
+        pass to `delete`; an invoice whose lease ran out is claimed again.
+        """
+        now = datetime.utcnow()
+        candidates = (
+            select(self.table.invoice_id)
+            .where(
+                or_(self.table.leased_until.is_(None), self.table.leased_until < now)
+            )
+            .order_by(self.table.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(self.table)
+            .where(
+                self.table.invoice_id == any_(func.array(candidates.scalar_subquery()))
+            )
+            .values(leased_until=now + timedelta(seconds=lease))
+            .returning(self.table.invoice_id, self.table.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        results = await self.session.execute(statement)
+        claims = [(row.invoice_id, row.created_at) for row in results]
+        await commit(self.session)
+        return claims
+
+    async def delete(self, claims: t.Iterable[tuple[uuid.UUID, datetime]]) -> None:
+        """Remove fetched invoices from the queue unless requested again since."""
+        claims = list(claims)
+        if not claims:
+            return
+
+        statement = delete(self.table).where(
+            tuple_(self.table.invoice_id, self.table.created_at).in_(claims)
+        )
+        await self.session.execute(statement)
+        await commit(self.session)
+
+    async def get_oldest_created_at(self) -> datetime | None:
+        """Get the time the oldest queued invoice was requested."""
+        statement = select(self.table.created_at).order_by(self.table.created_at)
+        results = await self.session.execute(statement.limit(1))
+        return results.scalar_one_or_none()
+
+
+async def get_invoice_db(session: AsyncSession = Depends(get_async_session)):
+    yield SAInvoiceDB(session, SAInvoice)  # type: ignore
+
+
+async def get_invoice_sync_db(session: AsyncSession = Depends(get_async_session)):
+    yield SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
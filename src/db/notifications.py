@@ -0,0 +1,107 @@
+import asyncio
+import contextlib
+import logging
+import typing as t
+
+import asyncpg
+from sqlalchemy import String, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_database_dsn
+
+logger = logging.getLogger(__name__)
+
+Callback = t.Callable[[str], None]
+
+ACCOUNT_CHANGED_CHANNEL = "account_changed"
+CATALOG_CHANGED_CHANNEL = "catalog_changed"
+
+_notify_many = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam("payloads", type_=ARRAY(String)))
+
+
+async def notify(
+    session: AsyncSession, channel: str, payloads: t.Iterable[str]
+) -> None:
+    """
+    Queue NOTIFY messages in the session's transaction.
+
+    Postgres delivers them only when the transaction commits, and drops them if
+    it rolls back, so listeners never see changes that did not happen.
+    """
+    payloads = list(payloads)
+    if payloads:
+        await session.execute(_notify_many, {"channel": channel, "payloads": payloads})
+
+
+class PGListener:
+    """
+    Dedicated connection receiving LISTEN/NOTIFY messages.
+
+    The connection is re-established after it drops; since notifications sent
+    in between are lost, `on_reconnect` callbacks run on every (re)connect so
+    subscribers can drop whatever state they derived from them.
+    """
+
+    def __init__(self, reconnect_interval: float = 1.0) -> None:
+        self.reconnect_interval = reconnect_interval
+        self.connected = False
+        self._channels: dict[str, list[Callback]] = {}
+        self._on_reconnect: list[t.Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def listen(self, channel: str, callback: Callback) -> None:
+        self._channels.setdefault(channel, []).append(callback)
+
+    def on_reconnect(self, callback: t.Callable[[], None]) -> None:
+        self._on_reconnect.append(callback)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="pg-listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN connection failed")
+            finally:
+                self.connected = False
+
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def _listen(self) -> None:
+        closed = asyncio.Event()
+        connection = await asyncpg.connect(get_database_dsn())
+        try:
+            connection.add_termination_listener(lambda _: closed.set())
+            for channel in self._channels:
+                await connection.add_listener(channel, self._dispatch)
+
+            for callback in self._on_reconnect:
+                callback()
+            self.connected = True
+
+            await closed.wait()
+        finally:
+            await connection.close()
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._channels.get(channel, ()):
+            callback(payload)
+
+
+listener = PGListener()
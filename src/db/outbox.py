@@ -0,0 +1,72 @@
+import typing as t
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from db.base import SAOutbox, get_async_session
+from db.unit_of_work import commit
+from db.utils import model_columns
+
+ACCOUNT_STATUS_CHANGED_TOPIC = "account.status_changed"
+
+
+class SAOutboxDB:
+    session: AsyncSession
+    table: SAOutbox
+
+    def __init__(self, session: AsyncSession, table: SAOutbox):
+        self.session = session
+        self.table = table
+        self.model_manager = models.OutboxEvent
+
+    async def create_many(
+        self, topic: str, events: t.Iterable[tuple[str, dict[str, t.Any]]]
+    ) -> None:
+        """Queue (key, payload) events of a topic with a single bulk INSERT."""
+        created_at = datetime.utcnow()
+        values = [
+            {"topic": topic, "key": key, "payload": payload, "created_at": created_at}
+            for key, payload in events
+        ]
+        if not values:
+            return
+
+        await self.session.execute(insert(self.table), values)
+        await commit(self.session)
+
+    async def claim(self, limit: int) -> list[models.OutboxEvent]:
+        """
+        Lock up to `limit` of the oldest events for publishing.
+
+        Rows are taken with FOR UPDATE SKIP LOCKED, so concurrent relays take
+        disjoint batches; they stay in the table until `delete` commits.
+        """
+        statement = (
+            select(*model_columns(self.table, self.model_manager))
+            .order_by(self.table.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        results = await self.session.execute(statement)
+        return [
+            self.model_manager.model_validate(dict(row)) for row in results.mappings()
+        ]
+
+    async def delete(self, ids: t.Iterable[int]) -> None:
+        """Remove published events."""
+        statement = delete(self.table).where(self.table.id.in_(list(ids)))
+        await self.session.execute(statement)
+        await commit(self.session)
+
+    async def get_oldest_created_at(self) -> datetime | None:
+        """Get the creation time of the oldest unpublished event."""
+        statement = select(self.table.created_at).order_by(self.table.id).limit(1)
+        results = await self.session.execute(statement)
+        return results.scalar_one_or_none()
+
+
+async def get_outbox_db(session: AsyncSession = Depends(get_async_session)):
+    yield SAOutboxDB(session, SAOutbox)  # type: ignore
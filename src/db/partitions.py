@@ -0,0 +1,118 @@
+import re
+import typing as t
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+ACCOUNT_STATUS_PARTITION = re.compile(r"^account_status_p(\d{4})(\d{2})$")
+# Serializes partition maintenance between replicas of the service.
+PARTITION_MAINTENANCE_LOCK = 0x5EED_0001
+ACCOUNT_STATUS_PARTITIONS = text(
+    "SELECT child.relname FROM pg_inherits "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "JOIN pg_namespace ns ON ns.oid = parent.relnamespace "
+    "WHERE ns.nspname = 'subscriptions' AND parent.relname = 'account_status' "
+    "AND pg_inherits.inhdetachpending = :pending"
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_headroom(months: t.Iterable[date], this_month: date) -> int:
+    """
+    Count the months after `this_month` covered by partitions without a gap.
+
+    -1 means `this_month` itself has no partition, so INSERTs already fail.
+    """
+    covered = set(months)
+    headroom = -1
+    while add_months(this_month, headroom + 1) in covered:
+        headroom += 1
+    return headroom
+
+
+async def lock_partition_maintenance(connection: AsyncConnection) -> bool:
+    """Take the session-level maintenance lock, False if another worker holds it."""
+    result = await connection.execute(
+        text("SELECT pg_try_advisory_lock(:key)"), {"key": PARTITION_MAINTENANCE_LOCK}
+    )
+    return bool(result.scalar())
+
+
+async def unlock_partition_maintenance(connection: AsyncConnection) -> None:
+    await connection.execute(
+        text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITION_MAINTENANCE_LOCK}
+    )
+
+
+async def get_account_status_partitions(connection: AsyncConnection) -> dict[date, str]:
+    """Map the month of each monthly account_status partition to its name."""
+    result = await connection.execute(ACCOUNT_STATUS_PARTITIONS, {"pending": False})
+
+    partitions = {}
+    for name in result.scalars():
+        match = ACCOUNT_STATUS_PARTITION.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+async def create_account_status_partitions(
+    connection: AsyncConnection, start: date, months: int
+) -> None:
+    """Make sure monthly partitions exist from `start` for `months` months."""
+    for offset in range(months + 1):
+        await connection.execute(
+            text("SELECT subscriptions.create_account_status_partition(:month)"),
+            {"month": add_months(start.replace(day=1), offset)},
+        )
+
+
+async def detach_account_status_partitions(
+    connection: AsyncConnection, before: date
+) -> list[str]:
+    """
+    Detach partitions holding only rows older than `before`.
+
+    Partitions are detached CONCURRENTLY, so writers to account_status are
+    not blocked; that cannot run in a transaction block, and `connection`
+    must be in AUTOCOMMIT mode. A detach interrupted half way is finalized
+    first. Detached partitions are moved to the `subscriptions_archive`
+    schema as plain tables, to be dumped and dropped by the archival routine.
+    """
+    result = await connection.execute(ACCOUNT_STATUS_PARTITIONS, {"pending": True})
+    pending = list(result.scalars())
+    for name in pending:
+        await connection.execute(
+            text(
+                f"ALTER TABLE subscriptions.account_status "
+                f"DETACH PARTITION subscriptions.{name} FINALIZE"
+            )
+        )
+
+    expired = [
+        name
+        for month, name in sorted(
+            (await get_account_status_partitions(connection)).items()
+        )
+        if add_months(month, 1) <= before
+    ]
+    for name in expired:
+        await connection.execute(
+            text(
+                f"ALTER TABLE subscriptions.account_status "
+                f"DETACH PARTITION subscriptions.{name} CONCURRENTLY"
+            )
+        )
+
+    detached = sorted(pending + expired)
+    for name in detached:
+        await connection.execute(
+            text(f"ALTER TABLE subscriptions.{name} SET SCHEMA subscriptions_archive")
+        )
+    return detached
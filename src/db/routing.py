@@ -0,0 +1,108 @@
+import time
+import typing as t
+
+from sqlalchemy import Delete, Engine, Insert, Select, Update
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+USE_PRIMARY = "use_primary"
+ON_REPLICA = "on_replica"
+
+
+class ReplicaState:
+    """Tracks whether the replica may be used, backing off after it fails."""
+
+    def __init__(self, retry_interval: float) -> None:
+        self.retry_interval = retry_interval
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self) -> None:
+        self.failures += 1
+        self.down_until = time.monotonic() + self.retry_interval
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "available": self.available,
+            "reads": self.reads,
+            "failures": self.failures,
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain reads to a replica and everything else to the primary.
+
+    As soon as the session writes (or locks rows with SELECT ... FOR UPDATE) it
+    sticks to the primary, so reads after a write within the same request see
+    that write. A single read can be sent to the primary with the `use_primary`
+    execution option. A read that fails because the replica is unreachable is
+    retried on the primary, and the replica is skipped for `retry_interval`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        *args: t.Any,
+        replica: Engine | None = None,
+        replica_state: ReplicaState | None = None,
+        **kwargs: t.Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+        self.replica_state = replica_state
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._is_replica_read(clause):
+            self.info[ON_REPLICA] = True
+            self.replica_state.reads += 1  # type: ignore
+            return self.replica
+
+        self.info[ON_REPLICA] = False
+        if self._flushing or _is_write(clause):
+            self.info[USE_PRIMARY] = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except (DBAPIError, OSError) as e:
+            if not self.info.get(ON_REPLICA) or not _is_unavailable(e):
+                raise
+
+        self.replica_state.mark_down()  # type: ignore
+        self.rollback()
+        return super().execute(statement, *args, **kwargs)
+
+    def _is_replica_read(self, clause: t.Any) -> bool:
+        return (
+            self.replica is not None
+            and self.replica_state is not None
+            and self.replica_state.available
+            and not self._flushing
+            and not self.info.get(USE_PRIMARY)
+            and isinstance(clause, Select)
+            and not _locks_rows(clause)
+            and not clause.get_execution_options().get(USE_PRIMARY)
+        )
+
+
+def _locks_rows(clause: Select) -> bool:
+    return clause._for_update_arg is not None
+
+
+def _is_write(clause: t.Any) -> bool:
+    if isinstance(clause, Select):
+        return _locks_rows(clause)
+    return isinstance(clause, (Insert, Update, Delete))
+
+
+def _is_unavailable(error: Exception) -> bool:
+    if isinstance(error, (OSError, OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
@@ -2,12 +2,16 @@ import typing as t
 import uuid
 
 from fastapi import Depends
-from sqlalchemy import Select, select
+from sqlalchemy import Select, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import core.exceptions as exc
 import models
 from core.pagination import PaginateQueryParams
 from db.base import SASubscription, get_async_session
+from db.notifications import CATALOG_CHANGED_CHANNEL, notify
+from db.unit_of_work import commit
+from db.utils import column_values, make_page, model_columns, paginate
 
 
 class SASubscriptionDB:
@@ -33,53 +37,71 @@ class SASubscriptionDB:
             return None
         return self.model_manager.model_validate(object_)
 
+    async def get_all(self) -> list[models.Subscription]:
+        """Get all subscriptions."""
+        results = await self.session.execute(select(self.table))
+        return [
+            self.model_manager.model_validate(object_)
+            for object_ in results.scalars().fetchall()
+        ]
+
+    async def notify_changed(self) -> None:
+        """Announce a catalog change to listeners once the transaction commits."""
+        await notify(self.session, CATALOG_CHANGED_CHANNEL, [self.table.__tablename__])
+
     async def create(self, create_dict: dict[str, t.Any]) -> models.Subscription:
         """Create a subscription."""
         object_ = self.table(**create_dict)  # type: ignore
         self.session.add(object_)
-        await self.session.commit()
+        await commit(self.session)
         return self.model_manager.model_validate(object_)
 
     async def update(
         self, object_: models.Subscription, update_dict: dict[str, t.Any]
     ) -> models.Subscription:
-        """Update a subscription."""
-        _object = self._get_object_by_id(object_.id)
+        """Update a subscription in a single UPDATE ... RETURNING round trip."""
+        values = column_values(self.table, update_dict)
+        statement = (
+            update(self.table)
+            .where(self.table.id == object_.id)
+            .values(**values)
+            .returning(*model_columns(self.table, self.model_manager))
+        )
 
-        for key, value in update_dict.items():
-            setattr(_object, key, value)
-        self.session.add(_object)
-        await self.session.commit()
-        await self.session.refresh(_object)
+        results = await self.session.execute(statement)
+        row = results.mappings().one_or_none()
+        if row is None:
+            raise exc.ObjectNotExists
 
-        return self.model_manager.model_validate(_object)
+        await commit(self.session)
+
+        return self.model_manager.model_validate(dict(row))
 
     async def delete(self, id_: uuid.UUID) -> None:
         """Delete a subscription."""
         statement = select(self.table).where(self.table.id == id_)
         object_ = await self._get_object(statement)
         await self.session.delete(object_)
-        await self.session.commit()
+        await commit(self.session)
 
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[models.Subscription]:
+    ) -> models.Page[models.Subscription]:
         """Search subscriptions."""
+        order_by = (self.table.name, self.table.id)
         statement = select(self.table)
         if filter_param:
-            statement.where(self.table.name == filter_param)
+            statement = statement.where(self.table.name == filter_param)
 
-        statement.limit(pagination_params.page_size)
-        statement.offset(
-            (pagination_params.page_number - 1) * pagination_params.page_size
-        )
+        statement = paginate(statement, order_by, pagination_params)
 
         results = await self.session.execute(statement)
 
-        return list(
+        objects = [
             self.model_manager.model_validate(result[0])
             for result in results.fetchall()
-        )
+        ]
+        return make_page(objects, order_by, pagination_params)
 
     async def _get_object_by_id(self, object_id: uuid.UUID) -> SASubscription | None:
         statement = select(self.table).where(self.table.id == object_id)
@@ -1,13 +1,19 @@
 import typing as t
 import uuid
+from datetime import datetime
 
 from fastapi import Depends
-from sqlalchemy import Select, select
+from sqlalchemy import UUID, Select, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import core.exceptions as exc
 import models
 from core.pagination import PaginateQueryParams
 from db.base import SATariff, get_async_session
+from db.notifications import CATALOG_CHANGED_CHANNEL, notify
+from db.unit_of_work import commit
+from db.utils import column_values, make_page, model_columns, paginate
 
 
 class SATariffDB:
@@ -26,60 +32,93 @@ class SATariffDB:
             return None
         return self.model_manager.model_validate(object_)
 
-    async def get_by_subscription(self, id_: uuid.UUID) -> models.Tariff | None:
-        """Get a tariff by subscription id."""
-        object_ = await self._get_object_by_subscription_id(id_)
+    async def get_by_ids(self, ids: t.Iterable[uuid.UUID]) -> list[models.Tariff]:
+        """Get tariffs by a list of ids in a single `id = ANY(:ids)` query."""
+        statement = select(self.table).where(
+            self.table.id == any_(bindparam("ids", list(ids), type_=ARRAY(UUID)))
+        )
+        results = await self.session.execute(statement)
+        return [
+            self.model_manager.model_validate(object_)
+            for object_ in results.scalars().fetchall()
+        ]
+
+    async def get_by_subscription(
+        self, id_: uuid.UUID, date: datetime
+    ) -> models.Tariff | None:
+        """Get the tariff of a subscription effective at the given date."""
+        object_ = await self._get_object_by_subscription_id(id_, date)
         if not object_:
             return None
+        if object_.expires_at is not None and object_.expires_at <= date:
+            return None
         return self.model_manager.model_validate(object_)
 
+    async def get_all(self) -> list[models.Tariff]:
+        """Get all tariffs."""
+        results = await self.session.execute(select(self.table))
+        return [
+            self.model_manager.model_validate(object_)
+            for object_ in results.scalars().fetchall()
+        ]
+
+    async def notify_changed(self) -> None:
+        """Announce a catalog change to listeners once the transaction commits."""
+        await notify(self.session, CATALOG_CHANGED_CHANNEL, [self.table.__tablename__])
+
     async def create(self, create_dict: dict[str, t.Any]) -> models.Tariff:
         """Create a tariff."""
         object_ = self.table(**create_dict)  # type: ignore
         self.session.add(object_)
-        await self.session.commit()
+        await commit(self.session)
         return self.model_manager.model_validate(object_)
 
     async def update(
         self, object_: models.Tariff, update_dict: dict[str, t.Any]
     ) -> models.Tariff:
-        """Update a tariff."""
-        _object = self._get_object_by_id(object_.id)
+        """Update a tariff in a single UPDATE ... RETURNING round trip."""
+        values = column_values(self.table, update_dict)
+        statement = (
+            update(self.table)
+            .where(self.table.id == object_.id)
+            .values(**values)
+            .returning(*model_columns(self.table, self.model_manager))
+        )
 
-        for key, value in update_dict.items():
-            setattr(_object, key, value)
-        self.session.add(_object)
-        await self.session.commit()
-        await self.session.refresh(_object)
+        results = await self.session.execute(statement)
+        row = results.mappings().one_or_none()
+        if row is None:
+            raise exc.ObjectNotExists
+
+        await commit(self.session)
 
-        return self.model_manager.model_validate(_object)
+        return self.model_manager.model_validate(dict(row))
 
     async def delete(self, id_: uuid.UUID) -> None:
         """Delete a tariff."""
         statement = select(self.table).where(self.table.id == id_)
         object_ = await self._get_object(statement)
         await self.session.delete(object_)
-        await self.session.commit()
+        await commit(self.session)
 
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[models.Tariff]:
+    ) -> models.Page[models.Tariff]:
         """Search tariffs."""
+        order_by = (self.table.created_at, self.table.id)
         statement = select(self.table)
         if filter_param:
-            statement.where(self.table.id == filter_param)
+            statement = statement.where(self.table.id == filter_param)
 
-        statement.limit(pagination_params.page_size)
-        statement.offset(
-            (pagination_params.page_number - 1) * pagination_params.page_size
-        )
+        statement = paginate(statement, order_by, pagination_params)
 
         results = await self.session.execute(statement)
 
-        return list(
+        objects = [
             self.model_manager.model_validate(result[0])
             for result in results.fetchall()
-        )
+        ]
+        return make_page(objects, order_by, pagination_params)
 
     async def _get_object_by_id(self, id_: uuid.UUID) -> SATariff | None:
         statement = select(self.table).where(self.table.id == id_)
@@ -89,8 +128,17 @@ class SATariffDB:
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
 
-    async def _get_object_by_subscription_id(self, id_: uuid.UUID) -> SATariff | None:
-        statement = select(self.table).where(self.table.subscription_id == id_)
+    async def _get_object_by_subscription_id(
+        self, id_: uuid.UUID, date: datetime
+    ) -> SATariff | None:
+        # The latest version started by the date; a range scan over
+        # ix_tariff_subscription_created_at stopping at the first row.
+        statement = (
+            select(self.table)
+            .where(self.table.subscription_id == id_, self.table.created_at <= date)
+            .order_by(self.table.created_at.desc())
+            .limit(1)
+        )
         return await self._get_object(statement)
 
 
@@ -0,0 +1,47 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+UNIT_OF_WORK_DEPTH = "unit_of_work_depth"
+
+
+class SAUnitOfWork:
+    """
+    Groups repository writes on one session into a single transaction.
+
+    While a unit of work is open, repositories sharing the session only flush
+    their changes; the outermost unit of work commits once on exit, or rolls
+    back if the block raised. Units of work may be nested.
+    """
+
+    session: AsyncSession
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def active(self) -> bool:
+        return self.session.info.get(UNIT_OF_WORK_DEPTH, 0) > 0
+
+    async def __aenter__(self) -> "SAUnitOfWork":
+        self.session.info[UNIT_OF_WORK_DEPTH] = (
+            self.session.info.get(UNIT_OF_WORK_DEPTH, 0) + 1
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        depth = self.session.info[UNIT_OF_WORK_DEPTH] - 1
+        self.session.info[UNIT_OF_WORK_DEPTH] = depth
+        if depth:
+            return
+
+        if exc_type is None:
+            await self.session.commit()
+        else:
+            await self.session.rollback()
+
+
+async def commit(session: AsyncSession) -> None:
+    """Commit the session, or only flush it inside an open unit of work."""
+    if session.info.get(UNIT_OF_WORK_DEPTH):
+        await session.flush()
+    else:
+        await session.commit()
@@ -0,0 +1,101 @@
+import typing as t
+
+from pydantic import BaseModel
+from sqlalchemy import Label, Select, literal, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+import models
+from core.pagination import PaginateQueryParams, decode_cursor, encode_cursor
+
+M = t.TypeVar("M")
+
+
+def column_values(table: t.Any, values: t.Mapping[str, t.Any]) -> dict[str, t.Any]:
+    """Keep only the keys that are mapped columns of the table."""
+    columns = table.__mapper__.column_attrs.keys()
+    return {key: value for key, value in values.items() if key in columns}
+
+
+def model_columns(table: t.Any, model: type[BaseModel]) -> list[Label]:
+    """Select the table attributes backing a domain model, labelled by field name."""
+    return [getattr(table, name).label(name) for name in model.model_fields]
+
+
+def row_columns(
+    table: t.Any,
+    model: type[BaseModel],
+    order_by: t.Sequence[InstrumentedAttribute] = (),
+) -> list[Label]:
+    """
+    Select the columns of a response schema plus any missing `order_by` keys.
+
+    Used by the raw row read paths, which skip the domain model and hand the
+    rows straight to the response serializer.
+    """
+    names = [*model.model_fields]
+    names += [column.key for column in order_by if column.key not in names]
+    return [getattr(table, name).label(name) for name in names]
+
+
+def project_rows(
+    rows: t.Iterable[t.Mapping[str, t.Any]], model: type[BaseModel]
+) -> list[dict[str, t.Any]]:
+    """Keep only the response schema fields of raw rows."""
+    names = tuple(model.model_fields)
+    return [{name: row[name] for name in names} for row in rows]
+
+
+def paginate(
+    statement: Select,
+    order_by: t.Sequence[InstrumentedAttribute],
+    pagination_params: PaginateQueryParams,
+) -> Select:
+    """
+    Apply the page window to a statement.
+
+    With a cursor the page is selected by a keyset predicate on `order_by`,
+    so every page costs the same; without one the legacy page_number offset
+    is used. One extra row is fetched to tell whether a next page exists.
+    """
+    statement = statement.order_by(*order_by)
+
+    if pagination_params.cursor is not None:
+        values = decode_cursor(
+            pagination_params.cursor, [column.type.python_type for column in order_by]
+        )
+        statement = statement.where(
+            tuple_(*order_by)
+            > tuple_(
+                *(
+                    literal(value, type_=column.type)
+                    for column, value in zip(order_by, values)
+                )
+            )
+        )
+    else:
+        statement = statement.offset(
+            (pagination_params.page_number - 1) * pagination_params.page_size
+        )
+
+    return statement.limit(pagination_params.page_size + 1)
+
+
+def make_page(
+    objects: list[M],
+    order_by: t.Sequence[InstrumentedAttribute],
+    pagination_params: PaginateQueryParams,
+) -> models.Page[M]:
+    """Trim the look-ahead row of a `paginate`d result and build the next cursor."""
+    next_cursor = None
+
+    if len(objects) > pagination_params.page_size:
+        objects = objects[: pagination_params.page_size]
+        last = objects[-1]
+        if isinstance(last, t.Mapping):
+            next_cursor = encode_cursor(last[column.key] for column in order_by)
+        else:
+            next_cursor = encode_cursor(
+                getattr(last, column.key) for column in order_by
+            )
+
+    return models.Page(items=objects, next_cursor=next_cursor)
@@ -0,0 +1,85 @@
+"""
+Per-object cost of serializing account list responses.
+
+Renders lists of accounts the way the list endpoints used to, through the
+domain model, the response schema and FastAPI's response-model validation,
+and the way they do now, as raw rows straight to orjson, and prints the
+cost per object for each list size. Needs no database; rows hold asyncpg's
+UUID type, like the ones the driver returns.
+
+    python -m devtools.bench_account_serialization --sizes 1 50 500
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime
+
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import api.schema as schema
+import models
+from api.v1.account import RowsResponse
+from db.base import AccountDB
+from devtools.utils import timed
+
+response_field = create_response_field(
+    name="response", type_=list[schema.SubscriptionAccountBase]
+)
+
+
+def make_accounts(size: int) -> list[AccountDB]:
+    now = datetime.utcnow()
+    return [
+        AccountDB(
+            id=PgUUID(str(uuid.uuid4())),
+            user_id=PgUUID(str(uuid.uuid4())),
+            subscription_id=PgUUID(str(uuid.uuid4())),
+            status="active",
+            invoice_id=None,
+            expires_at=now,
+            created_at=now,
+            modified_at=now,
+        )
+        for _ in range(size)
+    ]
+
+
+async def validated(objects: list[AccountDB]) -> bytes:
+    accounts = [models.Account.model_validate(object_) for object_ in objects]
+    items = [schema.SubscriptionAccountBase.model_validate(item) for item in accounts]
+    content = await serialize_response(field=response_field, response_content=items)
+    return ORJSONResponse(content).body
+
+
+async def single_pass(rows: list[dict]) -> bytes:
+    return RowsResponse(rows).body
+
+
+async def main(args: argparse.Namespace) -> None:
+    names = tuple(schema.SubscriptionAccountBase.model_fields)
+    for size in args.sizes:
+        objects = make_accounts(size)
+        rows = [{name: getattr(object_, name) for name in names} for object_ in objects]
+        repeat = max(1, args.objects // size)
+
+        before, expected = await timed(lambda: validated(objects), repeat)
+        after, body = await timed(lambda: single_pass(rows), repeat)
+        assert body == expected
+
+        print(
+            f"{size:>5} accounts  validated {before / size * 1e6:6.2f}us/object  "
+            f"single pass {after / size * 1e6:6.2f}us/object  "
+            f"speedup {before / after:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument(
+        "--objects", type=int, default=200_000, help="objects rendered per size"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+Payment webhook latency with and without the in-memory catalog.
+
+Sends `--requests` paid events, one per account, through the ASGI app with
+the billing event queue disabled, once with the catalog disabled and once
+enabled, and prints p50/p99 latency, requests/s and SQL statements per
+request. Needs the database from settings with migrations applied; the rows
+it creates are removed at exit.
+
+    python -m devtools.bench_catalog --requests 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+import app as application
+from core.config import settings
+from db.base import engine
+from db.notifications import listener
+from devtools.bench_payment_flow import cleanup, setup
+from devtools.utils import create_token, quantiles
+from managers.catalog import catalog
+
+
+async def run(
+    api: httpx.AsyncClient, tariff_id: uuid.UUID, rows: list[tuple], concurrency: int
+) -> tuple[float, list[float], int]:
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def pay(account_id: uuid.UUID) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await api.post(
+                "/api/v1/internal/hooks/billing/payment",
+                params={
+                    "account_id": str(account_id),
+                    "tariff_id": str(tariff_id),
+                    "payment_status": "paid",
+                    "event_id": str(uuid.uuid4()),
+                },
+            )
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(pay(account_id) for account_id, _ in rows))
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return elapsed, latencies, statements
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.billing_event_queue_enabled = False
+    superuser = create_token(uuid.uuid4(), [settings.permissions_superuser])
+    api = httpx.AsyncClient(
+        transport=httpx.ASGITransport(application.app),
+        base_url="http://api",
+        headers={"Authorization": f"Bearer {superuser}"},
+    )
+
+    # The catalog only serves reads while the NOTIFY listener is connected.
+    listener.start()
+    while not listener.connected:
+        await asyncio.sleep(0.01)
+
+    subscription_id, tariff_id, rows = await setup(args.requests * 2)
+    runs = {
+        "catalog disabled": (False, rows[: args.requests]),
+        "catalog enabled": (True, rows[args.requests :]),
+    }
+    try:
+        for name, (enabled, run_rows) in runs.items():
+            settings.catalog_enabled = enabled
+            catalog.invalidate()
+            elapsed, latencies, statements = await run(
+                api, tariff_id, run_rows, args.concurrency
+            )
+            print(
+                f"{name:<17} {quantiles(latencies)} "
+                f"{len(run_rows) / elapsed:,.0f} requests/s "
+                f"{statements / len(run_rows):.1f} statements/request"
+            )
+        print(f"catalog reloads: {catalog.reloads}")
+    finally:
+        await api.aclose()
+        await listener.stop()
+        await cleanup(subscription_id, [account_id for account_id, _ in rows])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""
+Throughput benchmark of the NDJSON account exports.
+
+Seeds `--rows` synthetic accounts (and one status row each) under a fresh
+subscription with INSERT ... SELECT generate_series, streams both exports
+through the ASGI app and prints rows/s, MB/s and the growth of the peak RSS
+while streaming. Needs the database from settings with migrations applied;
+the seeded rows are removed at exit.
+
+    python -m devtools.bench_export --rows 2000000
+"""
+import argparse
+import asyncio
+import resource
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlencode
+
+from sqlalchemy import delete, text
+
+import app as application
+from core.config import settings
+from db.base import AccountDB, SAAccountStatus, SASubscription, async_session_maker
+from devtools.utils import create_token
+
+SEED_ACCOUNTS = text(
+    """
+    INSERT INTO subscriptions.account
+        (id, created_at, modified_at, "user", subscription, status, expires_at,
+         on_delete)
+    SELECT gen_random_uuid(), now.value, now.value, gen_random_uuid(),
+           :subscription_id, 'active', now.value + interval '30 days', false
+    FROM generate_series(1, :rows), (SELECT CAST(:now AS timestamp) AS value) AS now
+    """
+)
+SEED_STATUSES = text(
+    """
+    INSERT INTO subscriptions.account_status
+        (id, account, created_at, expires_at, status)
+    SELECT gen_random_uuid(), id, :now, expires_at, status
+    FROM subscriptions.account
+    WHERE subscription = :subscription_id
+    """
+)
+
+
+async def setup(rows: int, now: datetime) -> uuid.UUID:
+    subscription_id = uuid.uuid4()
+    async with async_session_maker() as session:
+        session.add(SASubscription(id=subscription_id, name=f"bench-{subscription_id}"))
+        await session.flush()
+        params = {"subscription_id": subscription_id, "rows": rows, "now": now}
+        await session.execute(SEED_ACCOUNTS, params)
+        await session.execute(SEED_STATUSES, params)
+        await session.commit()
+        await session.execute(text("ANALYZE subscriptions.account"))
+    return subscription_id
+
+
+async def cleanup(subscription_id: uuid.UUID) -> None:
+    accounts = AccountDB.__table__.select().where(
+        AccountDB.subscription_id == subscription_id
+    )
+    async with async_session_maker() as session:
+        await session.execute(
+            delete(SAAccountStatus).where(
+                SAAccountStatus.account_id.in_(
+                    accounts.with_only_columns(AccountDB.id).scalar_subquery()
+                )
+            )
+        )
+        await session.execute(
+            delete(AccountDB).where(AccountDB.subscription_id == subscription_id)
+        )
+        await session.execute(
+            delete(SASubscription).where(SASubscription.id == subscription_id)
+        )
+        await session.commit()
+
+
+async def stream(token: str, path: str, params: dict[str, str]) -> str:
+    """
+    GET `path` from the app and count the streamed rows.
+
+    The ASGI app is driven directly: httpx's ASGITransport buffers the whole
+    body, which would hide whether the export itself runs in constant memory.
+    """
+    rows = size = 0
+    status_code = 0
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive() -> dict:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal rows, size, status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            rows += message.get("body", b"").count(b"\n")
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": urlencode(params).encode(),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "server": ("api", 80),
+        "client": ("bench", 0),
+    }
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    await application.app(scope, receive, send)
+    elapsed = time.perf_counter() - started
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    if status_code != 200:
+        raise RuntimeError(f"GET {path} returned {status_code}")
+
+    return (
+        f"rows={rows} {rows / elapsed:,.0f} rows/s {size / elapsed / 2**20:.1f} MB/s "
+        f"elapsed={elapsed:.1f}s peak_rss_growth={rss_growth / 1024:.1f}MB"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    now = datetime.utcnow()
+    superuser = create_token(uuid.uuid4(), [settings.permissions_superuser])
+
+    started = time.perf_counter()
+    subscription_id = await setup(args.rows, now)
+    print(f"seeded {args.rows} accounts in {time.perf_counter() - started:.1f}s")
+    try:
+        accounts = await stream(
+            superuser,
+            "/api/v1/admin/export/accounts",
+            {"subscription_id": str(subscription_id)},
+        )
+        print(f"accounts          {accounts}")
+        statuses = await stream(
+            superuser,
+            "/api/v1/admin/export/account-statuses",
+            {"created_since": now.isoformat()},
+        )
+        print(f"account-statuses  {statuses}")
+    finally:
+        await cleanup(subscription_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    asyncio.run(main(parser.parse_args()))
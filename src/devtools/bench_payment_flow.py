@@ -0,0 +1,204 @@
+"""
+End-to-end benchmark of the paid subscription flow against the simulator.
+
+Drives invoice creation -> payment webhook -> account activation for
+`--accounts` accounts through the ASGI app, with billing replaced by
+`BillingSimulator`, and prints p50/p99 per stage. Needs the database from
+settings with migrations applied; the rows it creates are removed at exit.
+
+    python -m devtools.bench_payment_flow --accounts 200 --latency 0.02 --errors 0.05
+"""
+import argparse
+import asyncio
+import math
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete
+
+import app as application
+from auth.service_token import service_token_provider
+from core.config import settings
+from core.http_client import http_client
+from core.sinks import MemorySink
+from db.base import (
+    AccountDB,
+    SAAccountStatus,
+    SABillingEvent,
+    SAOutbox,
+    SASubscription,
+    SATariff,
+    async_session_maker,
+)
+from devtools.billing_simulator import BillingSimulator, Latency, SimulatorConfig
+from devtools.utils import create_token, quantiles
+from workers.outbox import outbox_relay
+
+
+async def setup(accounts: int) -> tuple[uuid.UUID, uuid.UUID, list[tuple]]:
+    subscription_id, tariff_id = uuid.uuid4(), uuid.uuid4()
+    rows = [(uuid.uuid4(), uuid.uuid4()) for _ in range(accounts)]
+    now = datetime.utcnow()
+
+    async with async_session_maker() as session:
+        session.add(SASubscription(id=subscription_id, name="bench", is_deleted=False))
+        await session.flush()
+        session.add(
+            SATariff(
+                id=tariff_id,
+                subscription_id=subscription_id,
+                created_at=now - timedelta(days=1),
+                amount=100,
+                currency="RUB",
+                duration=30 * 24 * 3600,
+            )
+        )
+        await session.flush()
+        session.add_all(
+            AccountDB(
+                id=account_id,
+                user_id=user_id,
+                subscription_id=subscription_id,
+                status="inactive",
+                expires_at=now,
+                created_at=now,
+                modified_at=now,
+            )
+            for account_id, user_id in rows
+        )
+        await session.commit()
+
+    return subscription_id, tariff_id, rows
+
+
+async def cleanup(subscription_id: uuid.UUID, account_ids: list[uuid.UUID]) -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            delete(SAAccountStatus).where(SAAccountStatus.account_id.in_(account_ids))
+        )
+        await session.execute(
+            delete(SABillingEvent).where(SABillingEvent.account_id.in_(account_ids))
+        )
+        await session.execute(
+            delete(SAOutbox).where(
+                SAOutbox.key.in_([str(account_id) for account_id in account_ids])
+            )
+        )
+        await session.execute(delete(AccountDB).where(AccountDB.id.in_(account_ids)))
+        await session.execute(
+            delete(SATariff).where(SATariff.subscription_id == subscription_id)
+        )
+        await session.execute(
+            delete(SASubscription).where(SASubscription.id == subscription_id)
+        )
+        await session.commit()
+
+
+async def run_account(
+    api: httpx.AsyncClient,
+    tariff_id: uuid.UUID,
+    account_id: uuid.UUID,
+    user_id: uuid.UUID,
+    timings: dict[str, list[float]],
+    poll_interval: float,
+    timeout: float,
+) -> None:
+    headers = {"Authorization": f"Bearer {create_token(user_id)}"}
+
+    started = time.perf_counter()
+    response = await api.post(
+        "/api/v1/accounts/invoice",
+        json={"account_id": str(account_id), "tariff_id": str(tariff_id)},
+        headers=headers,
+    )
+    timings["create_invoice"].append(time.perf_counter() - started)
+    if response.status_code != 200:
+        timings["create_invoice_errors"].append(1.0)
+        return
+
+    # Activation: from the invoice until the user sees an active account.
+    while time.perf_counter() - started < timeout:
+        response = await api.get("/api/v1/accounts/users/me", headers=headers)
+        if any(item["status"] == "active" for item in response.json()):
+            timings["activation"].append(time.perf_counter() - started)
+            return
+        await asyncio.sleep(poll_interval)
+    timings["activation_timeouts"].append(1.0)
+
+
+async def main(args: argparse.Namespace) -> None:
+    superuser = create_token(uuid.uuid4(), [settings.permissions_superuser])
+    await application.startup()
+
+    api = httpx.AsyncClient(
+        transport=httpx.ASGITransport(application.app), base_url="http://api"
+    )
+    simulator = BillingSimulator(
+        SimulatorConfig(
+            latency=(
+                Latency(distribution="lognormal", mu=math.log(args.latency))
+                if args.latency > 0
+                else Latency()
+            ),
+            error_rate=args.errors,
+            payment_delay=args.payment_delay,
+            webhook_token=superuser,
+        ),
+        webhook_client=api,
+    )
+    await http_client.stop()
+    http_client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(simulator.app), base_url="http://billing"
+    )
+    settings.url_create_invoice = "http://billing/api/v1/payments/invoice"
+    service_token_provider.login_url = "http://billing/api/v1/auth/login"
+    service_token_provider.refresh_url = "http://billing/api/v1/auth/refresh"
+    outbox_relay.sink = MemorySink()
+
+    subscription_id, tariff_id, rows = await setup(args.accounts)
+    timings: dict[str, list[float]] = {
+        "create_invoice": [],
+        "create_invoice_errors": [],
+        "activation": [],
+        "activation_timeouts": [],
+    }
+    try:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def run(account_id: uuid.UUID, user_id: uuid.UUID) -> None:
+            async with semaphore:
+                await run_account(
+                    api, tariff_id, account_id, user_id, timings, 0.005, args.timeout
+                )
+
+        await asyncio.gather(*(run(*row) for row in rows))
+        await simulator.wait_callbacks()
+    finally:
+        await cleanup(subscription_id, [account_id for account_id, _ in rows])
+        await application.shutdown()
+        await api.aclose()
+
+    print(f"create_invoice  {quantiles(timings['create_invoice'])}")
+    print(
+        f"webhook         {quantiles([taken for _, taken, _ in simulator.callbacks])}"
+    )
+    print(f"activation      {quantiles(timings['activation'])}")
+    print(
+        f"errors: invoice={len(timings['create_invoice_errors'])} "
+        f"activation_timeouts={len(timings['activation_timeouts'])} "
+        f"webhook_non_2xx="
+        f"{sum(1 for *_, code in simulator.callbacks if code >= 300)}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="median, s")
+    parser.add_argument("--errors", type=float, default=0.0, help="error rate")
+    parser.add_argument("--payment-delay", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    asyncio.run(main(parser.parse_args()))
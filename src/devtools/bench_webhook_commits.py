@@ -0,0 +1,108 @@
+"""
+Commits and throughput of the synchronous payment webhook.
+
+Sends `--requests` paid events, one per account, through the ASGI app with
+the billing event queue disabled, and prints requests/s and COMMITs per
+request. The run is repeated with the account manager's unit of work
+replaced by one that lets every repository write commit on its own, which
+is how account writes and their status history were stored before they
+shared a transaction. Needs the database from settings with migrations
+applied; the rows it creates are removed at exit.
+
+    python -m devtools.bench_webhook_commits --requests 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+import app as application
+import managers.account
+from core.config import settings
+from db.base import engine
+from db.unit_of_work import SAUnitOfWork
+from devtools.bench_payment_flow import cleanup, setup
+from devtools.utils import create_token
+
+
+class PerWriteCommits(SAUnitOfWork):
+    """A unit of work that groups nothing: each repository write commits."""
+
+    async def __aenter__(self) -> "PerWriteCommits":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        ...
+
+
+async def run(
+    api: httpx.AsyncClient, tariff_id: uuid.UUID, rows: list[tuple], concurrency: int
+) -> tuple[float, int]:
+    commits = 0
+
+    def count(connection) -> None:
+        nonlocal commits
+        commits += 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def pay(account_id: uuid.UUID) -> None:
+        async with semaphore:
+            response = await api.post(
+                "/api/v1/internal/hooks/billing/payment",
+                params={
+                    "account_id": str(account_id),
+                    "tariff_id": str(tariff_id),
+                    "payment_status": "paid",
+                    "event_id": str(uuid.uuid4()),
+                },
+            )
+            response.raise_for_status()
+
+    event.listen(engine.sync_engine, "commit", count)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(pay(account_id) for account_id, _ in rows))
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine.sync_engine, "commit", count)
+    return elapsed, commits
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.billing_event_queue_enabled = False
+    superuser = create_token(uuid.uuid4(), [settings.permissions_superuser])
+    api = httpx.AsyncClient(
+        transport=httpx.ASGITransport(application.app),
+        base_url="http://api",
+        headers={"Authorization": f"Bearer {superuser}"},
+    )
+
+    subscription_id, tariff_id, rows = await setup(args.requests * 2)
+    runs = {
+        "per-write commits": (PerWriteCommits, rows[: args.requests]),
+        "unit of work": (SAUnitOfWork, rows[args.requests :]),
+    }
+    try:
+        for name, (unit_of_work_class, run_rows) in runs.items():
+            managers.account.SAUnitOfWork = unit_of_work_class  # type: ignore
+            elapsed, commits = await run(api, tariff_id, run_rows, args.concurrency)
+            print(
+                f"{name:<18} {len(run_rows) / elapsed:,.0f} requests/s "
+                f"{commits / len(run_rows):.1f} commits/request "
+                f"{commits / elapsed:,.0f} commits/s"
+            )
+    finally:
+        managers.account.SAUnitOfWork = SAUnitOfWork  # type: ignore
+        await api.aclose()
+        await cleanup(subscription_id, [account_id for account_id, _ in rows])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
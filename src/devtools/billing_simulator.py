@@ -0,0 +1,144 @@
+"""
+In-process stand-in for the billing service.
+
+Serves the billing and auth endpoints this API calls, with configurable
+latency and error rates, and reports payments back through the payment
+webhook like the real billing does. Mount it on an httpx transport:
+
+    simulator = BillingSimulator(SimulatorConfig(error_rate=0.05))
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(simulator.app))
+"""
+import asyncio
+import random
+import time
+import typing as t
+import uuid
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, status
+from pydantic import BaseModel
+
+import models
+
+
+class Latency(BaseModel):
+    """Response delay in seconds: fixed, uniform(low, high) or lognormal."""
+
+    distribution: t.Literal["fixed", "uniform", "lognormal"] = "fixed"
+    value: float = 0.0
+    low: float = 0.0
+    high: float = 0.0
+    mu: float = -4.0
+    sigma: float = 0.5
+
+    def sample(self) -> float:
+        if self.distribution == "uniform":
+            return random.uniform(self.low, self.high)
+        if self.distribution == "lognormal":
+            return random.lognormvariate(self.mu, self.sigma)
+        return self.value
+
+
+class SimulatorConfig(BaseModel):
+    latency: Latency = Latency()
+    # Share of billing calls answered with 503.
+    error_rate: float = 0.0
+    # Pay every created invoice and call the webhook after this delay;
+    # None disables callbacks.
+    payment_delay: float | None = 0.0
+    webhook_url: str = "/api/v1/internal/hooks/billing/payment"
+    webhook_token: str = ""
+    access_token_ttl: float = 300.0
+
+
+class BillingSimulator:
+    def __init__(
+        self, config: SimulatorConfig, webhook_client: httpx.AsyncClient | None = None
+    ) -> None:
+        self.config = config
+        self.webhook_client = webhook_client
+        self.invoices: dict[uuid.UUID, models.InvoiceRead] = {}
+        # Webhook deliveries: (invoice id, seconds taken, response status).
+        self.callbacks: list[tuple[uuid.UUID, float, int]] = []
+        self._tasks: set[asyncio.Task] = set()
+        self.app = self._create_app()
+
+    async def wait_callbacks(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/api/v1/auth/login")
+        async def login() -> dict:
+            await self._respond()
+            return {"refresh_token": str(uuid.uuid4())}
+
+        @app.post("/api/v1/auth/refresh")
+        async def refresh() -> dict:
+            await self._respond()
+            return {
+                "access_token": str(uuid.uuid4()),
+                "expires_in": self.config.access_token_ttl,
+            }
+
+        @app.post("/api/v1/payments/invoice")
+        async def create_invoice(
+            request: Request, invoice_create: models.InvoiceCreate
+        ) -> models.InvoiceRead:
+            await self._respond()
+            now = datetime.utcnow()
+            invoice = models.InvoiceRead(
+                id=uuid.uuid4(),
+                created_at=now,
+                modified_at=now,
+                user_id=invoice_create.user_id,
+                service_id=invoice_create.service_id,
+                status=models.PaymentStatus.open.value,
+                amount=float(invoice_create.amount),
+                currency=invoice_create.currency.value,
+            )
+            self.invoices[invoice.id] = invoice
+
+            if self.config.payment_delay is not None and self.webhook_client:
+                task = asyncio.create_task(self._pay(invoice))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return invoice
+
+        return app
+
+    async def _respond(self) -> None:
+        await asyncio.sleep(self.config.latency.sample())
+        if random.random() < self.config.error_rate:
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    async def _pay(self, invoice: models.InvoiceRead) -> None:
+        assert self.webhook_client is not None
+        await asyncio.sleep(self.config.payment_delay or 0.0)
+        self.invoices[invoice.id] = invoice.model_copy(
+            update={
+                "status": models.PaymentStatus.paid.value,
+                "modified_at": datetime.utcnow(),
+            }
+        )
+
+        started = time.perf_counter()
+        response = await self.webhook_client.post(
+            self.config.webhook_url,
+            params={
+                # InvoiceCreate carries the account as user_id and the tariff
+                # as service_id.
+                "account_id": str(invoice.user_id),
+                "tariff_id": str(invoice.service_id),
+                "payment_status": models.PaymentStatus.paid.value,
+                "event_id": str(invoice.id),
+                "invoice_id": str(invoice.id),
+            },
+            headers={"Authorization": f"Bearer {self.config.webhook_token}"},
+        )
+        self.callbacks.append(
+            (invoice.id, time.perf_counter() - started, response.status_code)
+        )
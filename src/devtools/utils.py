@@ -0,0 +1,42 @@
+"""Helpers shared by the benchmarks in devtools."""
+import statistics
+import time
+import typing as t
+import uuid
+
+import jwt
+
+from core.config import settings
+from core.utils import JWT_ALGORITHM
+
+
+def create_token(
+    user_id: uuid.UUID, rights: list[str] | None = None, ttl: int = 3600
+) -> str:
+    claims = {
+        "sub": str(user_id),
+        "rights": rights or [],
+        "aud": settings.access_token_audience,
+        "exp": int(time.time()) + ttl,
+    }
+    return jwt.encode(
+        claims, settings.access_token_secret.get_secret_value(), algorithm=JWT_ALGORITHM
+    )
+
+
+def quantiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return f"p50={cuts[49] * 1000:.1f}ms p99={cuts[98] * 1000:.1f}ms n={len(values)}"
+
+
+async def timed(
+    call: t.Callable[[], t.Awaitable[t.Any]], repeat: int
+) -> tuple[float, t.Any]:
+    """Await `call` `repeat` times; return the mean seconds per call and a result."""
+    result = None
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = await call()
+    return (time.perf_counter() - started) / repeat, result
@@ -1,29 +1,76 @@
+import logging
 import typing as t
 import uuid
 from datetime import datetime, timedelta
 
 from fastapi import Depends, Request
+from pydantic import BaseModel
 
 import core.exceptions as exc
+from core.cache import TTLCache
+from core.config import settings
+from core.dataloader import DataLoader
+from core.http_cache import make_etag
+from core.metrics import metrics
 from core.pagination import PaginateQueryParams
 from db.account import SAAccountDB, get_account_db
 from db.account_status import SAAccountStatusDB, get_account_status_db
-from models import Account, AccountStatus, SubscriptionStatus, Tariff
+from db.base import AccountDB, async_session_maker
+from db.billing_event import SABillingEventDB, get_billing_event_db
+from db.invoice import SAInvoiceDB, SAInvoiceSyncDB, get_invoice_db, get_invoice_sync_db
+from db.outbox import ACCOUNT_STATUS_CHANGED_TOPIC, SAOutboxDB, get_outbox_db
+from db.unit_of_work import SAUnitOfWork
+from models import (
+    Account,
+    AccountStatus,
+    Page,
+    PaymentEvent,
+    PaymentEventOutcome,
+    PaymentStatus,
+    SubscriptionStatus,
+    Tariff,
+)
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_ACCOUNT_STATUSES = {
+    PaymentStatus.paid: SubscriptionStatus.active,
+    PaymentStatus.refunded: SubscriptionStatus.inactive,
+}
+# Outcomes of events whose idempotency key and invoice status are kept.
+ACCEPTED_PAYMENT_OUTCOMES = (PaymentEventOutcome.applied, PaymentEventOutcome.ignored)
 
 
 class AccountManager:
     def __init__(
-        self, account_db: SAAccountDB, account_status_db: SAAccountStatusDB
+        self,
+        account_db: SAAccountDB,
+        account_status_db: SAAccountStatusDB,
+        unit_of_work: SAUnitOfWork | None = None,
+        loader: DataLoader[uuid.UUID, Account] | None = None,
+        billing_event_db: SABillingEventDB | None = None,
+        seen_billing_events: TTLCache[str, bool] | None = None,
+        outbox_db: SAOutboxDB | None = None,
+        invoice_db: SAInvoiceDB | None = None,
+        invoice_sync_db: SAInvoiceSyncDB | None = None,
     ) -> None:
         self.account_db = account_db
         self.account_status_db = account_status_db
+        self.unit_of_work = unit_of_work or SAUnitOfWork(account_db.session)
+        self.loader = loader
+        self.billing_event_db = billing_event_db
+        self.seen_billing_events = seen_billing_events
+        self.outbox_db = outbox_db
+        self.invoice_db = invoice_db
+        self.invoice_sync_db = invoice_sync_db
 
     async def create(
         self, obj_create: dict[str, t.Any], request: Request | None = None
     ) -> Account:
-        object_ = await self.account_db.create(obj_create)
+        async with self.unit_of_work:
+            object_ = await self.account_db.create(obj_create)
 
-        await self.on_after_create(object_, request)
+            await self.on_after_create(object_, request)
         return object_
 
     async def get(self, obj_id: uuid.UUID) -> Account | None:
@@ -31,23 +78,41 @@ class AccountManager:
 
         return object
 
+    async def load(self, obj_id: uuid.UUID) -> Account | None:
+        """
+        Get an account for a read-only response.
+
+        Concurrent loads are coalesced into one query by the loader; use `get`
+        for objects that are going to be modified in this session.
+        """
+        if self.loader is None:
+            return await self.get(obj_id)
+        return await self.loader.load(obj_id)
+
+    async def get_many(self, ids: t.Iterable[uuid.UUID]) -> list[Account]:
+        objects = await self.account_db.get_by_ids(ids)
+
+        return objects
+
     async def update(
         self,
         obj_update: dict[str, t.Any],
         object_: Account,
         request: Request | None = None,
     ) -> Account:
-        _object = await self.account_db.update(object_, obj_update)
+        async with self.unit_of_work:
+            _object = await self.account_db.update(object_, obj_update)
 
-        await self.on_after_update(_object, request)
+            await self.on_after_update(_object, request)
         return _object
 
     async def delete(self, object_: Account, request: Request | None = None) -> Account:
-        await self.on_before_delete(object_, request)
+        async with self.unit_of_work:
+            await self.on_before_delete(object_, request)
 
-        await self.account_db.delete(object_.id)
+            await self.account_db.delete(object_.id)
 
-        await self.on_after_delete(object_, request)
+            await self.on_after_delete(object_, request)
 
         return object_
 
@@ -56,24 +121,345 @@ class AccountManager:
 
         return objects
 
+    async def get_version_by_user_id(
+        self, user_id: uuid.UUID
+    ) -> tuple[str, datetime | None]:
+        """Get the ETag and Last-Modified of the user accounts without loading them."""
+        count, modified_at = await self.account_db.get_version_by_user_id(user_id)
+        return make_etag(user_id, count, modified_at), modified_at
+
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[Account]:
+    ) -> Page[Account]:
         roles = await self.account_db.search(pagination_params, filter_param)
 
         return roles
 
+    async def search_rows(
+        self,
+        pagination_params: PaginateQueryParams,
+        model: type[BaseModel],
+        filter_param: str | None = None,
+    ) -> Page[dict[str, t.Any]]:
+        return await self.account_db.search_rows(pagination_params, model, filter_param)
+
+    async def get_rows_by_user_id(
+        self, user_id: uuid.UUID, model: type[BaseModel]
+    ) -> list[dict[str, t.Any]]:
+        return await self.account_db.get_rows_by_user_id(user_id, model)
+
+    async def apply_payment(
+        self,
+        account_id: uuid.UUID,
+        tariff: Tariff,
+        payment_status: PaymentStatus,
+        event_id: str | None = None,
+        invoice_id: uuid.UUID | None = None,
+        request: Request | None = None,
+    ) -> Account | None:
+        """
+        Apply a billing payment event to an account.
+
+        The account is read and locked with SELECT ... FOR UPDATE on the
+        primary, so the new expiry is computed from its latest state and
+        concurrent payments of one account are applied one after another.
+        Raises ObjectNotExists if there is no such account.
+
+        With an `event_id` the event is applied at most once: the key is
+        recorded in the same transaction as the account update, and keys seen
+        recently by this worker are rejected without a query. Returns None for
+        a duplicate. The status of `invoice_id` is recorded in the invoice
+        mirror and the invoice is queued to be fetched from billing.
+        """
+        if event_id is not None and self.is_seen_billing_event(event_id):
+            return None
+
+        async with self.unit_of_work:
+            objects = await self.account_db.get_by_ids([account_id], for_update=True)
+            if not objects:
+                raise exc.ObjectNotExists
+            object_ = objects[0]
+
+            if not await self._record_billing_event(
+                event_id, object_.id, payment_status
+            ):
+                return None
+
+            if invoice_id is not None:
+                await self._record_invoices(
+                    [self._invoice_dict(invoice_id, object_.id, tariff, payment_status)]
+                )
+
+            status = PAYMENT_ACCOUNT_STATUSES.get(payment_status)
+            if status is not None:
+                expires_at = await self.calculate_expires_at(object_, tariff, status)
+                update_dict = {'status': status.value, 'expires_at': expires_at}
+                if invoice_id is not None:
+                    update_dict['invoice_id'] = invoice_id
+                object_ = await self.update(update_dict, object_, request)
+
+        if event_id is not None:
+            self._mark_seen_billing_event(event_id)
+        return object_
+
+    async def _record_billing_event(
+        self, event_id: str | None, account_id: uuid.UUID, payment_status: PaymentStatus
+    ) -> bool:
+        """Record the key of an event; False if it was recorded before."""
+        if event_id is None or self.billing_event_db is None:
+            return True
+
+        created = await self.billing_event_db.create(
+            event_id, account_id, payment_status.value
+        )
+        if not created:
+            self._mark_seen_billing_event(event_id)
+        return created
+
+    async def apply_payments(
+        self, events: t.Sequence[PaymentEvent], tariffs: t.Mapping[uuid.UUID, Tariff]
+    ) -> list[PaymentEventOutcome]:
+        """
+        Apply a batch of payment events in one transaction.
+
+        The affected accounts are locked and loaded with one query, the events
+        of each account are folded in order, and the changed accounts are
+        written with one set-based UPDATE and one bulk history INSERT. Only the
+        keys of applied and ignored events stay recorded, so an event rejected
+        for a missing account or tariff is applied when billing delivers it
+        again. As in `apply_payment`, keys seen recently by this worker are
+        duplicates, with or without `billing_event_db`. Returns the outcome of
+        every event, in order.
+        """
+        seen_event_ids = {
+            event.event_id
+            for event in events
+            if event.event_id is not None and self.is_seen_billing_event(event.event_id)
+        }
+        async with self.unit_of_work:
+            accounts = {
+                object_.id: object_
+                for object_ in await self.account_db.get_by_ids(
+                    {event.account_id for event in events}, for_update=True
+                )
+            }
+            new_event_ids: set[str] = set()
+            if self.billing_event_db is not None:
+                new_event_ids = await self.billing_event_db.create_many(
+                    event for event in events if event.event_id not in seen_event_ids
+                )
+
+            outcomes, changed = await self._fold_payments(
+                events, accounts, tariffs, new_event_ids, seen_event_ids
+            )
+            accepted_event_ids = await self._settle_payment_events(
+                events, outcomes, tariffs, new_event_ids
+            )
+
+            objects = await self.account_db.update_many(
+                [
+                    {
+                        "id": object_.id,
+                        "status": object_.status.value,
+                        "expires_at": object_.expires_at,
+                        "invoice_id": object_.invoice_id,
+                    }
+                    for object_ in changed.values()
+                ]
+            )
+            if objects:
+                await self.account_status_db.create_many(
+                    [self._status_dict(object_) for object_ in objects]
+                )
+                await self.on_after_apply_payments(objects)
+
+        for event_id in accepted_event_ids:
+            self._mark_seen_billing_event(event_id)
+        return outcomes
+
+    async def _fold_payments(
+        self,
+        events: t.Sequence[PaymentEvent],
+        accounts: t.Mapping[uuid.UUID, Account],
+        tariffs: t.Mapping[uuid.UUID, Tariff],
+        new_event_ids: set[str],
+        seen_event_ids: set[str],
+    ) -> tuple[list[PaymentEventOutcome], dict[uuid.UUID, Account]]:
+        outcomes: list[PaymentEventOutcome] = []
+        changed: dict[uuid.UUID, Account] = {}
+        # Seen keys count as accepted, so their events are duplicates.
+        accepted_event_ids = set(seen_event_ids)
+        for event in events:
+            outcome = await self._fold_payment(
+                event, changed, accounts, tariffs, new_event_ids, accepted_event_ids
+            )
+            outcomes.append(outcome)
+            if event.event_id is not None and outcome in ACCEPTED_PAYMENT_OUTCOMES:
+                accepted_event_ids.add(event.event_id)
+        return outcomes, changed
+
+    async def _settle_payment_events(
+        self,
+        events: t.Sequence[PaymentEvent],
+        outcomes: t.Sequence[PaymentEventOutcome],
+        tariffs: t.Mapping[uuid.UUID, Tariff],
+        new_event_ids: set[str],
+    ) -> set[str]:
+        """
+        Drop the keys recorded for rejected events and record the invoice
+        statuses of accepted ones. Returns the keys of accepted events.
+        """
+        accepted = [
+            event
+            for event, outcome in zip(events, outcomes)
+            if outcome in ACCEPTED_PAYMENT_OUTCOMES
+        ]
+        accepted_event_ids = {
+            event.event_id for event in accepted if event.event_id is not None
+        }
+        rejected_event_ids = new_event_ids - accepted_event_ids
+        if rejected_event_ids and self.billing_event_db is not None:
+            await self.billing_event_db.delete_many(rejected_event_ids)
+
+        invoices = [
+            self._invoice_dict(
+                event.invoice_id,
+                event.account_id,
+                tariffs[event.tariff_id],
+                event.payment_status,
+            )
+            for event in accepted
+            if event.invoice_id is not None
+        ]
+        if invoices:
+            await self._record_invoices(invoices)
+        return accepted_event_ids
+
+    async def _fold_payment(
+        self,
+        event: PaymentEvent,
+        changed: dict[uuid.UUID, Account],
+        accounts: t.Mapping[uuid.UUID, Account],
+        tariffs: t.Mapping[uuid.UUID, Tariff],
+        new_event_ids: set[str],
+        accepted_event_ids: set[str],
+    ) -> PaymentEventOutcome:
+        if event.event_id is not None and (
+            event.event_id in accepted_event_ids
+            or (
+                self.billing_event_db is not None
+                and event.event_id not in new_event_ids
+            )
+        ):
+            return PaymentEventOutcome.duplicate
+
+        account = changed.get(event.account_id) or accounts.get(event.account_id)
+        if account is None:
+            logger.warning("Skipping payment event %s: %s", event.id, event)
+            return PaymentEventOutcome.account_not_exists
+
+        tariff = tariffs.get(event.tariff_id)
+        if tariff is None:
+            logger.warning("Skipping payment event %s: %s", event.id, event)
+            return PaymentEventOutcome.tariff_not_exists
+
+        status = PAYMENT_ACCOUNT_STATUSES.get(event.payment_status)
+        if status is None:
+            return PaymentEventOutcome.ignored
+
+        expires_at = await self.calculate_expires_at(account, tariff, status)
+        changed[account.id] = account.model_copy(
+            update={
+                "status": status,
+                "expires_at": expires_at,
+                "invoice_id": event.invoice_id or account.invoice_id,
+            }
+        )
+        return PaymentEventOutcome.applied
+
+    async def _record_invoices(self, invoices: list[dict[str, t.Any]]) -> None:
+        if self.invoice_db is not None:
+            await self.invoice_db.set_statuses(invoices)
+        if self.invoice_sync_db is not None:
+            await self.invoice_sync_db.request(invoice["id"] for invoice in invoices)
+
+    @staticmethod
+    def _invoice_dict(
+        invoice_id: uuid.UUID,
+        account_id: uuid.UUID,
+        tariff: Tariff,
+        payment_status: PaymentStatus,
+    ) -> dict[str, t.Any]:
+        return {
+            "id": invoice_id,
+            "user_id": account_id,
+            "service_id": tariff.id,
+            "status": payment_status.value,
+            "amount": tariff.amount,
+            "currency": tariff.currency.value,
+        }
+
+    def is_seen_billing_event(self, event_id: str) -> bool:
+        """Check the keys of billing events recently applied by this worker."""
+        if self.seen_billing_events is None:
+            return False
+        return self.seen_billing_events.get(event_id, False)
+
+    def _mark_seen_billing_event(self, event_id: str) -> None:
+        if self.seen_billing_events is not None:
+            self.seen_billing_events.set(event_id, True)
+
+    async def expire(self, now: datetime, limit: int) -> list[Account]:
+        """Deactivate a batch of lapsed accounts and record their history in bulk."""
+        async with self.unit_of_work:
+            objects = await self.account_db.expire(now, limit)
+            if objects:
+                await self.account_status_db.create_many(
+                    [self._status_dict(object_) for object_ in objects]
+                )
+                await self.on_after_expire(objects)
+        return objects
+
+    async def get_oldest_lapsed(self, now: datetime) -> datetime | None:
+        return await self.account_db.get_oldest_lapsed(now)
+
+    def export(
+        self,
+        status: SubscriptionStatus | None = None,
+        subscription_id: uuid.UUID | None = None,
+        updated_since: datetime | None = None,
+    ) -> t.AsyncIterator[t.Sequence[t.Mapping[str, t.Any]]]:
+        return self.account_db.stream(status, subscription_id, updated_since)
+
+    def export_statuses(
+        self,
+        status: SubscriptionStatus | None = None,
+        account_id: uuid.UUID | None = None,
+        created_since: datetime | None = None,
+    ) -> t.AsyncIterator[t.Sequence[t.Mapping[str, t.Any]]]:
+        return self.account_status_db.stream(status, account_id, created_since)
+
     async def on_after_create(
         self, object_: Account, request: Request | None = None
     ) -> None:
-        create_dict = {"account_id": object_.id, "status": object_.status.value}
-        await self.account_status_db.create(create_dict)
+        await self.account_status_db.create(self._status_dict(object_))
+        await self._publish_status_changed([object_])
+        await self.account_db.notify_changed([object_])
 
     async def on_after_update(
         self, object_: Account, request: Request | None = None
     ) -> None:
-        create_dict = {"account_id": object_.id, "status": object_.status.value}
-        await self.account_status_db.create(create_dict)
+        await self.account_status_db.create(self._status_dict(object_))
+        await self._publish_status_changed([object_])
+        await self.account_db.notify_changed([object_])
+
+    async def on_after_apply_payments(self, objects: list[Account]) -> None:
+        await self._publish_status_changed(objects)
+        await self.account_db.notify_changed(objects)
+
+    async def on_after_expire(self, objects: list[Account]) -> None:
+        await self._publish_status_changed(objects)
+        await self.account_db.notify_changed(objects)
 
     async def on_before_delete(
         self, object_: Account, request: Request | None = None
@@ -83,7 +469,39 @@ class AccountManager:
     async def on_after_delete(
         self, object_: Account, request: Request | None = None
     ) -> None:
-        ...
+        await self.account_db.notify_changed([object_])
+
+    async def _publish_status_changed(self, objects: list[Account]) -> None:
+        """Write status change events to the outbox in the current transaction."""
+        if self.outbox_db is None:
+            return
+
+        await self.outbox_db.create_many(
+            ACCOUNT_STATUS_CHANGED_TOPIC,
+            (
+                (
+                    str(object_.id),
+                    object_.model_dump(
+                        mode="json",
+                        include={
+                            "id",
+                            "user_id",
+                            "subscription_id",
+                            "status",
+                            "expires_at",
+                        },
+                    ),
+                )
+                for object_ in objects
+            ),
+        )
+
+    def _status_dict(self, object_: Account) -> dict[str, t.Any]:
+        return {
+            "account_id": object_.id,
+            "status": object_.status.value,
+            "expires_at": object_.expires_at,
+        }
 
     async def calculate_expires_at(
         self, object_: Account, tariff: Tariff, status: SubscriptionStatus
@@ -98,8 +516,40 @@ class AccountManager:
         return expires_at
 
 
+async def _load_accounts(ids: list[uuid.UUID]) -> dict[uuid.UUID, Account]:
+    async with async_session_maker() as session:
+        objects = await SAAccountDB(session, AccountDB).get_by_ids(ids)
+    return {object_.id: object_ for object_ in objects}
+
+
+account_loader: DataLoader[uuid.UUID, Account] = DataLoader(
+    _load_accounts, settings.account_loader_max_batch_size
+)
+metrics.register("account_loader", account_loader.stats)
+
+
+seen_billing_events: TTLCache[str, bool] = TTLCache(
+    maxsize=settings.billing_event_cache_size, ttl=settings.billing_event_cache_ttl
+)
+metrics.register("billing_events", seen_billing_events.stats)
+
+
 async def get_account_manager(
     account_db: SAAccountDB = Depends(get_account_db),
     account_status_db: SAAccountStatusDB = Depends(get_account_status_db),
+    billing_event_db: SABillingEventDB = Depends(get_billing_event_db),
+    outbox_db: SAOutboxDB = Depends(get_outbox_db),
+    invoice_db: SAInvoiceDB = Depends(get_invoice_db),
+    invoice_sync_db: SAInvoiceSyncDB = Depends(get_invoice_sync_db),
 ):
-    yield AccountManager(account_db=account_db, account_status_db=account_status_db)
+    yield AccountManager(
+        account_db=account_db,
+        account_status_db=account_status_db,
+        unit_of_work=SAUnitOfWork(account_db.session),
+        loader=account_loader,
+        billing_event_db=billing_event_db,
+        seen_billing_events=seen_billing_events,
+        outbox_db=outbox_db if settings.outbox_enabled else None,
+        invoice_db=invoice_db,
+        invoice_sync_db=invoice_sync_db if settings.invoice_sync_enabled else None,
+    )
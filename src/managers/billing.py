@@ -2,32 +2,81 @@ import typing as t
 import uuid
 from uuid import UUID
 
-import backoff
 import httpx
+from fastapi import Depends
 
 import models
+from auth.service_token import ServiceTokenProvider, get_service_token_provider
 from core.config import settings
+from core.http_client import get_http_client
+from core.metrics import metrics
+from core.resilience import ResilientCaller, RetryBudget
+from db.invoice import SAInvoiceDB, get_invoice_db
 
 
 class BillingManager:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        token_provider: ServiceTokenProvider,
+        caller: ResilientCaller,
+        invoice_db: SAInvoiceDB,
+    ):
+        self.client = client
+        self.token_provider = token_provider
+        self.caller = caller
+        self.invoice_db = invoice_db
 
-    async def get_ivoice(self, id_: UUID) -> models.InvoiceRead:
-        raise NotImplemented
+    async def get_ivoice(self, id_: UUID) -> models.InvoiceRead | None:
+        """Get an invoice from the local mirror."""
+        return await self.invoice_db.get_by_id(id_)
 
-    async def get_ivoice_by_account(self, id_: UUID) -> t.Iterable[models.Invoice]:
-        raise NotImplemented
+    async def get_ivoice_by_account(self, id_: UUID) -> t.Iterable[models.InvoiceRead]:
+        """Get the invoices of an account from the local mirror, newest first."""
+        return await self.invoice_db.get_by_account(id_)
 
     async def create_invoice(self, invoice: models.InvoiceCreate) -> models.InvoiceRead:
         body = invoice.model_dump_json()
         invoice = await self._create_invoice(body, settings.url_create_invoice)
-        return models.InvoiceRead.model_validate_json(invoice)
+        object_ = models.InvoiceRead.model_validate_json(invoice)
+        await self.invoice_db.create(object_)
+        return object_
+
+    async def fetch_invoice(self, id_: UUID) -> models.InvoiceRead:
+        """Get an invoice from billing, bypassing the mirror."""
+        response = await self._send(
+            'GET', settings.url_get_invoice.format(invoice_id=id_), None
+        )
+        return models.InvoiceRead.model_validate_json(response.content)
+
+    async def reconcile_invoice(self, id_: UUID) -> models.InvoiceRead:
+        """Fetch an invoice from billing into the mirror."""
+        object_ = await self.fetch_invoice(id_)
+        await self.invoice_db.upsert(object_)
+        return object_
 
     async def create_refund(self, invoice_id) -> models.InvoiceRead:
         ...
 
-    @backoff.on_exception(backoff.expo, httpx.RequestError, max_tries=5)
+    async def _create_invoice(self, body: str, url: str) -> bytes:
+        """
+        Post a new invoice to billing.
+
+        Args:
+            body (str): The JSON body of the invoice.
+            url (str): The url of the request.
+
+        Returns:
+            bytes: The JSON of the created invoice.
+
+        Raises:
+            HTTPError: If billing responds with an error status code.
+            CircuitOpen: If billing is failing and calls are suspended.
+            DeadlineExceeded: If no time is left to answer the request.
+        """
+        response = await self._send('POST', url, body)
+        return response.content
+
     async def _get_request_with_body(
         self, url: str, body: t.Mapping[str, t.Any]
     ) -> t.Iterable[t.Mapping[str, t.Any]]:
@@ -43,17 +92,57 @@ class BillingManager:
 
         Raises:
             HTTPError: If the request fails with a non-200 status code.
+            CircuitOpen: If billing is failing and calls are suspended.
+            DeadlineExceeded: If no time is left to answer the request.
         """
-        access_token = await self._get_access_token()
-        headers = {
-            'Content-Type': "application/json",
-            'X-Request-Id': str(uuid.uuid4()),
-            'Authorization': f'Bearer {access_token}',
-        }
-
-        request = httpx.Request('GET', url, data=body, headers=headers)
-        response = await self.client.send(request=request)
-        if response.status_code != 200:
+        response = await self._send('GET', url, body)
+        return response.json()
+
+    async def _send(self, method: str, url: str, body: t.Any) -> httpx.Response:
+        # One request id for all attempts, so billing can drop repeated ones.
+        request_id = str(uuid.uuid4())
+
+        async def attempt(timeout: float) -> httpx.Response:
+            access_token = await self.token_provider.get_token()
+            headers = {
+                'Content-Type': "application/json",
+                'X-Request-Id': request_id,
+                'Authorization': f'Bearer {access_token}',
+            }
+            request = self.client.build_request(
+                method, url, content=body, headers=headers, timeout=timeout
+            )
+            response = await self.client.send(request)
+            if response.status_code == httpx.codes.UNAUTHORIZED:
+                self.token_provider.invalidate()
             response.raise_for_status()
+            return response
 
-        return response.json()
+        return await self.caller.call(httpx.URL(url).host, attempt)
+
+
+billing_caller = ResilientCaller(
+    budget=RetryBudget(
+        settings.billing_retry_budget_ratio, settings.billing_retry_budget_min_retries
+    ),
+    failure_threshold=settings.billing_circuit_failure_threshold,
+    reset_timeout=settings.billing_circuit_reset_timeout,
+    timeout=settings.billing_timeout,
+    max_attempts=settings.billing_retry_max_attempts,
+    base_delay=settings.billing_retry_base_delay,
+    max_delay=settings.billing_retry_max_delay,
+)
+metrics.register("billing_calls", billing_caller.stats)
+
+
+async def get_billing_manager(
+    client: httpx.AsyncClient = Depends(get_http_client),
+    token_provider: ServiceTokenProvider = Depends(get_service_token_provider),
+    invoice_db: SAInvoiceDB = Depends(get_invoice_db),
+):
+    yield BillingManager(
+        client=client,
+        token_provider=token_provider,
+        caller=billing_caller,
+        invoice_db=invoice_db,
+    )
@@ -0,0 +1,139 @@
+import asyncio
+import bisect
+import typing as t
+import uuid
+from datetime import datetime
+
+from core.config import settings
+from core.http_cache import make_etag
+from core.metrics import metrics
+from db.base import SASubscription, SATariff, async_session_maker
+from db.notifications import CATALOG_CHANGED_CHANNEL, PGListener, listener
+from db.routing import USE_PRIMARY
+from db.subscription import SASubscriptionDB
+from db.tariff import SATariffDB
+from models import Subscription, Tariff
+
+
+class TariffTimeline:
+    """
+    Tariff versions of one subscription sorted by start date.
+
+    The tariff effective at a date is the latest version started by then,
+    unless it has already expired; lookups are a bisect over start dates.
+    """
+
+    def __init__(self, tariffs: t.Iterable[Tariff]) -> None:
+        self.tariffs = sorted(tariffs, key=lambda tariff: tariff.created_at)
+        self.starts = [tariff.created_at for tariff in self.tariffs]
+
+    def resolve(self, date: datetime) -> Tariff | None:
+        index = bisect.bisect_right(self.starts, date) - 1
+        if index < 0:
+            return None
+
+        tariff = self.tariffs[index]
+        if tariff.expires_at is not None and tariff.expires_at <= date:
+            return None
+        return tariff
+
+
+class Catalog:
+    """
+    Versioned in-memory copy of the subscription and tariff tables.
+
+    Writers bump `version` through the managers' hooks, locally and on every
+    other worker via `catalog_changed` notifications; the next read reloads
+    both tables when the loaded version is behind. Reads fall back to the
+    database while the listener is disconnected.
+    """
+
+    def __init__(self, listener: PGListener) -> None:
+        self.listener = listener
+        self.version = 0
+        self.loaded_version = -1
+        self.subscriptions: dict[uuid.UUID, Subscription] = {}
+        self.tariffs: dict[uuid.UUID, Tariff] = {}
+        self.timelines: dict[uuid.UUID, TariffTimeline] = {}
+        self.etags: dict[uuid.UUID, str] = {}
+        self.reloads = 0
+        self._lock = asyncio.Lock()
+
+        listener.listen(CATALOG_CHANGED_CHANNEL, lambda _: self.invalidate())
+        listener.on_reconnect(self.invalidate)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.catalog_enabled and self.listener.connected
+
+    def invalidate(self) -> None:
+        self.version += 1
+
+    async def refresh(self) -> None:
+        if self.loaded_version == self.version:
+            return
+
+        async with self._lock:
+            version = self.version
+            if self.loaded_version == version:
+                return
+
+            # Load from the primary: a lagging replica could return a catalog
+            # older than the change that triggered the reload.
+            async with async_session_maker(info={USE_PRIMARY: True}) as session:
+                subscriptions = await SASubscriptionDB(
+                    session, SASubscription  # type: ignore
+                ).get_all()
+                tariffs = await SATariffDB(session, SATariff).get_all()  # type: ignore
+
+            tariffs_by_subscription: dict[uuid.UUID, list[Tariff]] = {}
+            for tariff in tariffs:
+                tariffs_by_subscription.setdefault(tariff.subscription_id, []).append(
+                    tariff
+                )
+
+            self.subscriptions = {object_.id: object_ for object_ in subscriptions}
+            self.tariffs = {object_.id: object_ for object_ in tariffs}
+            self.timelines = {
+                sub_id: TariffTimeline(objects)
+                for sub_id, objects in tariffs_by_subscription.items()
+            }
+            self.etags = {
+                object_.id: make_etag(object_.model_dump_json())
+                for object_ in [*subscriptions, *tariffs]
+            }
+            self.loaded_version = version
+            self.reloads += 1
+
+    async def get_subscription(self, id_: uuid.UUID) -> Subscription | None:
+        await self.refresh()
+        return self.subscriptions.get(id_)
+
+    async def get_tariff(self, id_: uuid.UUID) -> Tariff | None:
+        await self.refresh()
+        return self.tariffs.get(id_)
+
+    async def get_tariff_by_subscription(
+        self, sub_id: uuid.UUID, date: datetime
+    ) -> Tariff | None:
+        await self.refresh()
+        timeline = self.timelines.get(sub_id)
+        return timeline.resolve(date) if timeline else None
+
+    def get_etag(self, id_: uuid.UUID) -> str | None:
+        """Get the ETag of a loaded subscription or tariff, computed on reload."""
+        return self.etags.get(id_)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "loaded_version": self.loaded_version,
+            "reloads": self.reloads,
+            "subscriptions": len(self.subscriptions),
+            "tariffs": len(self.tariffs),
+        }
+
+
+catalog = Catalog(listener)
+metrics.register("catalog", catalog.stats)
@@ -0,0 +1,99 @@
+import typing as t
+import uuid
+from datetime import datetime
+
+from fastapi import Depends
+
+from core.cache import TTLCache
+from core.config import settings
+from core.metrics import metrics
+from db.account import SAAccountDB, get_account_db
+from db.notifications import ACCOUNT_CHANGED_CHANNEL, PGListener, listener
+from models import Entitlement
+
+EntitlementKey = tuple[uuid.UUID, uuid.UUID]
+
+MISSING = object()
+
+
+class EntitlementCache:
+    """
+    Per-worker cache of "active until" times keyed by (user_id, subscription_id).
+
+    Entries are dropped on `account_changed` notifications. The cache is only
+    used while the listener is connected; a reconnect clears it since
+    notifications may have been missed in between.
+    """
+
+    def __init__(self, listener: PGListener, maxsize: int, ttl: float) -> None:
+        self.listener = listener
+        self.entries: TTLCache[EntitlementKey, datetime | None] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        # Bumped on every invalidation so a read racing with a change is not cached.
+        self.generation = 0
+
+        listener.listen(ACCOUNT_CHANGED_CHANNEL, self.invalidate)
+        listener.on_reconnect(self.clear)
+
+    @property
+    def enabled(self) -> bool:
+        return self.listener.connected
+
+    def get(self, key: EntitlementKey) -> t.Any:
+        """Get the cached "active until" of a key, or MISSING."""
+        if not self.enabled:
+            return MISSING
+        return self.entries.get(key, MISSING)
+
+    def set(self, key: EntitlementKey, value: datetime | None, generation: int) -> None:
+        if self.enabled and generation == self.generation:
+            self.entries.set(key, value)
+
+    def invalidate(self, payload: str) -> None:
+        self.generation += 1
+        user_id, _, subscription_id = payload.partition(":")
+        try:
+            self.entries.pop((uuid.UUID(user_id), uuid.UUID(subscription_id)))
+        except ValueError:
+            self.entries.clear()
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self.entries.stats()}
+
+
+entitlement_cache = EntitlementCache(
+    listener, settings.entitlement_cache_size, settings.entitlement_cache_ttl
+)
+metrics.register("entitlement_cache", entitlement_cache.stats)
+
+
+class EntitlementManager:
+    def __init__(self, account_db: SAAccountDB, cache: EntitlementCache) -> None:
+        self.account_db = account_db
+        self.cache = cache
+
+    async def check(
+        self, user_id: uuid.UUID, subscription_id: uuid.UUID
+    ) -> Entitlement:
+        key = (user_id, subscription_id)
+        active_until = self.cache.get(key)
+        if active_until is MISSING:
+            generation = self.cache.generation
+            active_until = await self.account_db.get_active_until(*key)
+            self.cache.set(key, active_until, generation)
+
+        return Entitlement(
+            user_id=user_id,
+            subscription_id=subscription_id,
+            active=active_until is not None and active_until > datetime.utcnow(),
+            expires_at=active_until,
+        )
+
+
+async def get_entitlement_manager(account_db: SAAccountDB = Depends(get_account_db)):
+    yield EntitlementManager(account_db=account_db, cache=entitlement_cache)
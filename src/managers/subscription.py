@@ -4,24 +4,38 @@ import uuid
 from fastapi import Depends, Request
 
 import core.exceptions as exc
+from core.http_cache import make_etag
 from core.pagination import PaginateQueryParams
 from db.subscription import SASubscriptionDB, get_subscription_db
-from models import Subscription
+from db.unit_of_work import SAUnitOfWork
+from managers.catalog import Catalog, catalog
+from models import Page, Subscription
 
 
 class SubcriptionManager:
-    def __init__(self, db: SASubscriptionDB) -> None:
+    def __init__(
+        self,
+        db: SASubscriptionDB,
+        catalog: Catalog | None = None,
+        unit_of_work: SAUnitOfWork | None = None,
+    ) -> None:
         self.db = db
+        self.catalog = catalog
+        self.unit_of_work = unit_of_work or SAUnitOfWork(db.session)
 
     async def create(
         self, obj_create: dict[str, t.Any], request: Request | None = None
     ) -> Subscription:
-        object_ = await self.db.create(obj_create)
+        async with self.unit_of_work:
+            object_ = await self.db.create(obj_create)
 
-        await self.on_after_create(object_, request)
+            await self.on_after_create(object_, request)
         return object_
 
     async def get(self, id_: uuid.UUID) -> Subscription | None:
+        if self.catalog is not None and self.catalog.enabled:
+            return await self.catalog.get_subscription(id_)
+
         object_ = await self.db.get_by_id(id_)
         return object_
 
@@ -31,19 +45,21 @@ class SubcriptionManager:
         object_: Subscription,
         request: Request | None = None,
     ) -> Subscription:
-        _object = await self.db.update(object_, obj_update)
+        async with self.unit_of_work:
+            _object = await self.db.update(object_, obj_update)
 
-        await self.on_after_update(_object, request)
+            await self.on_after_update(_object, request)
         return _object
 
     async def delete(
         self, _object: Subscription, request: Request | None = None
     ) -> Subscription:
-        await self.on_before_delete(_object, request)
+        async with self.unit_of_work:
+            await self.on_before_delete(_object, request)
 
-        await self.db.delete(_object.id)
+            await self.db.delete(_object.id)
 
-        await self.on_after_delete(_object, request)
+            await self.on_after_delete(_object, request)
 
         return _object
 
@@ -52,9 +68,16 @@ class SubcriptionManager:
 
         return object_
 
+    def get_etag(self, object_: Subscription) -> str:
+        if self.catalog is not None and self.catalog.enabled:
+            etag = self.catalog.get_etag(object_.id)
+            if etag is not None:
+                return etag
+        return make_etag(object_.model_dump_json())
+
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[Subscription]:
+    ) -> Page[Subscription]:
         roles = await self.db.search(pagination_params, filter_param)
 
         return roles
@@ -62,12 +85,12 @@ class SubcriptionManager:
     async def on_after_create(
         self, model: Subscription, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
 
     async def on_after_update(
         self, model: Subscription, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
 
     async def on_before_delete(
         self, model: Subscription, request: Request | None = None
@@ -77,8 +100,15 @@ class SubcriptionManager:
     async def on_after_delete(
         self, model: Subscription, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
+
+    async def _on_catalog_changed(self) -> None:
+        await self.db.notify_changed()
+        if self.catalog is not None:
+            self.catalog.invalidate()
 
 
 async def get_subscriptin_manager(db: SASubscriptionDB = Depends(get_subscription_db)):
-    return SubcriptionManager(db=db)
+    return SubcriptionManager(
+        db=db, catalog=catalog, unit_of_work=SAUnitOfWork(db.session)
+    )
@@ -1,59 +1,103 @@
 import typing as t
 import uuid
+from datetime import datetime, timezone
 
 from fastapi import Depends, Request
 
 import core.exceptions as exc
+from core.http_cache import make_etag
 from core.pagination import PaginateQueryParams
 from db.tariff import SATariffDB, get_tariff_db
-from models import Tariff
+from db.unit_of_work import SAUnitOfWork
+from managers.catalog import Catalog, catalog
+from models import Page, Tariff
 
 
 class TariffManager:
-    def __init__(self, tariff_db: SATariffDB) -> None:
+    def __init__(
+        self,
+        tariff_db: SATariffDB,
+        catalog: Catalog | None = None,
+        unit_of_work: SAUnitOfWork | None = None,
+    ) -> None:
         self.tariff_db = tariff_db
+        self.catalog = catalog
+        self.unit_of_work = unit_of_work or SAUnitOfWork(tariff_db.session)
 
     async def create(
         self, obj_create: dict[str, t.Any], request: Request | None = None
     ) -> Tariff:
-        created_role = await self.tariff_db.create(obj_create)
+        async with self.unit_of_work:
+            created_role = await self.tariff_db.create(obj_create)
 
-        await self.on_after_create(created_role, request)
+            await self.on_after_create(created_role, request)
         return created_role
 
     async def get(self, tariff_id: uuid.UUID) -> Tariff | None:
+        if self.catalog is not None and self.catalog.enabled:
+            return await self.catalog.get_tariff(tariff_id)
+
         object = await self.tariff_db.get_by_id(tariff_id)
 
         return object
 
+    async def get_many(self, ids: t.Iterable[uuid.UUID]) -> dict[uuid.UUID, Tariff]:
+        """Get tariffs by ids, keyed by id; unknown ids are skipped."""
+        if self.catalog is not None and self.catalog.enabled:
+            objects = [await self.catalog.get_tariff(id_) for id_ in set(ids)]
+        else:
+            objects = await self.tariff_db.get_by_ids(set(ids))
+
+        return {object_.id: object_ for object_ in objects if object_ is not None}
+
     async def update(
         self,
         obj_update: dict[str, t.Any],
         model: Tariff,
         request: Request | None = None,
     ) -> Tariff:
-        updated_role = await self.tariff_db.update(model, obj_update)
+        async with self.unit_of_work:
+            updated_role = await self.tariff_db.update(model, obj_update)
 
-        await self.on_after_update(updated_role, request)
+            await self.on_after_update(updated_role, request)
         return updated_role
 
     async def delete(self, model: Tariff, request: Request | None = None) -> Tariff:
-        await self.on_before_delete(model, request)
+        async with self.unit_of_work:
+            await self.on_before_delete(model, request)
 
-        await self.tariff_db.delete(model.id)
+            await self.tariff_db.delete(model.id)
 
-        await self.on_after_delete(model, request)
+            await self.on_after_delete(model, request)
 
         return model
 
-    async def get_by_subscription(self, sub_id: uuid.UUID) -> Tariff | None:
-        model = await self.tariff_db.get_by_subscription(sub_id)
+    async def get_by_subscription(
+        self, sub_id: uuid.UUID, date: datetime | None = None
+    ) -> Tariff | None:
+        """Get the subscription tariff effective at the date (now by default)."""
+        if date is None:
+            date = datetime.utcnow()
+        elif date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+
+        if self.catalog is not None and self.catalog.enabled:
+            return await self.catalog.get_tariff_by_subscription(sub_id, date)
+
+        model = await self.tariff_db.get_by_subscription(sub_id, date)
 
         return model
 
+    def get_etag(self, object_: Tariff) -> str:
+        if self.catalog is not None and self.catalog.enabled:
+            etag = self.catalog.get_etag(object_.id)
+            if etag is not None:
+                return etag
+        return make_etag(object_.model_dump_json())
+
     async def search(
         self, pagination_params: PaginateQueryParams, filter_param: str | None = None
-    ) -> t.Iterable[Tariff]:
+    ) -> Page[Tariff]:
         roles = await self.tariff_db.search(pagination_params, filter_param)
 
         return roles
@@ -61,12 +105,12 @@ class TariffManager:
     async def on_after_create(
         self, model: Tariff, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
 
     async def on_after_update(
         self, model: Tariff, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
 
     async def on_before_delete(
         self, model: Tariff, request: Request | None = None
@@ -76,8 +120,17 @@ class TariffManager:
     async def on_after_delete(
         self, model: Tariff, request: Request | None = None
     ) -> None:
-        ...
+        await self._on_catalog_changed()
+
+    async def _on_catalog_changed(self) -> None:
+        await self.tariff_db.notify_changed()
+        if self.catalog is not None:
+            self.catalog.invalidate()
 
 
 async def get_tariff_manager(tariff_db: SATariffDB = Depends(get_tariff_db)):
-    yield TariffManager(tariff_db=tariff_db)
+    yield TariffManager(
+        tariff_db=tariff_db,
+        catalog=catalog,
+        unit_of_work=SAUnitOfWork(tariff_db.session),
+    )
@@ -1,3 +1,4 @@
+import logging
 import typing
 import uuid
 from uuid import UUID
@@ -5,22 +6,24 @@ from uuid import UUID
 import backoff
 import httpx
 import orjson
-from services.abc import UserServiceABC
+from fastapi import Depends
 
-from core.config import authorization_data, user_properties
-from core.logger import logger
-from models.users import NotificationChannel, User, UserChannels
+from auth.service_token import ServiceTokenProvider, get_service_token_provider
+from core.config import settings
+from core.http_client import get_http_client
+from models import User
 
-LOGGER = logger()
+logger = logging.getLogger(__name__)
 
 
-class UserService(UserServiceABC):
-    def __init__(self, client: httpx.AsyncClient):
+class UserService:
+    def __init__(self, client: httpx.AsyncClient, token_provider: ServiceTokenProvider):
         self.client = client
+        self.token_provider = token_provider
 
     async def get_users(self, user_ids: typing.Iterable[UUID]) -> typing.Iterable[User]:
         body = orjson.dumps({"ids": [str(uid) for uid in user_ids]})
-        users = await self._get_request_with_body(user_properties.url_get_users, body)
+        users = await self._get_request_with_body(settings.url_get_users, body)
 
         serialized_users = await self._serialize_users(users)
 
@@ -28,14 +31,14 @@ class UserService(UserServiceABC):
 
     @backoff.on_exception(backoff.expo, httpx.RequestError, max_tries=5)
     async def _get_request_with_body(
-        self, url: str, body: typing.Mapping[str, typing.Any]
+        self, url: str, body: bytes
     ) -> typing.Iterable[typing.Mapping[str, typing.Any]]:
         """
         Does the get request associated with the given body.
 
         Args:
             url (str): The url of the request.
-            body (dict[str, typing.Any]): A body of request.
+            body (bytes): The JSON body of the request.
 
         Returns:
             dict: A dictionary containing the response JSON if the request is successful.
@@ -43,16 +46,15 @@ class UserService(UserServiceABC):
         Raises:
             HTTPError: If the request fails with a non-200 status code.
         """
-        # url = user_properties.url_get_users_channels
-        access_token = await self._get_access_token()
+        access_token = await self.token_provider.get_token()
         headers = {
             'Content-Type': "application/json",
             'X-Request-Id': str(uuid.uuid4()),
             'Authorization': f'Bearer {access_token}',
         }
 
-        request = httpx.Request('GET', url, data=body, headers=headers)
-        response = await self.client.send(request=request)
+        request = self.client.build_request('GET', url, content=body, headers=headers)
+        response = await self.client.send(request)
         if response.status_code != 200:
             response.raise_for_status()
 
@@ -79,48 +81,13 @@ class UserService(UserServiceABC):
         try:
             users = [User(**user) for user in _users]
         except Exception as e:
-            LOGGER.error(f"Invalid user: {_users}. {e}")
+            logger.error("Invalid user: %s. %s", _users, e)
 
         return users
 
-    async def _get_access_token(self) -> str | None:
-        refresh_token = await self._get_refresh_token()
 
-        url = user_properties.url_refresh_token
-        headers = {
-            'X-Request-Id': str(uuid.uuid4()),
-            'Authorization': f'Bearer {refresh_token}',
-        }
-        request = httpx.Request('POST', url, headers=headers)
-        response = await self.client.send(request=request)
-        LOGGER.info(response.status_code)
-        if response.status_code == 200:
-            access_token = response.json()['access_token']
-            await self._set_access_token(access_token)
-            return access_token
-        response.raise_for_status()
-
-    async def _get_refresh_token(self) -> str | None:
-
-        url = user_properties.url_login
-        headers = {'X-Request-Id': str(uuid.uuid4())}
-        data = {
-            "username": user_properties.username,
-            "password": user_properties.password,
-        }
-        response = await self.client.post(url=url, headers=headers, data=data)
-        if response.status_code == 200:
-            refresh_token = response.json()['refresh_token']
-            await self._set_refresh_token(refresh_token)
-            return refresh_token
-        response.raise_for_status()
-
-    async def _set_access_token(self, access_token):
-        authorization_data['access_token'] = access_token
-
-    async def _set_refresh_token(self, refresh_token):
-        authorization_data['refresh_token'] = refresh_token
-
-
-async def get_user_service() -> typing.AsyncGenerator[UserService, None]:
-    yield UserService(httpx.AsyncClient())
+async def get_user_service(
+    client: httpx.AsyncClient = Depends(get_http_client),
+    token_provider: ServiceTokenProvider = Depends(get_service_token_provider),
+) -> typing.AsyncGenerator[UserService, None]:
+    yield UserService(client, token_provider)
@@ -1,6 +1,9 @@
 from .account import Account, AccountStatus
-from .billing import InvoiceCreate, InvoiceRead
-from .enum import Currency, PaymentStatus, SubscriptionStatus
+from .billing import InvoiceCreate, InvoiceRead, PaymentEvent
+from .entitlement import Entitlement
+from .enum import Currency, PaymentEventOutcome, PaymentStatus, SubscriptionStatus
+from .outbox import OutboxEvent
+from .page import Page
 from .subscriptions import Subscription
 from .tariff import Tariff
 from .user import User
@@ -12,8 +15,11 @@ __all__ = [
     'AccountStatus',
     'Currency',
     'PaymentStatus',
+    'PaymentEventOutcome',
     'SubscriptionStatus',
     'User',
     'InvoiceCreate',
     'InvoiceRead',
+    'Page',
+    'Entitlement',
 ]
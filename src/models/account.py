@@ -1,24 +1,29 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-import models
+from models.enum import SubscriptionStatus
 
 
 class Account(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     created_at: datetime
+    modified_at: datetime | None = None
     subscription_id: UUID
     user_id: UUID
-    status: models.SubscriptionStatus
+    status: SubscriptionStatus
     invoice_id: UUID | None
     expires_at: datetime
 
 
 class AccountStatus(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     account_id: UUID
     created_at: datetime
     expires_at: datetime
-    status: models.SubscriptionStatus
+    status: SubscriptionStatus
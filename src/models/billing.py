@@ -1,11 +1,11 @@
-import types as t
+import typing as t
 from datetime import datetime
 from decimal import Decimal
+from uuid import UUID
 
-from pydantic import BaseModel
-from sqlalchemy import UUID
+from pydantic import BaseModel, ConfigDict
 
-from models import Currency
+from models.enum import Currency, PaymentStatus
 
 
 class InvoiceCreate(BaseModel):
@@ -16,6 +16,8 @@ class InvoiceCreate(BaseModel):
 
 
 class InvoiceRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     created_at: datetime
     modified_at: datetime
@@ -38,3 +40,16 @@ class Refund(BaseModel):
     acq_provider: t.Optional[str]
     acq_message: t.Optional[str]
     transaction_type: t.Optional[str]
+
+
+class PaymentEvent(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    event_id: t.Optional[str]
+    account_id: UUID
+    tariff_id: UUID
+    invoice_id: t.Optional[UUID] = None
+    payment_status: PaymentStatus
+    created_at: datetime
+    attempts: int = 0
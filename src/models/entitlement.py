@@ -0,0 +1,11 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class Entitlement(BaseModel):
+    user_id: UUID
+    subscription_id: UUID
+    active: bool
+    expires_at: datetime | None
@@ -13,6 +13,14 @@ class PaymentStatus(str, Enum):
     refunded = 'refunded'
 
 
+class PaymentEventOutcome(str, Enum):
+    applied = 'applied'
+    ignored = 'ignored'
+    duplicate = 'duplicate'
+    account_not_exists = 'account_not_exists'
+    tariff_not_exists = 'tariff_not_exists'
+
+
 class SubscriptionStatus(str, Enum):
     active = 'active'
     inactive = 'inactive'
@@ -0,0 +1,14 @@
+import typing as t
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class OutboxEvent(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    topic: str
+    key: str
+    payload: dict[str, t.Any]
+    created_at: datetime
@@ -0,0 +1,10 @@
+import typing as t
+
+from pydantic import BaseModel
+
+T = t.TypeVar("T")
+
+
+class Page(BaseModel, t.Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
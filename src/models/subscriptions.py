@@ -1,8 +1,11 @@
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Subscription(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     name: str
+    is_deleted: bool = False
@@ -2,16 +2,18 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from models import Currency
 
 
 class Tariff(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: UUID
     subscription_id: UUID
     created_at: datetime
-    expires_at: datetime
+    expires_at: datetime | None
     amount: Decimal
     currency: Currency
     duration: int  # seconds
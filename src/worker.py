@@ -0,0 +1,75 @@
+"""
+The background loops of the service, run in one dedicated process.
+
+The API runs none of them, so scaling API processes does not multiply
+sweepers, relays and queue consumers. Each loop is started only when its
+`*_enabled` setting is on; all are off by default except partition
+maintenance, without which account_status INSERTs fail once the created
+partitions run out. The compose start scripts run it next to the API. The
+process serves the metrics endpoint, where the loops publish their lag and
+throughput.
+
+    python worker.py
+"""
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from api.v1 import metrics
+from core.config import settings
+from core.http_client import http_client
+from db.notifications import listener
+from managers.catalog import catalog
+from workers.base import PeriodicWorker
+from workers.billing_events import billing_event_worker
+from workers.expiry import expiry_sweeper
+from workers.invoices import invoice_sync_worker
+from workers.outbox import outbox_relay
+from workers.partitions import partition_worker
+
+app = FastAPI(
+    title=f"{settings.project_name} workers",
+    docs_url=None,
+    openapi_url=None,
+    default_response_class=ORJSONResponse,
+)
+
+
+def enabled_workers() -> list[PeriodicWorker]:
+    return [
+        worker
+        for enabled, worker in (
+            (settings.partition_maintenance_enabled, partition_worker),
+            (settings.expiry_sweeper_enabled, expiry_sweeper),
+            (settings.billing_event_queue_enabled, billing_event_worker),
+            (settings.outbox_enabled, outbox_relay),
+            (settings.invoice_sync_enabled, invoice_sync_worker),
+        )
+        if enabled
+    ]
+
+
+@app.on_event("startup")
+async def startup():
+    http_client.start()
+    if settings.notify_listener_enabled:
+        listener.start()
+    if settings.catalog_enabled:
+        await catalog.refresh()
+    for worker in enabled_workers():
+        worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for worker in enabled_workers():
+        await worker.stop()
+    await http_client.stop()
+    await listener.stop()
+
+
+app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=settings.worker_port)
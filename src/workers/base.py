@@ -0,0 +1,49 @@
+import asyncio
+import contextlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    Background loop calling `run_once` until stopped.
+
+    `run_once` returns True when more work is likely pending, in which case it
+    is called again right away; otherwise the worker sleeps `interval` seconds.
+    Failures are logged and retried after `interval`.
+    """
+
+    name: str = "worker"
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def run_once(self) -> bool:
+        raise NotImplementedError
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                busy = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s iteration failed", self.name)
+                busy = False
+
+            if not busy:
+                await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run_forever(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import logging
+import time
+import typing as t
+import uuid
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.metrics import metrics
+from db.account import SAAccountDB
+from db.account_status import SAAccountStatusDB
+from db.base import (
+    AccountDB,
+    SAAccountStatus,
+    SABillingEvent,
+    SABillingEventDeadLetter,
+    SABillingEventQueue,
+    SAInvoice,
+    SAInvoiceSync,
+    SAOutbox,
+    SATariff,
+    async_session_maker,
+)
+from db.billing_event import (
+    SABillingEventDB,
+    SABillingEventDeadLetterDB,
+    SABillingEventQueueDB,
+)
+from db.invoice import SAInvoiceDB, SAInvoiceSyncDB
+from db.outbox import SAOutboxDB
+from db.tariff import SATariffDB
+from db.unit_of_work import SAUnitOfWork
+from managers.account import AccountManager, seen_billing_events
+from managers.catalog import catalog
+from managers.tariff import TariffManager
+from models import PaymentEvent, PaymentEventOutcome
+from workers.base import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of queued events that were acknowledged but cannot be applied.
+REJECTED_OUTCOMES = (
+    PaymentEventOutcome.account_not_exists,
+    PaymentEventOutcome.tariff_not_exists,
+)
+
+
+class BillingEventWorker(PeriodicWorker):
+    """
+    Drains the payment webhook queue in batches.
+
+    Each batch is one transaction: the accounts of the oldest queued events
+    are locked with a transaction-level advisory lock, skipping accounts
+    other loops hold, and all their queued events are deleted and applied
+    through `AccountManager.apply_payments`. Events for an unknown account or
+    tariff are kept in billing_event_dead_letter.
+
+    A failed batch rolls back onto the queue and its accounts are retried
+    one by one. Every failure of an account counts an attempt against its
+    queued events; events reaching `max_attempts` are dead-lettered, so a
+    poison event does not block the later events of its account forever.
+    `concurrency` loops run side by side, each taking its own batches.
+    """
+
+    name = "billing-events"
+
+    def __init__(
+        self, interval: float, batch_size: int, concurrency: int, max_attempts: int
+    ) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.applied_total = 0
+        self.batches_total = 0
+        self.dead_lettered_total = 0
+        self.events_per_second = 0.0
+        self.lag = 0.0
+        self._tasks: list[asyncio.Task] = []
+
+    async def run_once(self) -> bool:
+        started = time.perf_counter()
+        claimed: list[PaymentEvent] = []
+
+        try:
+            async with async_session_maker() as session:
+                async with SAUnitOfWork(session):
+                    queue_db = SABillingEventQueueDB(
+                        session, SABillingEventQueue  # type: ignore
+                    )
+                    claimed = await queue_db.claim(self.batch_size)
+                    if not claimed:
+                        self.lag = 0.0
+                        return False
+
+                    await self._apply(session, claimed)
+                    oldest = await queue_db.get_oldest_created_at()
+        except Exception:
+            if not claimed:
+                raise
+            logger.exception("Billing event batch failed, retrying its accounts")
+            await self._retry_accounts(claimed)
+            return False
+
+        elapsed = time.perf_counter() - started
+        self.applied_total += len(claimed)
+        self.batches_total += 1
+        self.events_per_second = len(claimed) / elapsed if elapsed else 0.0
+        self.lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+        return len(claimed) == self.batch_size
+
+    async def _apply(self, session: AsyncSession, events: list[PaymentEvent]) -> None:
+        tariff_manager = TariffManager(
+            SATariffDB(session, SATariff), catalog  # type: ignore
+        )
+        tariffs = await tariff_manager.get_many(event.tariff_id for event in events)
+
+        manager = AccountManager(
+            SAAccountDB(session, AccountDB),  # type: ignore
+            SAAccountStatusDB(session, SAAccountStatus),  # type: ignore
+            billing_event_db=SABillingEventDB(session, SABillingEvent),  # type: ignore
+            seen_billing_events=seen_billing_events,
+            outbox_db=(
+                SAOutboxDB(session, SAOutbox)  # type: ignore
+                if settings.outbox_enabled
+                else None
+            ),
+            invoice_db=SAInvoiceDB(session, SAInvoice),  # type: ignore
+            invoice_sync_db=(
+                SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
+                if settings.invoice_sync_enabled
+                else None
+            ),
+        )
+        outcomes = await manager.apply_payments(events, tariffs)
+
+        rejected = [
+            (event, outcome.value)
+            for event, outcome in zip(events, outcomes)
+            if outcome in REJECTED_OUTCOMES
+        ]
+        await self._dead_letter_db(session).create_many(rejected)
+        self.dead_lettered_total += len(rejected)
+
+    async def _retry_accounts(self, events: list[PaymentEvent]) -> None:
+        for account_id in dict.fromkeys(event.account_id for event in events):
+            try:
+                async with async_session_maker() as session:
+                    async with SAUnitOfWork(session):
+                        queue_db = SABillingEventQueueDB(
+                            session, SABillingEventQueue  # type: ignore
+                        )
+                        claimed = await queue_db.claim_account(account_id)
+                        if claimed:
+                            await self._apply(session, claimed)
+                self.applied_total += len(claimed)
+            except Exception as error:
+                logger.exception("Payment events of account %s failed", account_id)
+                await self._record_failure(account_id, error)
+
+    async def _record_failure(self, account_id: uuid.UUID, error: Exception) -> None:
+        async with async_session_maker() as session:
+            async with SAUnitOfWork(session):
+                queue_db = SABillingEventQueueDB(
+                    session, SABillingEventQueue  # type: ignore
+                )
+                events = await queue_db.record_failure(account_id, self.max_attempts)
+                await self._dead_letter_db(session).create_many(
+                    (event, repr(error)) for event in events
+                )
+
+        if events:
+            logger.error(
+                "Moved %d payment events of account %s to the dead letter table",
+                len(events),
+                account_id,
+            )
+        self.dead_lettered_total += len(events)
+
+    @staticmethod
+    def _dead_letter_db(session: AsyncSession) -> SABillingEventDeadLetterDB:
+        return SABillingEventDeadLetterDB(
+            session, SABillingEventDeadLetter  # type: ignore
+        )
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self.run_forever(), name=f"{self.name}-{number}")
+            for number in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "applied_total": self.applied_total,
+            "batches_total": self.batches_total,
+            "dead_lettered_total": self.dead_lettered_total,
+            "events_per_second": self.events_per_second,
+            "lag_seconds": self.lag,
+        }
+
+
+billing_event_worker = BillingEventWorker(
+    settings.billing_event_interval,
+    settings.billing_event_batch_size,
+    settings.billing_event_workers,
+    settings.billing_event_max_attempts,
+)
+metrics.register("billing_events_queue", billing_event_worker.stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(billing_event_worker.run_forever())
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+import typing as t
+from datetime import datetime
+
+from core.config import settings
+from core.metrics import metrics
+from db.account import SAAccountDB
+from db.account_status import SAAccountStatusDB
+from db.base import AccountDB, SAAccountStatus, SAOutbox, async_session_maker
+from db.outbox import SAOutboxDB
+from managers.account import AccountManager
+from workers.base import PeriodicWorker
+
+
+class ExpirySweeper(PeriodicWorker):
+    """
+    Moves lapsed active accounts to inactive in batches.
+
+    Each batch is one transaction: a set-based UPDATE over rows claimed with
+    SKIP LOCKED plus a bulk insert of their history, so any number of replicas
+    can sweep concurrently.
+    """
+
+    name = "account-expiry"
+
+    def __init__(self, interval: float, batch_size: int) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.expired_total = 0
+        self.rows_per_second = 0.0
+        self.lag = 0.0
+
+    async def run_once(self) -> bool:
+        now = datetime.utcnow()
+        started = time.perf_counter()
+
+        async with async_session_maker() as session:
+            manager = AccountManager(
+                SAAccountDB(session, AccountDB),  # type: ignore
+                SAAccountStatusDB(session, SAAccountStatus),  # type: ignore
+                outbox_db=(
+                    SAOutboxDB(session, SAOutbox)  # type: ignore
+                    if settings.outbox_enabled
+                    else None
+                ),
+            )
+            objects = await manager.expire(now, self.batch_size)
+            oldest = await manager.get_oldest_lapsed(now)
+
+        elapsed = time.perf_counter() - started
+        self.expired_total += len(objects)
+        self.rows_per_second = len(objects) / elapsed if elapsed else 0.0
+        self.lag = (now - oldest).total_seconds() if oldest else 0.0
+
+        return len(objects) == self.batch_size
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "expired_total": self.expired_total,
+            "rows_per_second": self.rows_per_second,
+            "lag_seconds": self.lag,
+        }
+
+
+expiry_sweeper = ExpirySweeper(
+    settings.expiry_sweeper_interval, settings.expiry_sweeper_batch_size
+)
+metrics.register("account_expiry", expiry_sweeper.stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(expiry_sweeper.run_forever())
@@ -0,0 +1,140 @@
+"""
+Keeps the invoice mirror in line with billing.
+
+The worker fetches the invoices queued by payment webhooks. To backfill the
+invoices of accounts that were created before the mirror, queue them once:
+
+    python -m workers.invoices
+"""
+import asyncio
+import logging
+import typing as t
+import uuid
+from datetime import datetime
+
+import httpx
+
+import core.exceptions as exc
+import models
+from auth.service_token import service_token_provider
+from core.config import settings
+from core.http_client import http_client
+from core.metrics import metrics
+from db.base import SAInvoice, SAInvoiceSync, async_session_maker
+from db.invoice import SAInvoiceDB, SAInvoiceSyncDB
+from db.unit_of_work import SAUnitOfWork
+from managers.billing import BillingManager, billing_caller
+from workers.base import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceSyncWorker(PeriodicWorker):
+    """
+    Fetches queued invoices from billing into the mirror.
+
+    A batch is leased in a short committed transaction, so no lock or
+    connection is held while billing answers. The invoices are fetched at
+    most `concurrency` at a time, then upserted by billing's version and
+    deleted from the queue in a second short transaction. Invoices billing
+    does not know are dropped; other failures are retried once the lease
+    runs out.
+    """
+
+    name = "invoice-sync"
+
+    def __init__(
+        self, interval: float, batch_size: int, concurrency: int, lease: float
+    ) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self.synced_total = 0
+        self.failed_total = 0
+        self.lag = 0.0
+
+    async def run_once(self) -> bool:
+        async with async_session_maker() as session:
+            async with SAUnitOfWork(session):
+                sync_db = SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
+                claims = await sync_db.claim(self.batch_size, self.lease)
+        if not claims:
+            self.lag = 0.0
+            return False
+
+        # The session connects on its first statement, after the fetches.
+        async with async_session_maker() as session:
+            invoice_db = SAInvoiceDB(session, SAInvoice)  # type: ignore
+            manager = BillingManager(
+                http_client.client, service_token_provider, billing_caller, invoice_db
+            )
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(id_: uuid.UUID) -> tuple[bool, models.InvoiceRead | None]:
+                async with semaphore:
+                    return await self._fetch(manager, id_)
+
+            results = await asyncio.gather(*(fetch(id_) for id_, _ in claims))
+
+            async with SAUnitOfWork(session):
+                for _, invoice in results:
+                    if invoice is not None:
+                        await invoice_db.upsert(invoice)
+                sync_db = SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
+                await sync_db.delete(
+                    claim for claim, (done, _) in zip(claims, results) if done
+                )
+                oldest = await sync_db.get_oldest_created_at()
+
+        synced = sum(done for done, _ in results)
+        self.synced_total += synced
+        self.failed_total += len(claims) - synced
+        self.lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+        return synced == self.batch_size
+
+    async def _fetch(
+        self, manager: BillingManager, id_: uuid.UUID
+    ) -> tuple[bool, models.InvoiceRead | None]:
+        """Fetch an invoice; returns whether it is done with, and the invoice."""
+        try:
+            return True, await manager.fetch_invoice(id_)
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code != httpx.codes.NOT_FOUND:
+                logger.warning("Failed to fetch invoice %s: %s", id_, error)
+                return False, None
+            logger.warning("Dropping invoice %s unknown to billing", id_)
+            return True, None
+        except (httpx.RequestError, exc.CircuitOpen, exc.DeadlineExceeded) as error:
+            logger.warning("Failed to fetch invoice %s: %r", id_, error)
+            return False, None
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "synced_total": self.synced_total,
+            "failed_total": self.failed_total,
+            "lag_seconds": self.lag,
+        }
+
+
+async def backfill() -> int:
+    """Queue the invoices of accounts that are missing from the mirror."""
+    async with async_session_maker() as session:
+        async with SAUnitOfWork(session):
+            return await SAInvoiceSyncDB(
+                session, SAInvoiceSync  # type: ignore
+            ).request_missing()
+
+
+invoice_sync_worker = InvoiceSyncWorker(
+    settings.invoice_sync_interval,
+    settings.invoice_sync_batch_size,
+    settings.invoice_sync_concurrency,
+    settings.invoice_sync_lease,
+)
+metrics.register("invoice_sync", invoice_sync_worker.stats)
+
+
+if __name__ == "__main__":
+    print(f"Queued {asyncio.run(backfill())} invoices")
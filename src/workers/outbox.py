@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+import typing as t
+from datetime import datetime
+
+from core.config import settings
+from core.metrics import metrics
+from core.sinks import Sink, get_sink
+from db.base import SAOutbox, async_session_maker
+from db.outbox import SAOutboxDB
+from db.unit_of_work import SAUnitOfWork
+from workers.base import PeriodicWorker
+
+
+class OutboxRelay(PeriodicWorker):
+    """
+    Publishes outbox events to a sink in batches, at least once.
+
+    A batch is locked with SKIP LOCKED, published, then deleted in the same
+    transaction. If publishing fails the rows are released and retried; if
+    the commit fails after publishing, the batch is published again. There is
+    no default sink: the relay refuses to start until `outbox_sink` is set.
+    """
+
+    name = "outbox-relay"
+
+    def __init__(self, interval: float, batch_size: int, sink: Sink | None) -> None:
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.sink = sink
+        self.published_total = 0
+        self.events_per_second = 0.0
+        self.lag = 0.0
+
+    def start(self) -> None:
+        self._require_sink()
+        super().start()
+
+    async def run_once(self) -> bool:
+        sink = self._require_sink()
+        started = time.perf_counter()
+
+        async with async_session_maker() as session:
+            async with SAUnitOfWork(session):
+                outbox_db = SAOutboxDB(session, SAOutbox)  # type: ignore
+                events = await outbox_db.claim(self.batch_size)
+                if events:
+                    await sink.publish(
+                        [event.model_dump(mode="json") for event in events]
+                    )
+                    await outbox_db.delete(event.id for event in events)
+                oldest = await outbox_db.get_oldest_created_at()
+
+        elapsed = time.perf_counter() - started
+        self.published_total += len(events)
+        self.events_per_second = len(events) / elapsed if elapsed else 0.0
+        self.lag = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+        return len(events) == self.batch_size
+
+    def _require_sink(self) -> Sink:
+        if self.sink is None:
+            raise RuntimeError("The outbox relay needs outbox_sink to be set")
+        return self.sink
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "published_total": self.published_total,
+            "events_per_second": self.events_per_second,
+            "lag_seconds": self.lag,
+        }
+
+
+outbox_relay = OutboxRelay(
+    settings.outbox_relay_interval, settings.outbox_relay_batch_size, get_sink()
+)
+metrics.register("outbox", outbox_relay.stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(outbox_relay.run_forever())
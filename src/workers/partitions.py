@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+import typing as t
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.config import settings
+from core.metrics import metrics
+from db.base import engine
+from db.partitions import (
+    add_months,
+    create_account_status_partitions,
+    detach_account_status_partitions,
+    get_account_status_partitions,
+    lock_partition_maintenance,
+    partition_headroom,
+    unlock_partition_maintenance,
+)
+from workers.base import PeriodicWorker
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintenanceWorker(PeriodicWorker):
+    """
+    Creates account_status partitions ahead of time and detaches expired ones.
+
+    Every run also measures the headroom: how many months past the current
+    one already have a partition. An INSERT into a month without a partition
+    fails, so `headroom_months` below `account_status_partitions_min_headroom`
+    is logged as an error and should be alerted on, as should a stale check.
+    """
+
+    name = "partition-maintenance"
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(interval)
+        self.headroom_months: int | None = None
+        self.checked_at: float | None = None
+
+    async def run_once(self) -> bool:
+        this_month = datetime.utcnow().date().replace(day=1)
+
+        # DETACH PARTITION ... CONCURRENTLY cannot run in a transaction block.
+        async with engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if await lock_partition_maintenance(connection):
+                try:
+                    await self._maintain(connection, this_month)
+                finally:
+                    await unlock_partition_maintenance(connection)
+            partitions = await get_account_status_partitions(connection)
+
+        self.headroom_months = partition_headroom(partitions, this_month)
+        self.checked_at = time.time()
+        if self.headroom_months < settings.account_status_partitions_min_headroom:
+            logger.error(
+                "account_status partitions cover %d months ahead, "
+                "INSERTs fail once they run out",
+                self.headroom_months,
+            )
+        return False
+
+    async def _maintain(self, connection: AsyncConnection, this_month: date) -> None:
+        await create_account_status_partitions(
+            connection, this_month, settings.account_status_partitions_ahead
+        )
+        detached = await detach_account_status_partitions(
+            connection,
+            add_months(this_month, -settings.account_status_retention_months),
+        )
+        if detached:
+            logger.info("Detached account_status partitions: %s", detached)
+
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "headroom_months": self.headroom_months,
+            "seconds_since_check": (
+                time.time() - self.checked_at if self.checked_at else None
+            ),
+        }
+
+
+partition_worker = PartitionMaintenanceWorker(settings.partition_maintenance_interval)
+metrics.register("partitions", partition_worker.stats)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(partition_worker.run_forever())
@@ -0,0 +1,71 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+# The app runs from src/, and some routers import `src.auth.users`.
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+
+import httpx  # noqa: E402
+from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+import auth.users  # noqa: E402
+import models  # noqa: E402
+import src.auth.users  # noqa: E402
+from core.config import get_database_url_async, settings  # noqa: E402
+from db.base import get_async_session  # noqa: E402
+
+
+@pytest.fixture
+async def connection():
+    """A connection to the database from settings, rolled back after the test."""
+    engine = create_async_engine(get_database_url_async(), poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"database is not available: {e}")
+
+    transaction = await connection.begin()
+    yield connection
+
+    await transaction.rollback()
+    await connection.close()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session(connection):
+    """A session whose commits only release savepoints of the test transaction."""
+    async with AsyncSession(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as session:
+        yield session
+
+
+@pytest.fixture
+def superuser() -> models.User:
+    return models.User(id=uuid.uuid4(), rights=[settings.permissions_superuser])
+
+
+@pytest.fixture
+async def client(session, superuser):
+    """The API without its startup hooks, on the test session, as a superuser."""
+    from app import app
+
+    app.dependency_overrides = {
+        get_async_session: lambda: session,
+        auth.users.get_current_superuser: lambda: superuser,
+        src.auth.users.get_current_superuser: lambda: superuser,
+    }
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://api"
+    ) as client:
+        yield client
+    app.dependency_overrides = {}
@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+
+from db.base import AccountDB, SASubscription
+
+
+async def test_user_accounts_serialize_rows(client, session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    user_id, now = uuid.uuid4(), datetime.utcnow()
+    accounts = [
+        AccountDB(
+            user_id=user_id,
+            subscription_id=subscription.id,
+            status="active",
+            expires_at=now,
+            created_at=now,
+            modified_at=now,
+        )
+        for _ in range(2)
+    ]
+    session.add_all(accounts)
+    await session.flush()
+
+    response = await client.get("/api/v1/accounts/users", params={"user_id": user_id})
+
+    assert response.status_code == 200
+    assert sorted(response.json(), key=lambda item: item["id"]) == sorted(
+        (
+            {
+                "id": str(account.id),
+                "subscription_id": str(subscription.id),
+                "status": "active",
+            }
+            for account in accounts
+        ),
+        key=lambda item: item["id"],
+    )
+
+    response = await client.get(
+        "/api/v1/accounts/search", params={"filter_param": str(accounts[0].id)}
+    )
+
+    assert response.status_code == 200
+    assert [item["user_id"] for item in response.json()["items"]] == [str(user_id)]
@@ -0,0 +1,15 @@
+import uuid
+
+from auth.users import read_token
+from devtools.utils import create_token
+
+
+async def test_cached_user_is_not_shared_between_requests():
+    token = create_token(uuid.uuid4(), rights=["user"])
+
+    user = await read_token(token)
+    user.rights.append("superuser")  # type: ignore
+    cached = await read_token(token)
+    cached.rights.append("superuser")  # type: ignore
+
+    assert (await read_token(token)).rights == ["user"]
@@ -0,0 +1,130 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import db.base
+from core.config import get_database_url_async
+from db.base import SABillingEventDeadLetter, SABillingEventQueue
+from db.billing_event import SABillingEventQueueDB
+from workers.billing_events import BillingEventWorker
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(get_database_url_async(), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            queued = await connection.scalar(
+                select(func.count()).select_from(SABillingEventQueue)
+            )
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"database is not available: {e}")
+    if queued:
+        await engine.dispose()
+        pytest.skip("the billing event queue is not empty")
+
+    yield engine
+    await engine.dispose()
+
+
+async def test_claim_takes_accounts_whole(engine):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    async with AsyncSession(engine) as session:
+        queue_db = SABillingEventQueueDB(session, SABillingEventQueue)  # type: ignore
+        for account_id in (first, second, first, second, first):
+            await queue_db.enqueue(account_id, uuid.uuid4(), "paid")
+        await session.commit()
+
+    try:
+        async with AsyncSession(engine) as one, AsyncSession(engine) as other:
+            # The oldest event makes the first worker take all of its account.
+            claimed = await SABillingEventQueueDB(one, SABillingEventQueue).claim(1)
+            # The second one skips that account while the first is applying it.
+            rest = await SABillingEventQueueDB(other, SABillingEventQueue).claim(5)
+
+            assert [event.account_id for event in claimed] == [first] * 3
+            assert [event.account_id for event in rest] == [second] * 2
+            await one.rollback()
+            await other.rollback()
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(
+                delete(SABillingEventQueue).where(
+                    SABillingEventQueue.account_id.in_([first, second])
+                )
+            )
+            await session.commit()
+
+
+@pytest.fixture
+async def worker_queue(engine):
+    """Enqueue events for the worker, removing them and their dead letters after."""
+    account_ids: list[uuid.UUID] = []
+
+    async def enqueue(account_id: uuid.UUID) -> None:
+        account_ids.append(account_id)
+        async with AsyncSession(engine) as session:
+            await SABillingEventQueueDB(session, SABillingEventQueue).enqueue(
+                account_id, uuid.uuid4(), "paid"
+            )
+            await session.commit()
+
+    yield enqueue
+
+    async with AsyncSession(engine) as session:
+        for table in (SABillingEventQueue, SABillingEventDeadLetter):
+            await session.execute(
+                delete(table).where(table.account_id.in_(account_ids))
+            )
+        await session.commit()
+    # The worker runs on the app's engine, whose pool is bound to this loop.
+    await db.base.engine.dispose()
+
+
+async def dead_letters(engine, account_id: uuid.UUID) -> list[tuple[int, str]]:
+    async with AsyncSession(engine) as session:
+        statement = select(
+            SABillingEventDeadLetter.attempts, SABillingEventDeadLetter.reason
+        ).where(SABillingEventDeadLetter.account_id == account_id)
+        return [tuple(row) for row in await session.execute(statement)]
+
+
+async def test_worker_keeps_events_of_unknown_accounts(engine, worker_queue):
+    account_id = uuid.uuid4()
+    await worker_queue(account_id)
+
+    await BillingEventWorker(1.0, 10, 1, max_attempts=3).run_once()
+
+    assert await dead_letters(engine, account_id) == [(0, "account_not_exists")]
+
+
+async def test_worker_dead_letters_a_poison_account(engine, worker_queue):
+    poison, other = uuid.uuid4(), uuid.uuid4()
+    await worker_queue(poison)
+    await worker_queue(other)
+    worker = BillingEventWorker(1.0, 10, 1, max_attempts=2)
+    apply = worker._apply
+
+    async def failing_apply(session, events):
+        if any(event.account_id == poison for event in events):
+            raise ValueError("poison")
+        await apply(session, events)
+
+    worker._apply = failing_apply  # type: ignore
+
+    # The failed batch is retried account by account: the other account
+    # goes through, the poison one is counted and stays queued.
+    await worker.run_once()
+    assert await dead_letters(engine, other) == [(0, "account_not_exists")]
+    assert await dead_letters(engine, poison) == []
+
+    await worker.run_once()
+    assert await dead_letters(engine, poison) == [(2, "ValueError('poison')")]
+    async with AsyncSession(engine) as session:
+        statement = select(func.count()).where(SABillingEventQueue.account_id == poison)
+        assert await session.scalar(statement) == 0
@@ -0,0 +1,167 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event, select
+
+import models
+from core.cache import TTLCache
+from db.account import SAAccountDB
+from db.account_status import SAAccountStatusDB
+from db.base import AccountDB, SAAccountStatus, SABillingEvent, SASubscription, SATariff
+from managers.account import AccountManager
+
+
+async def test_batch_keeps_keys_of_accepted_events_only(client, session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    tariff = SATariff(
+        subscription_id=subscription.id, amount=100, currency="RUB", duration=60
+    )
+    session.add(tariff)
+    await session.flush()
+    account_id, event_id = uuid.uuid4(), f"test-{uuid.uuid4()}"
+    batch = {
+        "events": [
+            {
+                "account_id": str(account_id),
+                "tariff_id": str(tariff.id),
+                "payment_status": "paid",
+                "event_id": event_id,
+            }
+        ]
+    }
+
+    async def deliver() -> str:
+        response = await client.post(
+            "/api/v1/internal/hooks/billing/payments", json=batch
+        )
+        assert response.status_code == 200
+        return response.json()[0]["outcome"]
+
+    async def recorded() -> bool:
+        statement = select(SABillingEvent.id).where(SABillingEvent.id == event_id)
+        return await session.scalar(statement) is not None
+
+    # The account does not exist yet: the event is rejected, its key dropped.
+    assert await deliver() == "account_not_exists"
+    assert not await recorded()
+
+    now = datetime.utcnow()
+    session.add(
+        AccountDB(
+            id=account_id,
+            user_id=uuid.uuid4(),
+            subscription_id=subscription.id,
+            status="inactive",
+            expires_at=now,
+            created_at=now,
+            modified_at=now,
+        )
+    )
+    await session.flush()
+
+    assert await deliver() == "applied"
+    assert await recorded()
+    assert await deliver() == "duplicate"
+
+
+async def test_payment_locks_the_account(client, session, connection):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    tariff = SATariff(
+        subscription_id=subscription.id, amount=100, currency="RUB", duration=60
+    )
+    now = datetime.utcnow()
+    account = AccountDB(
+        user_id=uuid.uuid4(),
+        subscription_id=subscription.id,
+        status="inactive",
+        expires_at=now,
+        created_at=now,
+        modified_at=now,
+    )
+    session.add_all([tariff, account])
+    await session.flush()
+    params = {"tariff_id": str(tariff.id), "payment_status": "paid"}
+    statements: list[str] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(connection.sync_connection, "before_cursor_execute", capture)
+    try:
+        response = await client.post(
+            "/api/v1/internal/hooks/billing/payment",
+            params={**params, "account_id": str(account.id)},
+        )
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", capture)
+
+    assert response.status_code == 200
+    # The expiry is computed from a locked read, which is never routed to a replica.
+    assert any(
+        "FROM subscriptions.account" in statement and "FOR UPDATE" in statement
+        for statement in statements
+    )
+
+    response = await client.post(
+        "/api/v1/internal/hooks/billing/payment",
+        params={**params, "account_id": str(uuid.uuid4())},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "ACCOUNT_NOT_EXISTS"}
+
+
+async def test_batch_checks_seen_keys_without_billing_event_db(session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    tariff = SATariff(
+        subscription_id=subscription.id, amount=100, currency="RUB", duration=60
+    )
+    now = datetime.utcnow()
+    account = AccountDB(
+        user_id=uuid.uuid4(),
+        subscription_id=subscription.id,
+        status="inactive",
+        expires_at=now,
+        created_at=now,
+        modified_at=now,
+    )
+    session.add_all([tariff, account])
+    await session.flush()
+    manager = AccountManager(
+        SAAccountDB(session, AccountDB),  # type: ignore
+        SAAccountStatusDB(session, SAAccountStatus),  # type: ignore
+        seen_billing_events=TTLCache(maxsize=100, ttl=60),
+    )
+    tariffs = {tariff.id: models.Tariff.model_validate(tariff)}
+
+    def payment(event_id: str) -> models.PaymentEvent:
+        return models.PaymentEvent(
+            id=0,
+            event_id=event_id,
+            account_id=account.id,
+            tariff_id=tariff.id,
+            payment_status="paid",
+            created_at=now,
+        )
+
+    # A key applied by the single-event path is a duplicate in a batch too.
+    await manager.apply_payment(
+        account.id, tariffs[tariff.id], models.PaymentStatus.paid, event_id="first"
+    )
+    assert await manager.apply_payments([payment("first")], tariffs) == [
+        models.PaymentEventOutcome.duplicate
+    ]
+
+    # A key applied by a batch is a duplicate in the next one.
+    assert await manager.apply_payments([payment("second")], tariffs) == [
+        models.PaymentEventOutcome.applied
+    ]
+    assert await manager.apply_payments([payment("second")], tariffs) == [
+        models.PaymentEventOutcome.duplicate
+    ]
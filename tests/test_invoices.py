@@ -0,0 +1,229 @@
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import db.base
+import models
+from core.config import get_database_url_async
+from core.http_client import http_client
+from db.base import AccountDB, SAInvoice, SAInvoiceSync, SASubscription, SATariff
+from db.invoice import UNVERSIONED, SAInvoiceDB, SAInvoiceSyncDB
+from managers.billing import BillingManager
+from workers.invoices import InvoiceSyncWorker
+
+
+def make_invoice(**update) -> models.InvoiceRead:
+    now = datetime.utcnow().replace(microsecond=0)
+    invoice = models.InvoiceRead(
+        id=uuid.uuid4(),
+        created_at=now,
+        modified_at=now,
+        user_id=uuid.uuid4(),
+        service_id=uuid.uuid4(),
+        status="open",
+        amount=100.0,
+        currency="RUB",
+    )
+    return invoice.model_copy(update=update)
+
+
+async def test_upsert_compares_billing_versions(session):
+    invoice_db = SAInvoiceDB(session, SAInvoice)  # type: ignore
+    invoice = make_invoice()
+    await invoice_db.create(invoice)
+    await invoice_db.set_statuses(
+        [
+            {
+                **invoice.model_dump(exclude={"created_at", "modified_at"}),
+                "status": "paid",
+            }
+        ]
+    )
+
+    # The webhook keeps billing's version, so a response of the same version
+    # fetched before the payment does not roll the status back.
+    await invoice_db.upsert(invoice)
+    assert await invoice_db.get_by_id(invoice.id) == invoice.model_copy(
+        update={"status": "paid"}
+    )
+
+    newer = invoice.model_copy(
+        update={"status": "refunded", "modified_at": invoice.modified_at + timedelta(1)}
+    )
+    await invoice_db.upsert(newer)
+    assert await invoice_db.get_by_id(invoice.id) == newer
+
+
+async def test_webhook_mirrors_unknown_invoice(client, session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    tariff = SATariff(
+        subscription_id=subscription.id, amount=100, currency="RUB", duration=60
+    )
+    now = datetime.utcnow()
+    account = AccountDB(
+        user_id=uuid.uuid4(),
+        subscription_id=subscription.id,
+        status="inactive",
+        expires_at=now,
+        created_at=now,
+        modified_at=now,
+    )
+    session.add_all([tariff, account])
+    await session.flush()
+    invoice_id = uuid.uuid4()
+
+    response = await client.post(
+        "/api/v1/internal/hooks/billing/payment",
+        params={
+            "account_id": str(account.id),
+            "tariff_id": str(tariff.id),
+            "payment_status": "paid",
+            "invoice_id": str(invoice_id),
+        },
+    )
+
+    assert response.status_code == 200
+    invoice = await SAInvoiceDB(session, SAInvoice).get_by_id(invoice_id)
+    assert invoice is not None
+    assert (invoice.user_id, invoice.service_id, invoice.status) == (
+        account.id,
+        tariff.id,
+        "paid",
+    )
+    assert invoice.modified_at == UNVERSIONED
+
+    # The first version fetched from billing replaces the webhook's row.
+    fetched = make_invoice(
+        id=invoice_id, user_id=account.id, service_id=tariff.id, status="paid"
+    )
+    await SAInvoiceDB(session, SAInvoice).upsert(fetched)
+    assert await SAInvoiceDB(session, SAInvoice).get_by_id(invoice_id) == fetched
+
+
+async def test_backfill_queues_unmirrored_account_invoices(session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    mirrored, missing, now = make_invoice(), uuid.uuid4(), datetime.utcnow()
+    session.add_all(
+        AccountDB(
+            user_id=uuid.uuid4(),
+            subscription_id=subscription.id,
+            status="active",
+            expires_at=now,
+            created_at=now,
+            modified_at=now,
+            invoice_id=invoice_id,
+        )
+        for invoice_id in (mirrored.id, missing)
+    )
+    await session.flush()
+    await SAInvoiceDB(session, SAInvoice).create(mirrored)
+    sync_db = SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
+
+    await sync_db.request_missing()
+
+    claimed = {id_ for id_, _ in await sync_db.claim(10_000, lease=60)}
+    assert missing in claimed
+    assert mirrored.id not in claimed
+
+
+async def test_sync_keeps_invoices_requested_during_a_lease(session):
+    sync_db = SAInvoiceSyncDB(session, SAInvoiceSync)  # type: ignore
+    first, second = uuid.uuid4(), uuid.uuid4()
+    await sync_db.request([first, second])
+
+    claims = [
+        claim
+        for claim in await sync_db.claim(10_000, lease=60)
+        if claim[0] in (first, second)
+    ]
+    assert {id_ for id_, _ in claims} == {first, second}
+    # Leased invoices are not claimed twice.
+    assert not {id_ for id_, _ in await sync_db.claim(10_000, lease=60)} & {
+        first,
+        second,
+    }
+
+    # A webhook during the fetch asks for the first invoice again.
+    await sync_db.request([first])
+    await sync_db.delete(claims)
+
+    statement = select(SAInvoiceSync.invoice_id).where(
+        SAInvoiceSync.invoice_id.in_([first, second])
+    )
+    assert list(await session.scalars(statement)) == [first]
+
+
+class StubBillingManager:
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+
+    async def fetch_invoice(self, id_: uuid.UUID) -> models.InvoiceRead:
+        request = httpx.Request("GET", f"http://billing/invoice/{id_}")
+        response = httpx.Response(self.status_code, request=request)
+        response.raise_for_status()
+        return make_invoice(id=id_)
+
+
+async def test_sync_drops_only_invoices_unknown_to_billing():
+    worker = InvoiceSyncWorker(interval=1.0, batch_size=10, concurrency=2, lease=60)
+    id_ = uuid.uuid4()
+
+    done, invoice = await worker._fetch(StubBillingManager(200), id_)  # type: ignore
+    assert done and invoice is not None and invoice.id == id_
+    assert await worker._fetch(StubBillingManager(404), id_) == (True, None)  # type: ignore
+    assert await worker._fetch(StubBillingManager(503), id_) == (False, None)  # type: ignore
+
+
+async def test_sync_worker_mirrors_queued_invoices(monkeypatch):
+    engine = create_async_engine(get_database_url_async(), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            queued = await connection.scalar(
+                select(func.count()).select_from(SAInvoiceSync)
+            )
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"database is not available: {e}")
+    if queued:
+        await engine.dispose()
+        pytest.skip("the invoice sync queue is not empty")
+
+    invoice = make_invoice()
+    async with AsyncSession(engine) as session:
+        await SAInvoiceSyncDB(session, SAInvoiceSync).request([invoice.id])
+        await session.commit()
+
+    async def fetch_invoice(self, id_: uuid.UUID) -> models.InvoiceRead:
+        return invoice
+
+    monkeypatch.setattr(BillingManager, "fetch_invoice", fetch_invoice)
+    http_client.start()
+    try:
+        worker = InvoiceSyncWorker(1.0, batch_size=10, concurrency=2, lease=60)
+        await worker.run_once()
+
+        async with AsyncSession(engine) as session:
+            assert (
+                await SAInvoiceDB(session, SAInvoice).get_by_id(invoice.id) == invoice
+            )
+            assert not await session.scalar(
+                select(func.count(SAInvoiceSync.invoice_id))
+            )
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.execute(delete(SAInvoice).where(SAInvoice.id == invoice.id))
+            await session.execute(delete(SAInvoiceSync))
+            await session.commit()
+        await http_client.stop()
+        await engine.dispose()
+        await db.base.engine.dispose()
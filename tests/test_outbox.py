@@ -0,0 +1,29 @@
+import httpx
+import orjson
+import pytest
+
+from core.http_client import http_client
+from core.sinks import HTTPSink
+from workers.outbox import OutboxRelay
+
+
+async def test_http_sink_uses_the_shared_client(monkeypatch):
+    requests = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(204)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(http_client, "_client", client)
+
+    await HTTPSink("http://events/accounts", timeout=1.0).publish([{"id": 1}])
+
+    assert [request.url for request in requests] == ["http://events/accounts"]
+    assert orjson.loads(requests[0].content) == [{"id": 1}]
+    await client.aclose()
+
+
+def test_relay_needs_a_sink():
+    with pytest.raises(RuntimeError):
+        OutboxRelay(interval=1.0, batch_size=10, sink=None).start()
@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import get_database_url_async
+from db.partitions import (
+    create_account_status_partitions,
+    detach_account_status_partitions,
+    get_account_status_partitions,
+    partition_headroom,
+)
+
+
+def test_partition_headroom():
+    months = [date(2026, 10, 1), date(2026, 11, 1), date(2027, 1, 1)]
+
+    assert partition_headroom(months, date(2026, 10, 1)) == 1
+    assert partition_headroom(months, date(2026, 11, 1)) == 0
+    assert partition_headroom(months, date(2026, 12, 1)) == -1
+
+
+async def test_detach_expired_partition_concurrently():
+    engine = create_async_engine(get_database_url_async(), poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"database is not available: {e}")
+
+    try:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await create_account_status_partitions(connection, date(2000, 1, 1), 0)
+        assert date(2000, 1, 1) in await get_account_status_partitions(connection)
+
+        detached = await detach_account_status_partitions(connection, date(2000, 2, 1))
+
+        assert detached == ["account_status_p200001"]
+        assert date(2000, 1, 1) not in await get_account_status_partitions(connection)
+        result = await connection.execute(
+            text("SELECT to_regclass('subscriptions_archive.account_status_p200001')")
+        )
+        assert result.scalar() is not None
+    finally:
+        await connection.execute(
+            text("DROP TABLE IF EXISTS subscriptions_archive.account_status_p200001")
+        )
+        await connection.close()
+        await engine.dispose()
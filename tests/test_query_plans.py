@@ -0,0 +1,317 @@
+"""
+Query plan regression tests for the repository queries in db/.
+
+The tables are seeded with realistic volumes in one transaction that is
+rolled back after the module. Every statement a repository method executes
+is captured and EXPLAINed, and the hot tables must be read through the
+expected index rather than a sequential scan.
+"""
+import asyncio
+import json
+import re
+import typing as t
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import get_database_url_async
+from core.pagination import PaginateQueryParams
+from db.account import SAAccountDB
+from db.account_status import SAAccountStatusDB
+from db.base import (
+    AccountDB,
+    SAAccountStatus,
+    SABillingEventQueue,
+    SAInvoice,
+    SAOutbox,
+    SASubscription,
+    SATariff,
+)
+from db.billing_event import SABillingEventQueueDB
+from db.invoice import SAInvoiceDB
+from db.outbox import SAOutboxDB
+from db.subscription import SASubscriptionDB
+from db.tariff import SATariffDB
+
+ACCOUNTS = 50_000
+SUBSCRIPTIONS = 1_000
+QUEUED = 50_000
+
+NOW = "(now() AT TIME ZONE 'utc')"
+SEED = (
+    f"""
+    INSERT INTO subscriptions.subscription (id, name, on_delete)
+    SELECT md5('subscription' || n)::uuid, 'plan-' || n, false
+    FROM generate_series(0, {SUBSCRIPTIONS - 1}) AS n
+    """,
+    f"""
+    INSERT INTO subscriptions.tariff
+        (id, subscription, created_at, amount, currency, duration)
+    SELECT gen_random_uuid(), md5('subscription' || n)::uuid,
+           {NOW} - make_interval(days => 30 * version), 100, 'RUB', 2592000
+    FROM generate_series(0, {SUBSCRIPTIONS - 1}) AS n,
+         generate_series(0, 2) AS version
+    """,
+    # Two accounts per user; one in ten inactive; about 1% active but lapsed.
+    f"""
+    INSERT INTO subscriptions.account
+        (id, created_at, modified_at, "user", subscription, expires_at, status,
+         on_delete)
+    SELECT md5('account' || n)::uuid,
+           {NOW} - make_interval(secs => n),
+           {NOW} - make_interval(secs => n),
+           md5('user' || n / 2)::uuid,
+           md5('subscription' || n % {SUBSCRIPTIONS})::uuid,
+           {NOW} + make_interval(days => n % 400 - 4),
+           CASE WHEN n % 10 = 0 THEN 'inactive' ELSE 'active' END,
+           false
+    FROM generate_series(1, {ACCOUNTS}) AS n
+    """,
+    f"""
+    INSERT INTO subscriptions.account_status
+        (id, account, created_at, expires_at, status)
+    SELECT gen_random_uuid(), id,
+           date_trunc('month', {NOW}) + random() * ({NOW} - date_trunc('month', {NOW})),
+           expires_at, status
+    FROM subscriptions.account, generate_series(1, 2)
+    """,
+    """
+    INSERT INTO subscriptions.invoice
+        (id, created_at, modified_at, account, tariff, status, amount, currency)
+    SELECT gen_random_uuid(), created_at, created_at, id, gen_random_uuid(),
+           'paid', 100, 'RUB'
+    FROM subscriptions.account
+    """,
+    f"""
+    INSERT INTO subscriptions.billing_event_queue
+        (account, tariff, payment_status, created_at)
+    SELECT gen_random_uuid(), gen_random_uuid(), 'paid', {NOW}
+    FROM generate_series(1, {QUEUED})
+    """,
+    f"""
+    INSERT INTO subscriptions.outbox (topic, key, payload, created_at)
+    SELECT 'account_status_changed', n::text, '{{}}', {NOW}
+    FROM generate_series(1, {QUEUED}) AS n
+    """,
+)
+TABLES = (
+    "subscription",
+    "tariff",
+    "account",
+    "account_status",
+    "invoice",
+    "billing_event_queue",
+    "outbox",
+)
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+async def seeded() -> t.AsyncIterator[AsyncConnection]:
+    engine = create_async_engine(get_database_url_async(), poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except (OSError, SQLAlchemyError) as e:
+        await engine.dispose()
+        pytest.skip(f"database is not available: {e}")
+
+    transaction = await connection.begin()
+    for statement in SEED:
+        await connection.execute(text(statement))
+    for table in TABLES:
+        await connection.execute(text(f"ANALYZE subscriptions.{table}"))
+    yield connection
+
+    await transaction.rollback()
+    await connection.close()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def explain(seeded):
+    """Run a repository call on the seeded data and EXPLAIN what it executed."""
+    session = AsyncSession(
+        bind=seeded, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    )
+    statements: list[tuple[str, t.Any]] = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", statement) and (
+            "pg_notify" not in statement
+        ):
+            statements.append((statement, parameters))
+
+    async def run(call: t.Callable[[AsyncSession], t.Awaitable[t.Any]]) -> list[dict]:
+        statements.clear()
+        event.listen(seeded.sync_connection, "before_cursor_execute", capture)
+        try:
+            await call(session)
+        finally:
+            event.remove(seeded.sync_connection, "before_cursor_execute", capture)
+
+        plans = []
+        for statement, parameters in statements:
+            result = await seeded.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar_one()
+            plans.append((json.loads(plan) if isinstance(plan, str) else plan)[0])
+        assert plans, "the call executed no query"
+        return plans
+
+    yield run
+    await session.close()
+
+
+def walk(plan: dict) -> t.Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def assert_index_scan(plans: list[dict], table: str, index: str | None = None) -> None:
+    """
+    Every read of `table` (or its partitions) goes through an index.
+
+    Empty partitions are cheapest to scan sequentially, so they are exempt.
+    With `index`, that index has to be among the ones used.
+    """
+    relation = re.compile(rf"{table}(?P<partition>_p\d{{6}}|_default)?")
+    nodes = [node for plan in plans for node in walk(plan["Plan"])]
+    scans = []
+    for node in nodes:
+        match = relation.fullmatch(node.get("Relation Name", ""))
+        if match and node["Node Type"] != "ModifyTable":
+            scans.append(node)
+            if match["partition"] and node["Plan Rows"] <= 1:
+                continue
+            assert node["Node Type"] != "Seq Scan", f"sequential scan on {table}"
+    assert scans, f"{table} is not read"
+    if index is not None:
+        used = {node["Index Name"] for node in nodes if "Index Name" in node}
+        assert index in used, f"{index} not used, got {used}"
+
+
+def page(cursor: str | None = None) -> PaginateQueryParams:
+    return PaginateQueryParams(page_number=1, page_size=50, cursor=cursor)
+
+
+MISSING_ID = uuid.uuid4()
+
+
+async def sample(session: AsyncSession) -> t.Mapping[str, t.Any]:
+    results = await session.execute(
+        text(
+            'SELECT id, "user", subscription FROM subscriptions.account '
+            "WHERE id = md5('account' || 1234)::uuid"
+        )
+    )
+    return results.mappings().one()
+
+
+async def test_account_reads_by_user(explain):
+    async def call(session):
+        row = await sample(session)
+        account_db = SAAccountDB(session, AccountDB)
+        await account_db.get_by_user_id(row["user"])
+        await account_db.get_version_by_user_id(row["user"])
+        await account_db.get_active_until(row["user"], row["subscription"])
+
+    assert_index_scan(await explain(call), "account", "ix_account_user")
+
+
+async def test_account_reads_by_id(explain):
+    async def call(session):
+        row = await sample(session)
+        account_db = SAAccountDB(session, AccountDB)
+        await account_db.get_by_id(row["id"])
+        await account_db.get_by_ids([row["id"], MISSING_ID], for_update=True)
+
+    assert_index_scan(await explain(call), "account", "account_pkey")
+
+
+async def test_account_search_pages(explain):
+    async def call(session):
+        account_db = SAAccountDB(session, AccountDB)
+        first = await account_db.search(page())
+        await account_db.search(page(first.next_cursor))
+
+    assert_index_scan(await explain(call), "account", "ix_account_created_at_id")
+
+
+async def test_account_expiry(explain):
+    async def call(session):
+        account_db = SAAccountDB(session, AccountDB)
+        now = datetime.utcnow()
+        await account_db.get_oldest_lapsed(now)
+        await account_db.expire(now, 500)
+
+    assert_index_scan(await explain(call), "account", "ix_account_active_expires_at")
+
+
+async def test_account_status_reads(explain):
+    async def call(session):
+        row = await sample(session)
+        status_db = SAAccountStatusDB(session, SAAccountStatus)
+        await status_db.get_by_account(row["id"])
+        first = await status_db.search(page())
+        await status_db.search(page(first.next_cursor))
+
+    assert_index_scan(await explain(call), "account_status")
+
+
+async def test_tariff_reads(explain):
+    async def call(session):
+        row = await sample(session)
+        tariff_db = SATariffDB(session, SATariff)
+        tariff = await tariff_db.get_by_subscription(
+            row["subscription"], datetime.utcnow()
+        )
+        await tariff_db.get_by_id(tariff.id)
+        await tariff_db.get_by_ids([tariff.id, MISSING_ID])
+
+    by_subscription, *by_id = (await explain(call))[1:]
+    assert_index_scan([by_subscription], "tariff", "ix_tariff_subscription_created_at")
+    assert_index_scan(by_id, "tariff", "tariff_pkey")
+
+
+async def test_subscription_reads(explain):
+    async def call(session):
+        subscription_db = SASubscriptionDB(session, SASubscription)
+        await subscription_db.get_by_name("plan-123")
+        first = await subscription_db.search(page())
+        await subscription_db.search(page(first.next_cursor))
+
+    assert_index_scan(await explain(call), "subscription", "ix_subscription_name_id")
+
+
+async def test_invoice_reads(explain):
+    async def call(session):
+        row = await sample(session)
+        await SAInvoiceDB(session, SAInvoice).get_by_account(row["id"])
+
+    assert_index_scan(await explain(call), "invoice", "ix_invoice_account_created_at")
+
+
+async def test_queue_claims(explain):
+    async def call(session):
+        await SABillingEventQueueDB(session, SABillingEventQueue).claim(200)
+        await SAOutboxDB(session, SAOutbox).claim(200)
+
+    head, claimed, outbox = await explain(call)
+    assert_index_scan([head], "billing_event_queue", "billing_event_queue_pkey")
+    assert_index_scan(
+        [claimed], "billing_event_queue", "ix_billing_event_queue_account_id"
+    )
+    assert_index_scan([outbox], "outbox", "outbox_pkey")
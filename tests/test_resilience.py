@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import core.exceptions as exc
+from core.resilience import CircuitBreaker, ResilientCaller, RetryBudget
+
+
+def make_caller() -> ResilientCaller:
+    return ResilientCaller(
+        RetryBudget(ratio=0.1, min_retries=0),
+        failure_threshold=3,
+        reset_timeout=10.0,
+        timeout=1.0,
+        max_attempts=1,
+        base_delay=0.0,
+        max_delay=0.0,
+    )
+
+
+def status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://billing")
+    response = httpx.Response(code, request=request)
+    return httpx.HTTPStatusError("", request=request, response=response)
+
+
+def half_open(breaker: CircuitBreaker) -> None:
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+
+async def test_non_http_error_leaves_the_breaker_alone():
+    caller = make_caller()
+    breaker = caller.get_breaker("billing")
+    breaker.failures = 2
+
+    async def attempt(timeout: float) -> None:
+        raise ValueError("malformed body")
+
+    with pytest.raises(ValueError):
+        await caller.call("billing", attempt)
+
+    assert breaker.failures == 2
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_client_error_response_counts_as_success():
+    caller = make_caller()
+    breaker = caller.get_breaker("billing")
+    breaker.failures = 2
+
+    async def attempt(timeout: float) -> None:
+        raise status_error(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await caller.call("billing", attempt)
+
+    assert breaker.failures == 0
+
+
+async def test_cancelled_half_open_trial_releases_its_slot():
+    caller = make_caller()
+    breaker = caller.get_breaker("billing")
+    half_open(breaker)
+
+    task = asyncio.create_task(caller.call("billing", lambda _: asyncio.sleep(10)))
+    await asyncio.sleep(0)
+    assert breaker.half_open_calls == 1
+    with pytest.raises(exc.CircuitOpen):
+        await caller.call("billing", lambda _: asyncio.sleep(0))
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.half_open_calls == 0
+    assert breaker.allow()
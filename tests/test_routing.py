@@ -0,0 +1,31 @@
+from sqlalchemy import create_engine, insert, literal, select, table
+
+from db.routing import USE_PRIMARY, ReplicaState, RoutingSession
+
+primary = create_engine("sqlite://")
+replica = create_engine("sqlite://")
+
+
+def make_session() -> RoutingSession:
+    return RoutingSession(bind=primary, replica=replica, replica_state=ReplicaState(1))
+
+
+def test_reads_go_to_the_replica():
+    session = make_session()
+
+    assert session.get_bind(clause=select(literal(1))) is replica
+
+
+def test_read_sent_to_the_primary():
+    session = make_session()
+    statement = select(literal(1)).execution_options(**{USE_PRIMARY: True})
+
+    assert session.get_bind(clause=statement) is primary
+    assert session.get_bind(clause=select(literal(1))) is replica
+
+
+def test_reads_after_a_write_stay_on_the_primary():
+    session = make_session()
+
+    assert session.get_bind(clause=insert(table("account"))) is primary
+    assert session.get_bind(clause=select(literal(1))) is primary
@@ -0,0 +1,50 @@
+import uuid
+
+from db.base import SASubscription
+
+
+async def test_search_subscriptions_pages(client, session):
+    name = f"test-{uuid.uuid4()}"
+    session.add_all(SASubscription(name=name) for _ in range(3))
+    await session.flush()
+
+    response = await client.get(
+        "/api/v1/subscriptions/search", params={"filter_param": name, "page_size": 2}
+    )
+
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == 2
+    assert page["items"][0].keys() == {"id", "name", "is_deleted"}
+    assert page["next_cursor"]
+
+    response = await client.get(
+        "/api/v1/subscriptions/search",
+        params={"filter_param": name, "page_size": 2, "cursor": page["next_cursor"]},
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_cursor"] is None
+
+
+async def test_get_subscription_revalidates(client, session):
+    subscription = SASubscription(name=f"test-{uuid.uuid4()}")
+    session.add(subscription)
+    await session.flush()
+    params = {"subscription_id": str(subscription.id)}
+
+    response = await client.get("/api/v1/subscriptions", params=params)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == str(subscription.id)
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        "/api/v1/subscriptions", params=params, headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
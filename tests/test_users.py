@@ -0,0 +1,31 @@
+import uuid
+
+import httpx
+import orjson
+
+from core.config import settings
+from managers.user import get_user_service
+
+
+class StubTokenProvider:
+    async def get_token(self) -> str:
+        return "token"
+
+
+async def test_user_service_sends_through_the_injected_client():
+    user_id = uuid.uuid4()
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": str(user_id), "rights": ["user"]}])
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = await anext(get_user_service(client, StubTokenProvider()))  # type: ignore
+        users = await service.get_users([user_id])
+
+    assert [(user.id, user.rights) for user in users] == [(user_id, ["user"])]
+    (request,) = requests
+    assert str(request.url) == settings.url_get_users
+    assert request.headers["Authorization"] == "Bearer token"
+    assert orjson.loads(request.content) == {"ids": [str(user_id)]}
@@ -0,0 +1,30 @@
+import worker
+from core.config import Settings, settings
+from workers.expiry import expiry_sweeper
+from workers.outbox import outbox_relay
+
+BACKGROUND_FEATURES = (
+    "expiry_sweeper_enabled",
+    "catalog_enabled",
+    "billing_event_queue_enabled",
+    "outbox_enabled",
+    "notify_listener_enabled",
+)
+
+
+def test_background_features_default_off():
+    for name in BACKGROUND_FEATURES:
+        assert Settings.model_fields[name].default is False, name
+    # account_status INSERTs fail without partitions for the coming months.
+    assert Settings.model_fields["partition_maintenance_enabled"].default is True
+
+
+def test_worker_runs_enabled_loops(monkeypatch):
+    for name in BACKGROUND_FEATURES + ("partition_maintenance_enabled",):
+        monkeypatch.setattr(settings, name, False)
+    assert worker.enabled_workers() == []
+
+    monkeypatch.setattr(settings, "expiry_sweeper_enabled", True)
+    monkeypatch.setattr(settings, "outbox_enabled", True)
+
+    assert worker.enabled_workers() == [expiry_sweeper, outbox_relay]